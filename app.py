@@ -5,11 +5,12 @@ AgriDec - 基于网络爬虫的农业数据服务平台
 主应用程序入口
 """
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session
+from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session, Response, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from datetime import datetime, timedelta
 import os
 import json
+import threading
 
 # 导入共享数据库实例
 from database import db, bcrypt, init_db
@@ -41,6 +42,7 @@ def get_db():
 
 # 导入模块
 from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.job_queue import ACTIVE_STATUSES, FAILED, CrawlJobQueue, format_sse
 from data_analysis.analyzer import DataAnalyzer
 
 # 强制重新加载图表生成器模块
@@ -50,7 +52,7 @@ if 'visualization.chart_generator' in sys.modules:
     importlib.reload(sys.modules['visualization.chart_generator'])
 
 from visualization.chart_generator import ChartGenerator
-from scheduler import start_scheduler, get_scheduler_status
+from scheduler import start_scheduler, get_scheduler_status, run_scheduled_job
 
 # 导入认证相关模块
 from auth.models import User, SeedPrice, WeatherData, FarmMachine
@@ -65,7 +67,33 @@ def load_user(user_id):
     return User.query.get(int(user_id))
 
 # 初始化组件
-crawler_manager = CrawlerManager()
+# 采集组件在首次使用时创建：解析进程池以 spawn 方式启动时会把本模块作为 __mp_main__ 重新导入，
+# 导入时不能打开采集缓存或启动任务队列线程
+_crawler_manager = None
+_crawl_jobs = None
+_components_lock = threading.Lock()
+
+def get_crawler_manager():
+    """获取应用共享的爬虫管理器"""
+    global _crawler_manager
+    with _components_lock:
+        if _crawler_manager is None:
+            _crawler_manager = CrawlerManager()
+        return _crawler_manager
+
+def get_crawl_jobs():
+    """获取后台采集任务队列"""
+    global _crawl_jobs
+    manager = get_crawler_manager()
+    with _components_lock:
+        if _crawl_jobs is None:
+            _crawl_jobs = CrawlJobQueue(
+                manager,
+                manager.crawl_config['crawl_jobs_path'],
+                max_workers=manager.crawl_config['job_workers']
+            )
+        return _crawl_jobs
+
 data_analyzer = DataAnalyzer()
 
 # 强制重新创建图表生成器实例以获取最新功能
@@ -226,23 +254,98 @@ def admin_database():
 # API接口
 @app.route('/api/crawl-data', methods=['POST'])
 def crawl_data():
-    """数据采集API"""
+    """数据采集API：提交后台采集任务，立即返回任务ID"""
     try:
         data = request.get_json()
         website = data.get('website')
         data_type = data.get('data_type')
         region = data.get('region', '全国')
-        
-        # 调用爬虫管理器
-        result = crawler_manager.crawl_data(website, data_type, region)
-        
-        return jsonify(result)
+
+        if not get_crawler_manager()._validate_params(website, data_type):
+            return jsonify({
+                'success': False,
+                'error': f'不支持的网站类型 {website} 或数据类型 {data_type}'
+            }), 400
+
+        options = {key: data[key] for key in ('max_pages', 'incremental') if key in data}
+        job, coalesced = get_crawl_jobs().submit(website, data_type, region, **options)
+
+        return jsonify({
+            'success': True,
+            'job_id': job['job_id'],
+            'status': job['status'],
+            'coalesced': coalesced,
+            'status_url': url_for('crawl_job_status', job_id=job['job_id']),
+            'result_url': url_for('crawl_job_result', job_id=job['job_id']),
+            'events_url': url_for('crawl_job_events', job_id=job['job_id']),
+            'message': '已合并到正在进行的采集任务' if coalesced else '采集任务已提交'
+        }), 202
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/crawl-jobs')
+def crawl_job_list():
+    """最近的采集任务"""
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({'jobs': get_crawl_jobs().list_jobs(limit), 'stats': get_crawl_jobs().get_stats()})
+
+@app.route('/api/crawl-jobs/<job_id>')
+def crawl_job_status(job_id):
+    """采集任务状态与进度"""
+    job = get_crawl_jobs().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '任务不存在'}), 404
+    job.pop('result')
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/api/crawl-jobs/<job_id>/events')
+def crawl_job_events(job_id):
+    """采集进度事件流（Server-Sent Events），逐页推送抓取结果，任务结束后关闭"""
+    if get_crawl_jobs().get(job_id) is None:
+        return jsonify({'success': False, 'error': '任务不存在'}), 404
+
+    # 浏览器断线重连时通过 Last-Event-ID 续读
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('after') or 0
+    try:
+        after = int(last_event_id)
+    except ValueError:
+        after = 0
+
+    def stream():
+        yield 'retry: 3000\n\n'
+        for item in get_crawl_jobs().iter_events(job_id, after=after):
+            if item is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield format_sse(*item)
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # 禁止反向代理缓冲
+    })
+
+@app.route('/api/crawl-jobs/<job_id>/result')
+def crawl_job_result(job_id):
+    """采集任务结果；任务未结束时返回 202"""
+    job = get_crawl_jobs().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '任务不存在'}), 404
+    if job['status'] in ACTIVE_STATUSES:
+        return jsonify({'success': False, 'status': job['status'], 'progress': job['progress']}), 202
+    if job['status'] == FAILED:
+        return jsonify({'success': False, 'status': job['status'], 'error': job['error']})
+    return jsonify(dict(job['result'], status=job['status']))
+
+@app.route('/api/crawler-metrics')
+def crawler_metrics():
+    """爬虫指标：?format=prometheus 返回 Prometheus 文本格式，默认返回 JSON"""
+    if request.args.get('format') == 'prometheus':
+        return Response(get_crawler_manager().metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+    return jsonify(get_crawler_manager().metrics.snapshot())
+
 @app.route('/api/generate-chart', methods=['POST'])
 def generate_chart():
     """图表生成API"""
@@ -275,6 +378,35 @@ def scheduler_status():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/scheduler/jobs/<job_id>/run', methods=['POST'])
+@login_required
+def run_scheduler_job(job_id):
+    """立即执行一个定时任务（不等待下一次调度，需要管理员权限）"""
+    try:
+        # 检查管理员权限（任务包括数据库清理）
+        if not current_user.is_admin:
+            return jsonify({
+                'success': False,
+                'error': '需要管理员权限'
+            }), 403
+
+        status = get_scheduler_status()
+        if job_id not in status['jobs']:
+            return jsonify({'success': False, 'error': '任务不存在'}), 404
+        if not status['is_running']:
+            return jsonify({'success': False, 'error': '调度器未运行'}), 409
+        if not run_scheduled_job(job_id):
+            return jsonify({'success': False, 'error': '任务仍在运行中，本次未执行'}), 409
+
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': url_for('scheduler_status'),
+            'message': '任务已开始执行' if status['is_leader'] else '已转交主调度进程执行'
+        }), 202
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/seed-prices')
 def get_seed_prices():
     """获取种子价格数据"""
@@ -374,9 +506,17 @@ def handle_exception(e):
 
 # 初始化数据库
 def create_tables():
-    """创建数据库表"""
+    """创建数据库表，并检查旧数据库是否缺少种子价格与天气数据的自然键唯一约束"""
+    from data_crawler.bulk_writer import missing_natural_keys
+
     with app.app_context():
         db.create_all()
+        # 补建约束需要删除重复行，只提示运维执行迁移脚本，启动时不修改数据；
+        # 未迁移前 bulk_upsert 按普通 insert 写入
+        missing = missing_natural_keys(db.engine)
+        if missing:
+            app.logger.error(f"数据表 {', '.join(missing)} 缺少自然键唯一约束，采集数据将按普通 insert 写入；"
+                             f"请备份数据库后运行 scripts/migrate_natural_keys.py")
 
 if __name__ == '__main__':
     # 创建必要的目录
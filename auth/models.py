@@ -273,6 +273,9 @@ class SeedPrice(db.Model):
     source_url = db.Column(db.String(500))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # 自然键：同一产品同一品种同一地区每天一条价格记录
+    __table_args__ = (db.UniqueConstraint('product_name', 'variety', 'region', 'date', name='uk_seed_price'),)
+
 class WeatherData(db.Model):
     """天气数据模型"""
     __tablename__ = 'weather_data'
@@ -286,6 +289,9 @@ class WeatherData(db.Model):
     wind_speed = db.Column(db.Float)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # 自然键：同一地区同一天只能有一条记录
+    __table_args__ = (db.UniqueConstraint('region', 'date', name='uk_region_date'),)
+
 class FarmMachine(db.Model):
     """农机设备数据模型"""
     __tablename__ = 'farm_machines'
@@ -60,6 +60,29 @@ class Config:
         }
     }
     
+    # 爬虫网络传输配置（进程内所有 CrawlerManager 共享同一连接池）
+    CRAWLER_TRANSPORT = {
+        'backend': 'requests',      # requests / httpx（可选依赖）
+        'http2': False,             # 启用 HTTP/2 需要安装 httpx[http2]
+        'pool_connections': 10,     # 缓存连接池的主机数
+        'pool_maxsize': 20,         # 每个主机保留的连接数
+        'keep_alive': True,         # 复用连接
+        'keepalive_expiry': 60,     # 空闲连接保留时间（秒，httpx 后端）
+        'dns_cache_ttl': 300,       # DNS 缓存时间（秒），0 表示不缓存
+        'dns_cache_size': 256       # DNS 缓存的最大条目数
+    }
+
+    # 过期数据清理配置（定时任务“数据库清理”按主键分批删除）
+    DATA_RETENTION = {
+        'tables': {                 # 表名 -> 保留天数，或 {'days', 'date_column', 'archive'}
+            'seed_prices': 30,
+            'weather_data': 30
+        },
+        'batch_size': 1000,         # 每批删除的行数（每批一个短事务）
+        'pause': 0.05,              # 每批之间的暂停（秒），给线上查询让出锁
+        'archive': False            # 删除前写入 backups/retention 下的 gzip 归档
+    }
+
     # 数据源配置
     DATA_SOURCES = {
         'seed_trade': {
@@ -74,6 +97,8 @@ class Config:
             'base_url': 'http://www.weather.com.cn',
             'enabled': True,
             'rate_limit': 2000,
+            'burst': 10,        # 全国天气需一次抓取各省省会
+            'concurrency': 4,   # 同时进行的请求数
             'data_types': ['weather_forecast']
         },
         'farm_machine': {
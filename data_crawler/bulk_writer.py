@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+爬虫数据批量写入
+使用 SQLAlchemy Core insert() + executemany 分块写入，
+按自然键去重：MySQL 使用 ON DUPLICATE KEY UPDATE，SQLite / PostgreSQL 使用 ON CONFLICT；
+db.create_all() 不会修改已存在的表，旧数据库由 ensure_natural_keys 去重并补建唯一约束
+"""
+
+import threading
+import weakref
+
+from sqlalchemy import Index, Table, MetaData, func, inspect, insert, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+# 表名 -> 自然键（需与模型中的唯一约束一致）
+NATURAL_KEYS = {
+    'seed_prices': ('product_name', 'variety', 'region', 'date'),
+    'weather_data': ('region', 'date'),
+}
+
+# 表名 -> 唯一约束名（与模型和 scripts/mysql_schema.sql 一致）
+UNIQUE_KEY_NAMES = {
+    'seed_prices': 'uk_seed_price',
+    'weather_data': 'uk_region_date',
+}
+
+# Engine -> 已确认存在唯一约束的表名，避免每次写入都查询表结构
+_verified_keys = weakref.WeakKeyDictionary()
+_verified_lock = threading.Lock()
+
+# 更新已有记录时保留的列
+_PRESERVED_COLUMNS = ('id', 'created_at')
+
+
+def upsert_statement(table, dialect_name, key_columns):
+    """
+    构造指定方言的 upsert 语句
+
+    Args:
+        table: SQLAlchemy Table
+        dialect_name: 方言名称（mysql / sqlite / postgresql）
+        key_columns: 自然键列名；为空时生成普通 insert
+
+    Returns:
+        Insert: 可配合参数列表执行 executemany 的语句
+    """
+    if not key_columns:
+        return insert(table)
+
+    update_columns = [
+        column.name for column in table.columns
+        if column.name not in key_columns and column.name not in _PRESERVED_COLUMNS
+    ]
+
+    if dialect_name == 'mysql':
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update({name: stmt.inserted[name] for name in update_columns})
+
+    if dialect_name in ('sqlite', 'postgresql'):
+        dialect_module = sqlite if dialect_name == 'sqlite' else postgresql
+        stmt = dialect_module.insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={name: stmt.excluded[name] for name in update_columns}
+        )
+
+    return insert(table)
+
+
+def bulk_upsert(engine, table, rows, key_columns=None, chunk_size=1000, on_commit=None):
+    """
+    分块批量写入，每块一个短事务
+
+    Args:
+        engine: SQLAlchemy Engine
+        table: SQLAlchemy Table
+        rows: 行字典的可迭代对象（可以是生成器）
+        key_columns: 自然键列名，默认取 NATURAL_KEYS；传入空元组表示不去重
+        chunk_size: 每块行数
+        on_commit: 每块提交后以该块（块内去重前）的行数调用
+
+    Returns:
+        int: 写入（插入或更新）的行数
+    """
+    if key_columns is None:
+        key_columns = NATURAL_KEYS.get(table.name)
+        if key_columns and not _natural_key_verified(engine, table.name, key_columns):
+            print(f"警告: 表 {table.name} 缺少 {', '.join(key_columns)} 上的唯一约束，本次按普通 insert 写入；"
+                  f"请运行 scripts/migrate_natural_keys.py 去重并补建约束")
+            key_columns = ()
+    stmt = upsert_statement(table, engine.dialect.name, key_columns)
+
+    written = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            written += _execute_chunk(engine, stmt, chunk, key_columns)
+            if on_commit:
+                on_commit(len(chunk))
+            chunk = []
+    if chunk:
+        written += _execute_chunk(engine, stmt, chunk, key_columns)
+        if on_commit:
+            on_commit(len(chunk))
+    return written
+
+
+def _execute_chunk(engine, stmt, chunk, key_columns):
+    """执行一块写入；块内重复的自然键只保留最后一条"""
+    if key_columns:
+        chunk = list({tuple(row.get(key) for key in key_columns): row for row in chunk}.values())
+    with engine.begin() as connection:
+        connection.execute(stmt, chunk)
+    return len(chunk)
+
+
+def has_unique_key(engine, table_name, key_columns):
+    """表上是否已有与 key_columns 完全一致的唯一约束或唯一索引"""
+    inspector = inspect(engine)
+    wanted = set(key_columns)
+    candidates = [constraint['column_names'] for constraint in inspector.get_unique_constraints(table_name)]
+    candidates += [index['column_names'] for index in inspector.get_indexes(table_name) if index.get('unique')]
+    return any(set(columns) == wanted for columns in candidates)
+
+
+def missing_natural_keys(engine, tables=None):
+    """
+    检查已存在的表是否缺少自然键唯一约束（只读，不修改数据）
+
+    Returns:
+        list: 缺少约束的表名；不存在的表不计入
+    """
+    existing = set(inspect(engine).get_table_names())
+    return [table for table in (tables or NATURAL_KEYS)
+            if table in existing and not has_unique_key(engine, table, NATURAL_KEYS[table])]
+
+
+def _natural_key_verified(engine, table_name, key_columns):
+    with _verified_lock:
+        if table_name in _verified_keys.get(engine, ()):
+            return True
+    if not has_unique_key(engine, table_name, key_columns):
+        return False
+    with _verified_lock:
+        _verified_keys.setdefault(engine, set()).add(table_name)
+    return True
+
+
+def ensure_natural_keys(engine, tables=None):
+    """
+    为已存在的表补建自然键唯一约束
+
+    缺少约束的表先删除自然键重复的行（每组保留 id 最大、即最近写入的一行），
+    再创建唯一索引；已有约束的表不做改动。
+
+    Args:
+        engine: SQLAlchemy Engine
+        tables: 表名列表，默认 NATURAL_KEYS 中全部存在的表
+
+    Returns:
+        dict: 表名 -> {'duplicates_removed': 删除的重复行数, 'created': 是否新建了约束}
+    """
+    existing = set(inspect(engine).get_table_names())
+    results = {}
+    for table_name in tables or NATURAL_KEYS:
+        key_columns = NATURAL_KEYS[table_name]
+        if table_name not in existing or has_unique_key(engine, table_name, key_columns):
+            continue
+
+        table = Table(table_name, MetaData(), autoload_with=engine)
+        keep = select(func.max(table.c.id).label('id')).group_by(
+            *[table.c[name] for name in key_columns]
+        ).subquery()
+        with engine.begin() as connection:
+            removed = connection.execute(
+                table.delete().where(table.c.id.not_in(select(keep.c.id)))
+            ).rowcount
+            Index(UNIQUE_KEY_NAMES[table_name], *[table.c[name] for name in key_columns],
+                  unique=True).create(connection)
+        results[table_name] = {'duplicates_removed': removed, 'created': True}
+    return results
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+按主机的熔断器
+连续失败达到阈值后熔断（open），冷却期内对该主机的请求直接失败；
+冷却结束后放行一次探测请求（half-open），成功则恢复（closed），失败则重新熔断。
+状态和失败历史保存在 SQLite 中，进程重启后仍然生效
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class HostCircuitBreaker:
+    """基于 SQLite 持久化的按主机熔断器"""
+
+    def __init__(self, path, failure_threshold=5, recovery_timeout=300, history_size=50, clock=time.time):
+        """
+        Args:
+            path: 状态文件路径（':memory:' 表示不落盘）
+            failure_threshold: 触发熔断的连续失败次数
+            recovery_timeout: 熔断后等待多少秒再放行探测请求
+            history_size: 每个主机保留的失败记录条数
+            clock: 时间函数（持久化状态跨进程使用，需为墙上时间）
+        """
+        self.path = path
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.history_size = history_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._probing = set()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS breaker_hosts (
+                host TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                total_failures INTEGER NOT NULL DEFAULT 0,
+                total_successes INTEGER NOT NULL DEFAULT 0,
+                rejected INTEGER NOT NULL DEFAULT 0,
+                opened_at REAL,
+                last_failure REAL,
+                last_success REAL,
+                last_error TEXT
+            );
+            CREATE TABLE IF NOT EXISTS breaker_failures (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                host TEXT NOT NULL,
+                failed_at REAL NOT NULL,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_breaker_failures_host ON breaker_failures (host, id);
+        """)
+        self._conn.commit()
+
+    def allow(self, url):
+        """
+        判断是否允许向该主机发送请求
+
+        熔断冷却期内返回 False；冷却结束后只放行一个探测请求，
+        其余请求在探测完成前仍然快速失败。
+        """
+        host = self._host(url)
+        with self._lock:
+            row = self._load(host)
+            if row is None or row['state'] == CLOSED:
+                return True
+
+            if row['state'] == OPEN and self._clock() - row['opened_at'] >= self.recovery_timeout:
+                self._update(host, state=HALF_OPEN)
+                row['state'] = HALF_OPEN
+
+            if row['state'] == HALF_OPEN and host not in self._probing:
+                self._probing.add(host)
+                return True
+
+            self._conn.execute('UPDATE breaker_hosts SET rejected = rejected + 1 WHERE host = ?', (host,))
+            self._conn.commit()
+            return False
+
+    def record_success(self, url):
+        """记录一次成功响应，半开状态下恢复为关闭"""
+        host = self._host(url)
+        with self._lock:
+            self._probing.discard(host)
+            self._ensure(host)
+            self._conn.execute(
+                'UPDATE breaker_hosts SET state = ?, consecutive_failures = 0, opened_at = NULL, '
+                'total_successes = total_successes + 1, last_success = ? WHERE host = ?',
+                (CLOSED, self._clock(), host)
+            )
+            self._conn.commit()
+
+    def record_failure(self, url, error=None):
+        """
+        记录一次失败（超时、连接错误、5xx）
+
+        Returns:
+            bool: 该主机当前是否处于熔断状态
+        """
+        host = self._host(url)
+        now = self._clock()
+        with self._lock:
+            was_probing = host in self._probing
+            self._probing.discard(host)
+            row = self._ensure(host)
+
+            failures = row['consecutive_failures'] + 1
+            tripped = was_probing or row['state'] != CLOSED or failures >= self.failure_threshold
+            self._conn.execute(
+                'UPDATE breaker_hosts SET state = ?, consecutive_failures = ?, total_failures = total_failures + 1, '
+                'opened_at = ?, last_failure = ?, last_error = ? WHERE host = ?',
+                (OPEN if tripped else CLOSED, failures, now if tripped else None, now, error, host)
+            )
+            self._conn.execute(
+                'INSERT INTO breaker_failures (host, failed_at, error) VALUES (?, ?, ?)', (host, now, error)
+            )
+            self._conn.execute(
+                'DELETE FROM breaker_failures WHERE host = ? AND id NOT IN '
+                '(SELECT id FROM breaker_failures WHERE host = ? ORDER BY id DESC LIMIT ?)',
+                (host, host, self.history_size)
+            )
+            self._conn.commit()
+        if tripped and row['state'] == CLOSED:
+            print(f"主机 {host} 连续失败 {failures} 次，熔断 {self.recovery_timeout} 秒")
+        return tripped
+
+    def reset(self, url=None):
+        """手动恢复指定主机（或全部主机）"""
+        with self._lock:
+            if url is None:
+                self._probing.clear()
+                self._conn.execute('UPDATE breaker_hosts SET state = ?, consecutive_failures = 0, opened_at = NULL',
+                                   (CLOSED,))
+            else:
+                host = self._host(url)
+                self._probing.discard(host)
+                self._update(host, state=CLOSED, consecutive_failures=0, opened_at=None)
+            self._conn.commit()
+
+    def get_status(self):
+        """获取各主机的熔断状态与健康统计"""
+        now = self._clock()
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT host, state, consecutive_failures, total_failures, total_successes, rejected, '
+                'opened_at, last_failure, last_success, last_error FROM breaker_hosts ORDER BY host'
+            ).fetchall()
+            recent = {
+                host: count for host, count in self._conn.execute(
+                    'SELECT host, COUNT(*) FROM breaker_failures WHERE failed_at >= ? GROUP BY host',
+                    (now - 3600,)
+                )
+            }
+
+        status = {}
+        for (host, state, consecutive, failures, successes, rejected,
+             opened_at, last_failure, last_success, last_error) in rows:
+            retry_in = None
+            if state == OPEN:
+                retry_in = round(max(0.0, opened_at + self.recovery_timeout - now), 1)
+            status[host] = {
+                'state': state,
+                'consecutive_failures': consecutive,
+                'total_failures': failures,
+                'total_successes': successes,
+                'rejected_requests': rejected,
+                'failures_last_hour': recent.get(host, 0),
+                'retry_in_seconds': retry_in,
+                'last_failure': last_failure,
+                'last_success': last_success,
+                'last_error': last_error
+            }
+        return status
+
+    def get_failure_history(self, url, limit=20):
+        """获取主机最近的失败记录（时间倒序）"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT failed_at, error FROM breaker_failures WHERE host = ? ORDER BY id DESC LIMIT ?',
+                (self._host(url), limit)
+            ).fetchall()
+        return [{'failed_at': failed_at, 'error': error} for failed_at, error in rows]
+
+    @staticmethod
+    def _host(url):
+        return (urlparse(url).netloc or url).lower()
+
+    def _load(self, host):
+        row = self._conn.execute(
+            'SELECT state, consecutive_failures, opened_at FROM breaker_hosts WHERE host = ?', (host,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'state': row[0], 'consecutive_failures': row[1], 'opened_at': row[2]}
+
+    def _ensure(self, host):
+        """读取主机状态，不存在时创建（调用方持有锁）"""
+        row = self._load(host)
+        if row is None:
+            self._conn.execute('INSERT INTO breaker_hosts (host, state) VALUES (?, ?)', (host, CLOSED))
+            row = {'state': CLOSED, 'consecutive_failures': 0, 'opened_at': None}
+        return row
+
+    def _update(self, host, **fields):
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        self._conn.execute(f'UPDATE breaker_hosts SET {assignments} WHERE host = ?', [*fields.values(), host])
+        self._conn.commit()
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+增量采集状态
+记录每个页面的内容指纹和已采集记录的内容哈希（SQLite 本地文件），
+让日常采集只处理新增或变化的数据。
+指纹只在对应记录入库提交后写入（见 PendingMarks），并在 max_age 后过期，
+过期后页面重新解析、记录重新入库，不会因数据保留期清理而永久缺失
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+# 计算记录指纹时忽略的易变字段（按网站）；date 属于自然键，不能忽略，
+# 否则内容不变的列表每天不会产生新的价格记录
+VOLATILE_FIELDS = {}
+
+# 指纹默认有效期（秒），需短于数据保留期（DATA_RETENTION）
+DEFAULT_MAX_AGE = 7 * 86400
+
+
+def record_fingerprint(record, ignore=()):
+    """计算记录内容哈希"""
+    content = {key: value for key, value in record.items() if key not in ignore}
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def content_fingerprint(content):
+    """计算页面内容哈希"""
+    return hashlib.sha1(bytes(content)).hexdigest()
+
+
+class CrawlState:
+    """基于 SQLite 的增量采集状态存储
+
+    page_changed / filter_new_records 只做比较，不写入状态；
+    mark_page / mark_records 在数据入库提交后登记指纹。
+    超过 max_age 未重新登记的页面和记录视为新内容。
+    """
+
+    def __init__(self, path, max_age=DEFAULT_MAX_AGE, clock=time.time):
+        self.path = path
+        self.max_age = max_age
+        self.stats = {
+            'pages_unchanged': 0,
+            'pages_changed': 0,
+            'records_new': 0,
+            'records_seen': 0
+        }
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS crawl_pages (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                last_changed REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS crawl_records (
+                website TEXT NOT NULL,
+                record_hash TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (website, record_hash)
+            );
+            CREATE INDEX IF NOT EXISTS ix_crawl_records_first_seen ON crawl_records (first_seen);
+            CREATE TABLE IF NOT EXISTS crawl_runs (
+                website TEXT PRIMARY KEY,
+                complete INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def _cutoff(self):
+        return self._clock() - self.max_age if self.max_age else float('-inf')
+
+    def page_changed(self, url, content):
+        """
+        比较页面内容指纹（不写入状态）
+
+        Returns:
+            bool: 页面是首次出现、内容有变化，或上次登记已过期
+        """
+        content_hash = content_fingerprint(content)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT content_hash, last_changed FROM crawl_pages WHERE url = ?', (url,)
+            ).fetchone()
+            changed = row is None or row[0] != content_hash or row[1] < self._cutoff()
+            self.stats['pages_changed' if changed else 'pages_unchanged'] += 1
+        return changed
+
+    def mark_page(self, url, content_hash):
+        """登记页面内容指纹（页面的记录全部入库后调用）"""
+        now = self._clock()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO crawl_pages (url, content_hash, last_changed, last_seen) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET '
+                'last_changed = CASE WHEN content_hash != excluded.content_hash OR last_changed < ? '
+                'THEN excluded.last_changed ELSE last_changed END, '
+                'content_hash = excluded.content_hash, last_seen = excluded.last_seen',
+                (url, content_hash, now, now, self._cutoff())
+            )
+            self._conn.commit()
+
+    def mark_page_unchanged(self, url):
+        """记录一次未变化的页面（如服务端返回 304）"""
+        with self._lock:
+            self._conn.execute('UPDATE crawl_pages SET last_seen = ? WHERE url = ?', (self._clock(), url))
+            self._conn.commit()
+            self.stats['pages_unchanged'] += 1
+
+    def filter_new_records(self, website, records):
+        """
+        过滤掉此前已入库的记录（不写入状态）
+
+        Returns:
+            list: 未登记或登记已过期的记录（保持原有顺序，批内重复只保留一条）
+        """
+        ignore = VOLATILE_FIELDS.get(website, ())
+        hashed = {}
+        for record in records:
+            hashed.setdefault(record_fingerprint(record, ignore), record)
+        if not hashed:
+            return []
+
+        cutoff = self._cutoff()
+        with self._lock:
+            seen = set()
+            hashes = list(hashed)
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                seen.update(row[0] for row in self._conn.execute(
+                    f'SELECT record_hash FROM crawl_records WHERE website = ? AND first_seen >= ? '
+                    f'AND record_hash IN ({placeholders})',
+                    [website, cutoff] + batch
+                ))
+
+            new_records = [record for h, record in hashed.items() if h not in seen]
+            self.stats['records_new'] += len(new_records)
+            self.stats['records_seen'] += len(records) - len(new_records)
+        return new_records
+
+    def mark_records(self, website, hashes):
+        """登记已入库记录的指纹，并删除过期的指纹"""
+        now = self._clock()
+        with self._lock:
+            self._conn.execute('DELETE FROM crawl_records WHERE first_seen < ?', (self._cutoff(),))
+            self._conn.executemany(
+                'INSERT INTO crawl_records (website, record_hash, first_seen, last_seen) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(website, record_hash) DO UPDATE SET last_seen = excluded.last_seen',
+                [(website, h, now, now) for h in hashes]
+            )
+            self._conn.commit()
+
+    def last_run_complete(self, website):
+        """该网站上一次增量采集是否完整结束（全部页面处理完且记录全部入库）"""
+        with self._lock:
+            row = self._conn.execute('SELECT complete FROM crawl_runs WHERE website = ?', (website,)).fetchone()
+        return row is None or bool(row[0])
+
+    def set_run_complete(self, website, complete):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO crawl_runs (website, complete, updated_at) VALUES (?, ?, ?)',
+                (website, int(complete), self._clock())
+            )
+            self._conn.commit()
+
+    def pending(self, website):
+        """开始一次增量采集，返回其待确认状态"""
+        return PendingMarks(self, website)
+
+    def get_stats(self):
+        """获取增量采集统计信息"""
+        with self._lock:
+            pages = self._conn.execute('SELECT COUNT(*) FROM crawl_pages').fetchone()[0]
+            records = self._conn.execute('SELECT COUNT(*) FROM crawl_records').fetchone()[0]
+            stats = dict(self.stats)
+        stats.update({'tracked_pages': pages, 'tracked_records': records})
+        return stats
+
+
+class PendingMarks:
+    """一次增量采集中尚未确认入库的页面指纹和记录指纹
+
+    采集时按产出顺序排队（每页先是该页的新记录，再是页面指纹），入库每提交 n 条记录
+    调用一次 commit(n)，只登记已提交的记录和记录全部提交的页面。入库失败或采集中途
+    取消时，未提交部分不会登记，下次采集仍会重新处理。
+
+    开始时把本网站标记为未完成，finish() 确认全部处理完才恢复；上一次未完成时
+    full_pass 为 True，本次不因某页没有新记录而提前停止翻页。
+    """
+
+    def __init__(self, state, website):
+        self.state = state
+        self.website = website
+        self.full_pass = not state.last_run_complete(website)
+        self._queue = deque()  # ('record', 指纹或 None) / ('page', url, 内容指纹)
+        self._lock = threading.Lock()
+        state.set_run_complete(website, False)
+
+    def add_records(self, records, track=True):
+        """登记即将产出的记录；track 为 False 时只占位（如后备数据，不登记指纹）"""
+        ignore = VOLATILE_FIELDS.get(self.website, ())
+        with self._lock:
+            for record in records:
+                self._queue.append(('record', record_fingerprint(record, ignore) if track else None))
+
+    def add_page(self, url, content_hash):
+        """页面的记录已全部产出；之前没有待提交的记录时立即登记页面指纹"""
+        with self._lock:
+            if self._queue:
+                self._queue.append(('page', url, content_hash))
+                return
+        self.state.mark_page(url, content_hash)
+
+    def commit(self, count):
+        """前 count 条记录已入库提交"""
+        hashes, pages = [], []
+        with self._lock:
+            while self._queue and (count > 0 or self._queue[0][0] == 'page'):
+                entry = self._queue.popleft()
+                if entry[0] == 'record':
+                    count -= 1
+                    if entry[1] is not None:
+                        hashes.append(entry[1])
+                else:
+                    pages.append(entry[1:])
+        if hashes:
+            self.state.mark_records(self.website, hashes)
+        for url, content_hash in pages:
+            self.state.mark_page(url, content_hash)
+
+    def finish(self, exhausted):
+        """采集结束；exhausted 表示全部页面都已处理，此时没有未提交的记录才算完整结束"""
+        with self._lock:
+            complete = exhausted and not self._queue
+        self.state.set_run_complete(self.website, complete)
+        return complete
@@ -10,24 +10,75 @@ import json
 import requests
 import time
 import random
-import re
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import pandas as pd
 
 # 添加项目根目录到Python路径
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from config.app_config import get_config
+from data_crawler.bulk_writer import bulk_upsert
+from data_crawler.circuit_breaker import HostCircuitBreaker
+from data_crawler.crawl_state import CrawlState, content_fingerprint
+from data_crawler.extraction import (
+    extract_seed_fields, extract_machine_fields, extract_temperature, clean_weather_text
+)
+from data_crawler.frontier import CrawlFrontier, LinkRule, discover_links
+from data_crawler.http_cache import HttpCache
+from data_crawler.page_archive import PageArchive
+from data_crawler.parser_backend import ParserBackend
+from data_crawler.pipeline import ParsePipeline, _init_parse_worker
+from data_crawler.rate_limiter import HostRateLimiter
+from data_crawler.transport import get_shared_transport
+from data_crawler.metrics import CrawlMetrics, crawl_metrics
+from data_crawler.quality import QualityReport, assess_quality
+from data_crawler.synthetic import MACHINE_BRANDS, MACHINE_CATALOG, SEED_VARIETIES, WEATHER_TYPES
+from data_crawler.weather_cities import weather_targets
 
 class CrawlerManager:
     """农业数据爬虫管理器"""
-    
-    def __init__(self):
+
+    # 网站类型 -> (页面任务构造方法, 后备数据方法, 日志名称)
+    PAGE_BUILDERS = {
+        'seed_trade': ('_seed_trade_pages', '_get_fallback_seed_data', '种子'),
+        'weather': ('_weather_pages', '_get_fallback_weather_data', '天气'),
+        'farm_machine': ('_farm_machine_pages', '_get_fallback_machine_data', '农机'),
+    }
+
+    def __init__(self, http_cache=None, crawl_state=None, page_archive=None, circuit_breaker=None,
+                 transport=None):
+        """
+        Args:
+            http_cache: HttpCache 实例；None 使用默认磁盘缓存，False 禁用缓存
+            crawl_state: CrawlState 实例；None 使用默认状态文件，False 禁用增量采集
+            page_archive: PageArchive 实例；None 使用默认归档目录，False 不归档原始页面
+            circuit_breaker: HostCircuitBreaker 实例；None 使用默认状态文件，False 禁用熔断
+            transport: 传输层实例；None 使用进程内共享的传输层，False 表示不发送请求（仅解析）
+        """
         self.supported_websites = {
             'seed_trade': {
                 'name': '中国种子交易网',
                 'data_types': ['price', 'product_info'],
-                'base_url': 'https://www.114seeds.com'
+                'base_url': 'https://www.114seeds.com',
+                # 爬取边界：种子页面（URL 模板可引用本站点的配置项）与链接发现规则
+                'frontier': {
+                    'seeds': [
+                        {'url': '{base_url}/supply/list_h_26_s_997.html', 'label': '种子供应列表',
+                         'priority': 10, 'paginated': True},
+                    ],
+                    'follow': [
+                        # 翻页链接（第1页与种子页面相同，不重复抓取）
+                        {'pattern': r'/supply/list_h_26_p_(?!1_)\d+_s_997\.html$', 'label': '种子供应列表',
+                         'priority': 5, 'paginated': True},
+                    ],
+                    'max_depth': 50
+                }
             },
             'weather': {
                 'name': '中国天气网',
@@ -37,28 +88,139 @@ class CrawlerManager:
             'farm_machine': {
                 'name': '农机360网',
                 'data_types': ['product_info', 'price'],
-                'base_url': 'https://www.nongji360.com'
+                'base_url': 'https://www.nongji360.com',
+                'search_url': 'https://o2o.nongji360.com/search',
+                'frontier': {
+                    'seeds': [
+                        {'url': '{base_url}', 'label': '农机首页', 'priority': 10},
+                        {'url': '{search_url}?c=309', 'label': '农机分类（拖拉机）', 'priority': 9},
+                        {'url': '{search_url}?c=107', 'label': '农机分类（收获机械）', 'priority': 8},
+                        {'url': '{search_url}?c=29', 'label': '农机分类（种植施肥）', 'priority': 7},
+                    ],
+                    'follow': [
+                        {'pattern': r'/search\?c=\d+&(?:amp;)?p(?:age)?=\d+$', 'label': '农机分类',
+                         'priority': 5, 'paginated': True},
+                    ],
+                    'max_depth': 5
+                }
             }
         }
 
-        # 配置请求会话
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        })
+        # 网络传输层（默认使用进程内共享的连接池）
+        if transport is None:
+            transport = get_shared_transport()
+        self.transport = transport or None
+
+        # 进程级爬虫指标（各阶段耗时、重试、限流等）
+        self.metrics = crawl_metrics
 
         # 爬虫配置
         self.crawl_config = {
-            'delay_range': (1, 3),  # 请求间隔范围（秒）
             'timeout': 30,          # 请求超时时间
             'max_retries': 3,       # 最大重试次数
-            'retry_delay': 5        # 重试间隔
+            'backoff_base': 1,      # 指数退避基数（秒）
+            'backoff_max': 30,      # 单次退避上限（秒）
+            'retry_after_max': 120,  # 服务端 Retry-After 的暂停上限（秒）
+            'max_workers': 4,       # crawl_many 并发任务数
+            'per_host_concurrency': 1,  # 同一主机同时进行的请求数
+            'default_rate_limit': 1800,  # 未配置主机的每小时请求额度
+            'rate_limit_burst': 5,  # 令牌桶容量（允许的突发请求数）
+            'http_cache_path': os.path.join(PROJECT_ROOT, 'cache', 'http_cache.db'),
+            'http_cache_max_bytes': 64 * 1024 * 1024,  # HTTP缓存容量上限
+            'crawl_state_path': os.path.join(PROJECT_ROOT, 'cache', 'crawl_state.db'),
+            'crawl_state_max_age': 7 * 86400,  # 增量指纹有效期（秒），需短于数据保留期
+            'page_archive_dir': os.path.join(PROJECT_ROOT, 'cache', 'page_archive'),
+            'page_archive_segment_bytes': 256 * 1024 * 1024,  # 单个归档分段文件上限
+            'page_archive_max_age': 90 * 86400,  # 原始页面保留期（秒），按整段删除
+            'page_archive_max_bytes': 4 * 1024 * 1024 * 1024,  # 归档总大小上限
+            'circuit_breaker_path': os.path.join(PROJECT_ROOT, 'cache', 'circuit_breaker.db'),
+            'breaker_failure_threshold': 5,  # 触发熔断的连续失败次数
+            'breaker_recovery_timeout': 300,  # 熔断冷却时间（秒），之后放行一次探测请求
+            'crawl_jobs_path': os.path.join(PROJECT_ROOT, 'cache', 'crawl_jobs.db'),
+            'job_workers': 2,       # 后台采集任务并发数
+            'fetch_workers': 4,     # 流水线抓取线程数
+            'parse_workers': min(4, os.cpu_count() or 1),  # 流水线解析进程数，0 表示不启用
+            'pipeline_queue_size': 16,  # 待解析页面队列上限（反压）
+            'pipeline_min_pages': 8,  # 页面数达到该值时才启用流水线
+            'frontier_batch_size': 16,  # 每轮从爬取边界取出的页面数
+            'db_chunk_size': 1000,  # 数据库批量写入每块的记录数
+            'quality_batch_size': 5000  # 流式采集时每批质量评估的记录数
         }
+
+        # 页面解析后端（lxml 优先、局部解析、记忆选择器）
+        self.parser_backend = ParserBackend()
+
+        # 条件请求缓存（ETag / Last-Modified）
+        if http_cache is None:
+            http_cache = HttpCache(
+                self.crawl_config['http_cache_path'],
+                max_bytes=self.crawl_config['http_cache_max_bytes']
+            )
+        self.http_cache = http_cache or None
+
+        # 增量采集状态（页面指纹与记录哈希）
+        if crawl_state is None:
+            crawl_state = CrawlState(self.crawl_config['crawl_state_path'],
+                                     max_age=self.crawl_config['crawl_state_max_age'])
+        self.crawl_state = crawl_state or None
+
+        # 原始页面归档（供离线重新解析）
+        if page_archive is None:
+            page_archive = PageArchive(
+                self.crawl_config['page_archive_dir'],
+                segment_max_bytes=self.crawl_config['page_archive_segment_bytes'],
+                max_age=self.crawl_config['page_archive_max_age'],
+                max_bytes=self.crawl_config['page_archive_max_bytes']
+            )
+        self.page_archive = page_archive or None
+
+        # 按主机熔断（故障站点快速失败）
+        if circuit_breaker is None:
+            circuit_breaker = HostCircuitBreaker(
+                self.crawl_config['circuit_breaker_path'],
+                failure_threshold=self.crawl_config['breaker_failure_threshold'],
+                recovery_timeout=self.crawl_config['breaker_recovery_timeout']
+            )
+        self.circuit_breaker = circuit_breaker or None
+
+        # 已编译的链接发现规则 {网站: (规则模式, [LinkRule])}
+        self._compiled_link_rules = {}
+
+        # 解析进程池（按需创建）
+        self._parse_executor = None
+
+        # 按主机的并发槽位与令牌桶限速
+        self._host_state_lock = threading.Lock()
+        self._host_semaphores = {}
+        self._host_concurrency = {}
+        self.rate_limiter = HostRateLimiter(
+            default_rate_per_hour=self.crawl_config['default_rate_limit'],
+            burst=self.crawl_config['rate_limit_burst'],
+            max_retry_after=self.crawl_config['retry_after_max']
+        )
+        self._configure_rate_limits()
+
+    def _configure_rate_limits(self):
+        """
+        根据 DATA_SOURCES 配置各站点的主机预算：
+        rate_limit（每小时请求数）、burst（令牌桶容量）、concurrency（同时进行的请求数）
+        """
+        data_sources = getattr(get_config(), 'DATA_SOURCES', {})
+        for website, site in self.supported_websites.items():
+            source = data_sources.get(website, {})
+            domain = urlparse(site['base_url']).netloc
+            if source.get('rate_limit'):
+                self.rate_limiter.configure(domain, source['rate_limit'], source.get('burst'))
+            if source.get('concurrency'):
+                self._host_concurrency[HostRateLimiter._normalize_domain(domain)] = source['concurrency']
+
+    def _concurrency_for(self, host):
+        """主机（含子域名）允许同时进行的请求数"""
+        host = HostRateLimiter._normalize_domain(host)
+        for domain, concurrency in self._host_concurrency.items():
+            if host == domain or host.endswith('.' + domain):
+                return concurrency
+        return self.crawl_config['per_host_concurrency']
     
     def crawl_data(self, website, data_type, region='全国', **kwargs):
         """
@@ -92,7 +254,15 @@ class CrawlerManager:
             # 处理结果
             if result.get('success'):
                 # 保存到数据库
-                self._save_to_database(result['data'], website, data_type)
+                run_metrics = crawler_params['metrics']
+                started = time.perf_counter()
+                pending = crawler_params['pending']
+                saved = self._save_to_database(result['data']['data_records'], website, data_type,
+                                               on_commit=pending and pending.commit)
+                if pending:
+                    pending.finish(True)
+                self._record_db_write(website, saved, time.perf_counter() - started, run_metrics)
+                result['data']['metadata']['metrics'] = run_metrics.snapshot()
                 
                 # 返回处理后的结果
                 return {
@@ -115,6 +285,181 @@ class CrawlerManager:
                 'error': f'数据采集失败: {str(e)}'
             }
     
+    def iter_crawl(self, website, data_type, region='全国', progress_callback=None, metrics=None, **kwargs):
+        """
+        流式数据采集：逐页抓取，按页产出记录，不在内存中累积整次采集结果
+
+        Args:
+            website: 目标网站类型
+            data_type: 数据类型
+            region: 地区范围
+            progress_callback: 每完成一页调用一次，参数为进度字典（累计页数/记录数/字节数，
+                               以及本页的 url、page_records、page_bytes、status、fetch_ms、parse_ms、page_fallback）
+            metrics: 本次采集的 CrawlMetrics（进程级指标之外单独汇总），可为空
+            **kwargs: 其他参数（同 crawl_data）
+
+        Yields:
+            dict: 采集到的单条记录
+        """
+        if not self._validate_params(website, data_type):
+            raise ValueError(f'不支持的网站类型 {website} 或数据类型 {data_type}')
+
+        params = self._prepare_crawler_params(website, data_type, region, **kwargs)
+        params['metrics'] = metrics
+        progress = {
+            'website': website,
+            'data_type': data_type,
+            'region': region,
+            'pages': 0,
+            'records': 0,
+            'bytes': 0,
+            'fallback': False,
+            'started_at': datetime.now().isoformat()
+        }
+
+        for page, records in self._iter_scraped_pages(params):
+            progress['pages'] += 1
+            progress['records'] += len(records)
+            progress['bytes'] += page.get('bytes', 0)
+            progress['fallback'] = progress['fallback'] or page.get('fallback', False)
+            if progress_callback:
+                progress_callback(dict(
+                    progress,
+                    url=page['url'],
+                    label=page['label'],
+                    page_records=len(records),
+                    page_bytes=page.get('bytes', 0),
+                    status=page.get('status'),
+                    fetch_ms=page.get('fetch_ms'),
+                    parse_ms=page.get('parse_ms'),
+                    page_fallback=page.get('fallback', False)
+                ))
+            yield from records
+
+    def crawl_to_database(self, website, data_type, region='全国', chunk_size=None,
+                          progress_callback=None, **kwargs):
+        """
+        流式采集并分块写入数据库，峰值内存与采集规模无关
+
+        Returns:
+            dict: 采集摘要（不包含记录本身）
+        """
+        try:
+            progress = {}
+
+            def track(event):
+                progress.update(event)
+                if progress_callback:
+                    progress_callback(event)
+
+            start_time = datetime.now()
+            quality = QualityReport(website)
+            run_metrics = CrawlMetrics()
+            crawl_seconds = [0.0]
+            # 增量采集的指纹在对应记录入库提交后才登记
+            pending = self.crawl_state.pending(website) if self.crawl_state and kwargs.get('incremental') else None
+            exhausted = [False]
+
+            def records():
+                stream = self.iter_crawl(website, data_type, region, progress_callback=track,
+                                         metrics=run_metrics, pending=pending, **kwargs)
+                batch = []
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        record = next(stream)
+                    except StopIteration:
+                        exhausted[0] = True
+                        break
+                    finally:
+                        crawl_seconds[0] += time.perf_counter() - started
+                    batch.append(record)
+                    if len(batch) >= self.crawl_config['quality_batch_size']:
+                        quality.add(batch)
+                        batch = []
+                    yield record
+                quality.add(batch)
+
+            # 入库与采集交替进行，入库耗时 = 总耗时 - 等待采集结果的时间
+            started = time.perf_counter()
+            saved = self._save_to_database(records(), website, data_type, chunk_size=chunk_size,
+                                           on_commit=pending and pending.commit)
+            if pending:
+                pending.finish(exhausted[0])
+            self._record_db_write(website, saved, time.perf_counter() - started - crawl_seconds[0], run_metrics)
+            processing_time = (datetime.now() - start_time).total_seconds() * 1000
+            quality_report = quality.report()
+
+            return {
+                'success': True,
+                'total_records': quality_report['records'],
+                'saved_records': saved,
+                'crawled_pages': progress.get('pages', 0),
+                'metadata': {
+                    'crawl_time': start_time.isoformat(),
+                    'website': website,
+                    'data_quality_score': quality_report['score'],
+                    'data_quality': quality_report,
+                    'processing_time': processing_time,
+                    'fallback': progress.get('fallback', False)
+                },
+                'metrics': run_metrics.snapshot(),
+                'message': f'成功采集 {quality_report["records"]} 条{self.supported_websites[website]["name"]}数据'
+            }
+
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'数据采集失败: {str(e)}'
+            }
+
+    def crawl_many(self, jobs, max_workers=None):
+        """
+        并发执行多个采集任务
+
+        不同主机的任务并行执行，同一主机的请求仍由 _host_slot 控制间隔。
+
+        Args:
+            jobs: 任务列表，每项为字典 {'website', 'data_type', 'region', ...}
+                  或元组 (website, data_type[, region])
+            max_workers: 最大并发任务数，默认取 crawl_config['max_workers']
+
+        Returns:
+            list: 与 jobs 顺序一致的任务结果，每项包含 job、result、duration
+        """
+        normalized_jobs = [self._normalize_job(job) for job in jobs]
+        if not normalized_jobs:
+            return []
+
+        if max_workers is None:
+            max_workers = self.crawl_config['max_workers']
+        max_workers = max(1, min(max_workers, len(normalized_jobs)))
+
+        def run_job(job):
+            started = time.perf_counter()
+            extra = {k: v for k, v in job.items() if k not in ('website', 'data_type', 'region')}
+            result = self.crawl_data(job['website'], job['data_type'], job['region'], **extra)
+            return {
+                'job': job,
+                'result': result,
+                'duration': round(time.perf_counter() - started, 3)
+            }
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='crawler') as executor:
+            return list(executor.map(run_job, normalized_jobs))
+
+    def _normalize_job(self, job):
+        """将任务描述统一为字典格式"""
+        if isinstance(job, dict):
+            normalized = dict(job)
+        else:
+            website, data_type, *rest = job
+            normalized = {'website': website, 'data_type': data_type}
+            if rest:
+                normalized['region'] = rest[0]
+        normalized.setdefault('region', '全国')
+        return normalized
+
     def _validate_params(self, website, data_type):
         """验证参数有效性"""
         if website not in self.supported_websites:
@@ -132,11 +477,16 @@ class CrawlerManager:
             'data_type': data_type,
             'region': region,
             'max_pages': kwargs.get('max_pages', 5),
+            'incremental': kwargs.get('incremental', False) and self.crawl_state is not None,
+            'pending': kwargs.get('pending'),
             'delay': kwargs.get('delay', 2000),
             'output_format': 'json',
             'save_to_db': False  # 我们手动处理数据库保存
         }
         
+        if params['incremental'] and params['pending'] is None:
+            params['pending'] = self.crawl_state.pending(website)
+
         # 添加时间范围（默认最近30天）
         if 'date_range' not in kwargs:
             end_date = datetime.now()
@@ -158,32 +508,38 @@ class CrawlerManager:
             start_time = datetime.now()
 
             # 根据网站类型调用相应的爬虫方法
-            if params['website'] == 'seed_trade':
-                scraped_data = self._scrape_seed_trade_data(params)
-            elif params['website'] == 'weather':
-                scraped_data = self._scrape_weather_data(params)
-            elif params['website'] == 'farm_machine':
-                scraped_data = self._scrape_farm_machine_data(params)
-            else:
+            if params['website'] not in self.PAGE_BUILDERS:
                 return {
                     'success': False,
                     'error': f'不支持的网站类型: {params["website"]}'
                 }
 
+            scraped_data = []
+            crawled_pages = 0
+            fallback = False
+            params.setdefault('metrics', CrawlMetrics())
+            for page, records in self._iter_scraped_pages(params):
+                crawled_pages += 1
+                fallback = fallback or page.get('fallback', False)
+                scraped_data.extend(records)
+
             end_time = datetime.now()
             processing_time = (end_time - start_time).total_seconds() * 1000
+            quality_report = assess_quality(scraped_data, params['website'])
 
             return {
                 'success': True,
                 'data': {
                     'total_records': len(scraped_data),
-                    'crawled_pages': params['max_pages'],
+                    'crawled_pages': crawled_pages,
                     'data_records': scraped_data,
                     'metadata': {
                         'crawl_time': start_time.isoformat(),
                         'website': params['website'],
-                        'data_quality_score': self._calculate_data_quality(scraped_data),
-                        'processing_time': processing_time
+                        'data_quality_score': quality_report['score'],
+                        'data_quality': quality_report,
+                        'processing_time': processing_time,
+                        'fallback': fallback
                     }
                 }
             }
@@ -195,201 +551,474 @@ class CrawlerManager:
                 'error': f'爬虫执行失败: {str(e)}'
             }
     
-    def _scrape_seed_trade_data(self, params):
-        """爬取中国种子交易网数据"""
-        scraped_data = []
-        base_url = self.supported_websites['seed_trade']['base_url']
-
-        try:
-            # 使用实际工作的URL模式
-            search_urls = [
-                f"{base_url}/supply/list_h_26_s_997.html",  # 种子供应信息
-                f"{base_url}/supply/list_h_26_p_2_s_997.html",  # 第二页
-                f"{base_url}/supply/list_h_26_p_3_s_997.html",  # 第三页
-            ]
-
-            pages_crawled = 0
-            max_pages = params.get('max_pages', 3)
-
-            for search_url in search_urls:
-                if pages_crawled >= max_pages:
-                    break
-
-                try:
-                    print(f"正在爬取: {search_url}")
-                    response = self._make_request(search_url)
-
-                    if response and response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        page_data = self._parse_seed_trade_page(soup, search_url)
-                        scraped_data.extend(page_data)
-                        pages_crawled += 1
+    def _iter_scraped_pages(self, params):
+        """
+        逐页产出 (page, records)
 
-                        # 随机延迟
-                        self._random_delay()
+        增量模式（params['incremental']）下跳过内容未变化的页面和已采集过的记录，
+        翻页列表遇到没有新记录的页面即停止翻页；新记录和页面指纹排入 params['pending']，
+        入库提交后才登记到增量状态。
+        没有获取到任何真实数据时，产出一页后备数据（page['fallback'] 为 True）
+        以保证系统正常运行；增量模式下只有所有页面都请求失败才使用后备数据。
+        """
+        website = params['website']
+        build_pages, get_fallback, label = self.PAGE_BUILDERS[website]
+        incremental = params.get('incremental', False)
+        pending = params.get('pending') if incremental else None
+        has_data = False
+        fetched_pages = 0
 
-                except Exception as e:
-                    print(f"爬取页面失败 {search_url}: {str(e)}")
-                    continue
+        try:
+            pages, max_pages = getattr(self, build_pages)(params)
+            frontier = CrawlFrontier(max_depth=self.supported_websites[website].get('frontier', {}).get('max_depth'))
+            for page in pages:
+                page['incremental'] = incremental
+                frontier.add(page)
+
+            # 没有链接发现规则的站点（如天气）页面在开始时已全部确定，一次性并发抓取
+            batch_size = self.crawl_config['frontier_batch_size'] if self._link_rules(website) else None
+            crawled = self._crawl_frontier(frontier, max_pages=max_pages, batch_size=batch_size,
+                                           run_metrics=params.get('metrics'))
+            try:
+                for page, records in crawled:
+                    fetched_pages += 1
+                    if incremental:
+                        records = self.crawl_state.filter_new_records(website, records)
+                        pending.add_records(records)
+                    has_data = has_data or bool(records)
+                    yield page, records
+                    if pending and page.get('content_hash'):
+                        pending.add_page(page['url'], page['content_hash'])
+
+                    if incremental and page.get('paginated') and not records and not pending.full_pass:
+                        print(f"{page['label']}没有新数据，停止翻页: {page['url']}")
+                        break
+            finally:
+                crawled.close()
 
-            # 如果没有爬取到真实数据，返回少量示例数据以保证系统正常运行
-            if not scraped_data:
-                print("未能获取真实数据，返回示例数据")
-                scraped_data = self._get_fallback_seed_data(params)
+            if not has_data and not (incremental and fetched_pages):
+                print(f"未能获取真实{label}数据，返回示例数据")
 
         except Exception as e:
-            print(f"种子数据爬取失败: {str(e)}")
-            scraped_data = self._get_fallback_seed_data(params)
-
-        return scraped_data
+            print(f"{label}数据爬取失败: {str(e)}")
+
+        if not has_data and not (incremental and fetched_pages):
+            for registry in filter(None, (self.metrics, params.get('metrics'))):
+                registry.inc('fallback_total', website=website)
+            fallback_page = {'url': None, 'label': f'{label}示例数据', 'fallback': True}
+            records = getattr(self, get_fallback)(params)
+            if pending:
+                pending.add_records(records, track=False)
+            yield fallback_page, records
+
+    def _seed_trade_pages(self, params):
+        """中国种子交易网的页面任务（翻页由爬取边界的链接发现规则扩展）"""
+        pages = self._frontier_seeds('seed_trade', self._parse_seed_trade_page)
+        return pages, params.get('max_pages', 3)
+
+    def _weather_pages(self, params):
+        """
+        中国天气网的页面任务
 
-    def _scrape_weather_data(self, params):
-        """爬取中国天气网数据"""
-        scraped_data = []
+        全国采集覆盖 34 个省级行政区的省会，按省份采集覆盖该省主要城市；
+        页面数较多时由流水线并发抓取，同一主机的并发数和请求节奏受站点配置约束。
+        """
         base_url = self.supported_websites['weather']['base_url']
 
-        try:
-            # 主要城市代码（基于实际调研的工作URL）
-            city_codes = {
-                '北京': '101010100',
-                '上海': '101020100',
-                '广州': '101280101',
-                '深圳': '101280601',
-                '成都': '101270101',
-                '西安': '101110101',
-                '武汉': '101200101',
-                '南京': '101190101'
-            }
-
-            region = params.get('region', '全国')
-            if region != '全国' and region in city_codes:
-                cities_to_crawl = [region]
-            else:
-                cities_to_crawl = list(city_codes.keys())[:3]  # 限制爬取城市数量
+        pages = [
+            self._page_task(
+                f"{base_url}/weather/{code}.shtml",
+                self._parse_weather_page, city, 'weather', f'{city}天气'
+            )
+            for city, code in weather_targets(params.get('region', '全国'))
+        ]
+        return pages, None
+
+    def _farm_machine_pages(self, params):
+        """农机360网的页面任务（首页与主要分类页，分类翻页由链接发现规则扩展）"""
+        pages = self._frontier_seeds('farm_machine', self._parse_farm_machine_page)
+        return pages, params.get('max_pages', 3)
+
+    def _frontier_seeds(self, website, parser):
+        """根据 supported_websites[website]['frontier']['seeds'] 构造种子页面任务"""
+        site = self.supported_websites[website]
+        pages = []
+        for seed in site['frontier']['seeds']:
+            url = seed['url'].format(**site)
+            page = self._page_task(url, parser, url, website, seed.get('label', site['name']),
+                                   paginated=seed.get('paginated', False))
+            page['priority'] = seed.get('priority', 0)
+            pages.append(page)
+        return pages
+
+    def _link_rules(self, website):
+        """站点的链接发现规则（按配置编译并缓存）"""
+        follow = self.supported_websites.get(website, {}).get('frontier', {}).get('follow', ())
+        key = tuple(rule['pattern'] for rule in follow)
+        cached = self._compiled_link_rules.get(website)
+        if cached is None or cached[0] != key:
+            cached = (key, [LinkRule.from_config(rule) for rule in follow])
+            self._compiled_link_rules[website] = cached
+        return cached[1]
+
+    @staticmethod
+    def _page_task(url, parser, context, page_type, label, paginated=False):
+        """
+        构造页面任务
 
-            for city in cities_to_crawl:
-                try:
-                    city_code = city_codes.get(city, '101010100')
-                    # 使用实际工作的URL格式
-                    weather_url = f"http://www.weather.com.cn/weather/{city_code}.shtml"
+        Args:
+            url: 页面地址
+            parser: 解析方法，签名为 parser(soup, context)
+            context: 传给解析方法的第二个参数（来源URL或城市名）
+            page_type: 页面类型，用于选择局部解析规则
+            label: 日志中显示的页面描述
+            paginated: 是否属于按时间倒序的翻页列表（增量采集时可提前停止）
+        """
+        return {
+            'url': url,
+            'parser': parser.__name__,
+            'context': context,
+            'page_type': page_type,
+            'label': label,
+            'paginated': paginated
+        }
 
-                    print(f"正在爬取{city}天气: {weather_url}")
-                    response = self._make_request(weather_url)
+    def _crawl_frontier(self, frontier, max_pages=None, batch_size=None, run_metrics=None):
+        """
+        按优先级分批抓取爬取边界中的页面，逐页产出成功的 (page, records)
 
-                    if response and response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        city_weather = self._parse_weather_page(soup, city)
-                        scraped_data.extend(city_weather)
+        每批最多取 batch_size 个页面（为空时取出全部，且不超过剩余页数预算）交给
+        _crawl_pages 并发抓取；页面产出后，其中发现的链接加入边界。
+        调用方在处理完一页之前不会扩展该页的链接，因此可以在增量采集时提前停止翻页。
+        成功页面数达到 max_pages 后停止。
+        """
+        pages_crawled = 0
+        while frontier:
+            budget = batch_size or len(frontier)
+            if max_pages:
+                budget = min(budget, max_pages - pages_crawled)
+            results = self._crawl_pages(frontier.pop_batch(budget), run_metrics=run_metrics)
+            try:
+                for page, records in results:
+                    yield page, records
+                    pages_crawled += 1
+                    if max_pages and pages_crawled >= max_pages:
+                        return
+                    frontier.add_links(page)
+            finally:
+                results.close()
+
+    def _crawl_pages(self, pages, max_pages=None, run_metrics=None):
+        """
+        抓取并解析一组页面，逐页产出成功的 (page, records)
 
-                        # 随机延迟
-                        self._random_delay()
+        页面数达到 pipeline_min_pages 且配置了解析进程时，使用抓取/解析两阶段
+        流水线（ParsePipeline），否则在当前线程依次抓取和解析。
+        成功页面数达到 max_pages 后停止。每个页面（含失败页面）的指标记入
+        进程级指标和 run_metrics。
+        """
+        use_pipeline = (self.crawl_config['parse_workers'] > 0 and
+                        len(pages) >= self.crawl_config['pipeline_min_pages'])
+        results = ParsePipeline(self).run(pages) if use_pipeline else self._crawl_pages_inline(pages)
 
-                except Exception as e:
-                    print(f"爬取{city}天气失败: {str(e)}")
+        pages_crawled = 0
+        try:
+            for page, records in results:
+                self._record_page_metrics(page, records, run_metrics)
+                if records is None:
                     continue
+                yield page, records
+                pages_crawled += 1
+                if max_pages and pages_crawled >= max_pages:
+                    break
+        finally:
+            results.close()
 
-            # 如果没有爬取到真实数据，返回示例数据
-            if not scraped_data:
-                print("未能获取真实天气数据，返回示例数据")
-                scraped_data = self._get_fallback_weather_data(params)
-
-        except Exception as e:
-            print(f"天气数据爬取失败: {str(e)}")
-            scraped_data = self._get_fallback_weather_data(params)
-
-        return scraped_data
+    def _crawl_pages_inline(self, pages):
+        """在当前线程依次抓取和解析页面"""
+        for page in pages:
+            try:
+                print(f"正在爬取{page['label']}: {page['url']}")
+                records = self._process_page(page)
+            except Exception as e:
+                print(f"爬取页面失败 {page['url']}: {str(e)}")
+                records = None
+            yield page, records
 
-    def _scrape_farm_machine_data(self, params):
-        """爬取农机360网数据"""
-        scraped_data = []
-        base_url = self.supported_websites['farm_machine']['base_url']
+    def _fetch_and_parse(self, url, parser, context, page_type=None, incremental=False):
+        """
+        获取并解析页面，使用条件请求缓存
 
-        try:
-            # 使用实际工作的农机分类URL
-            category_urls = [
-                f"{base_url}",  # 主页有产品信息
-                "https://o2o.nongji360.com/search?c=309",  # 拖拉机
-                "https://o2o.nongji360.com/search?c=107",  # 收获机械
-                "https://o2o.nongji360.com/search?c=29",   # 种植施肥
-            ]
+        服务端返回 304 时直接复用缓存的解析结果，不再重新构建 BeautifulSoup。
 
-            pages_crawled = 0
-            max_pages = params.get('max_pages', 3)
+        Args:
+            url: 页面地址
+            parser: 解析方法，签名为 parser(soup, context)
+            context: 传给解析方法的第二个参数（来源URL或城市名）
+            page_type: 页面类型，用于选择局部解析规则
+            incremental: 增量模式，页面内容未变化时直接返回空列表
 
-            for category_url in category_urls:
-                if pages_crawled >= max_pages:
-                    break
+        Returns:
+            list: 解析得到的记录；请求失败时返回 None
+        """
+        page = self._page_task(url, parser, context, page_type, url)
+        page['incremental'] = incremental
+        return self._process_page(page, parser)
+
+    def _process_page(self, page, parser=None):
+        """获取并解析一个页面任务，返回记录列表；请求失败时返回 None"""
+        fetched = self._fetch_page(page)
+        if fetched is None:
+            return None
+        if 'records' in fetched:
+            return fetched['records']
+
+        parser = parser or getattr(self, page['parser'])
+        started = time.perf_counter()
+        records = parser(self.parser_backend.make_soup(fetched['content'], page['page_type']), page['context'])
+        page['parse_ms'] = (time.perf_counter() - started) * 1000
+        self._store_parsed(page['url'], fetched, page['parser'], records)
+        return records
+
+    def _fetch_page(self, page):
+        """
+        获取页面内容，使用条件请求缓存
 
-                try:
-                    print(f"正在爬取农机分类: {category_url}")
-                    response = self._make_request(category_url)
+        增量模式下，304 或内容指纹与已登记指纹相同的页面直接返回 {'records': []}，不再解析；
+        内容指纹记入 page['content_hash']，页面的记录入库后才登记。
+        新获取的页面内容写入原始页面归档。请求状态码、耗时（毫秒）和下载字节数
+        记录在页面任务的 status、fetch_ms、bytes 中。
 
-                    if response and response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        page_data = self._parse_farm_machine_page(soup, category_url)
-                        scraped_data.extend(page_data)
-                        pages_crawled += 1
+        Returns:
+            dict: 304 且已有该解析器的结果时为 {'records': [...]}；
+                  否则为 {'content', 'etag', 'last_modified', 'cached'}；
+                  请求失败时返回 None
+        """
+        url, parser_key, incremental = page['url'], page['parser'], page.get('incremental', False)
+        entry = self.http_cache.get(url) if self.http_cache else None
+        started = time.perf_counter()
+        page['request_stats'] = stats = {}
+        response = self._make_request(url, headers=HttpCache.conditional_headers(entry), stats=stats)
+        page['fetch_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        if response is None:
+            return None
+        page['status'] = response.status_code
+        page['bytes'] = len(response.content)
+        page['cached'] = response.status_code == 304
+
+        if response.status_code == 304 and entry:
+            self.http_cache.record('hits')
+            if incremental and self.crawl_state:
+                # 缓存内容可能解析过但未入库，只有增量状态中登记过的内容才跳过
+                page['content_hash'] = content_fingerprint(entry['body'])
+                if not self.crawl_state.page_changed(url, entry['body']):
+                    self.crawl_state.mark_page_unchanged(url)
+                    return {'records': []}
+            page['links'] = discover_links(entry['body'], url, self._link_rules(page['page_type']))
+            if parser_key in entry['parsed']:
+                self.http_cache.record('parse_reuses')
+                return {'records': entry['parsed'][parser_key]}
+            return {'content': entry['body'], 'cached': True}
+
+        if response.status_code != 200:
+            return None
+
+        if self.http_cache:
+            self.http_cache.record('misses')
+        page['links'] = discover_links(response.content, url, self._link_rules(page['page_type']))
+        if self.page_archive:
+            self.page_archive.append(page, response.content)
+        if self.crawl_state and incremental:
+            page['content_hash'] = content_fingerprint(response.content)
+            if not self.crawl_state.page_changed(url, response.content):
+                return {'records': []}
+        return {
+            'content': response.content,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'cached': False
+        }
 
-                        # 随机延迟
-                        self._random_delay()
+    def _store_parsed(self, url, fetched, parser_key, records):
+        """把解析结果写入HTTP缓存"""
+        if not self.http_cache:
+            return
+        if fetched.get('cached'):
+            self.http_cache.update_parsed(url, parser_key, records)
+        else:
+            self.http_cache.store(
+                url,
+                fetched['content'],
+                etag=fetched.get('etag'),
+                last_modified=fetched.get('last_modified'),
+                parsed={parser_key: records}
+            )
 
-                except Exception as e:
-                    print(f"爬取农机页面失败 {category_url}: {str(e)}")
-                    continue
+    def _get_parse_executor(self):
+        """获取（必要时创建）解析进程池"""
+        with self._host_state_lock:
+            if self._parse_executor is None:
+                self._parse_executor = ProcessPoolExecutor(
+                    max_workers=self.crawl_config['parse_workers'],
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_parse_worker
+                )
+            return self._parse_executor
 
-            # 如果没有爬取到真实数据，返回示例数据
-            if not scraped_data:
-                print("未能获取真实农机数据，返回示例数据")
-                scraped_data = self._get_fallback_machine_data(params)
+    def close(self):
+        """释放解析进程池等资源"""
+        with self._host_state_lock:
+            executor, self._parse_executor = self._parse_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
 
-        except Exception as e:
-            print(f"农机数据爬取失败: {str(e)}")
-            scraped_data = self._get_fallback_machine_data(params)
+    def _make_request(self, url, max_retries=None, headers=None, stats=None):
+        """
+        发送HTTP请求，包含重试机制；304 视为成功返回
 
-        return scraped_data
+        目标主机处于熔断状态时直接返回 None；超时、连接错误、5xx 等失败计入熔断器，
+        重试过程中主机被熔断则不再继续重试。
 
-    def _make_request(self, url, max_retries=None):
-        """发送HTTP请求，包含重试机制"""
+        Args:
+            stats: 可选的字典，记录请求次数（requests）、重试（retries）、429 次数（throttled）、
+                   5xx 次数（server_errors）和分阶段耗时（timings：首字节/下载取最后一个响应，
+                   DNS/建连为各次尝试之和）
+        """
         if max_retries is None:
             max_retries = self.crawl_config['max_retries']
+        if stats is None:
+            stats = {}
+        for key in ('requests', 'retries', 'throttled', 'server_errors'):
+            stats.setdefault(key, 0)
+
+        breaker = self.circuit_breaker
+        if breaker and not breaker.allow(url):
+            print(f"主机已熔断，跳过请求: {url}")
+            return None
 
         for attempt in range(max_retries + 1):
+            error = None
+            stats['requests'] += 1
+            stats['retries'] += attempt > 0
             try:
-                response = self.session.get(
-                    url,
-                    timeout=self.crawl_config['timeout'],
-                    allow_redirects=True
-                )
-
-                if response.status_code == 200:
+                with self._host_slot(url):
+                    response = self.transport.get(
+                        url,
+                        headers=headers,
+                        timeout=self.crawl_config['timeout'],
+                        allow_redirects=True
+                    )
+                stats['timings'] = self._merge_timings(stats.get('timings'), getattr(response, 'timings', None))
+
+                if breaker and response.status_code < 500:
+                    breaker.record_success(url)  # 主机有响应（含 4xx），视为健康
+
+                if response.status_code in (200, 304):
+                    self.rate_limiter.on_success(url)
                     return response
                 elif response.status_code == 429:  # 请求过于频繁
-                    print(f"请求频率限制，等待 {self.crawl_config['retry_delay']} 秒")
-                    time.sleep(self.crawl_config['retry_delay'])
-                    continue
+                    stats['throttled'] += 1
+                    pause = self.rate_limiter.on_throttle(url, response.headers.get('Retry-After'))
+                    print(f"请求频率限制，{pause:.1f} 秒后重试: {url}")
+                    continue  # 等待由限速器在下次获取令牌时完成
                 else:
                     print(f"HTTP错误 {response.status_code}: {url}")
+                    if response.status_code >= 500:
+                        stats['server_errors'] += 1
+                        error = f'HTTP {response.status_code}'
+                    elif response.status_code != 408:
+                        return None  # 其他 4xx（如链接发现得到的失效页面）重试也不会成功
 
             except requests.exceptions.Timeout:
                 print(f"请求超时 (尝试 {attempt + 1}/{max_retries + 1}): {url}")
+                error = '请求超时'
             except requests.exceptions.ConnectionError:
                 print(f"连接错误 (尝试 {attempt + 1}/{max_retries + 1}): {url}")
+                error = '连接错误'
             except Exception as e:
                 print(f"请求异常 (尝试 {attempt + 1}/{max_retries + 1}): {str(e)}")
+                error = str(e)
+
+            if error and breaker and breaker.record_failure(url, error):
+                break
 
             if attempt < max_retries:
-                time.sleep(self.crawl_config['retry_delay'])
+                time.sleep(self._backoff_delay(attempt))
 
         return None
 
-    def _random_delay(self):
-        """随机延迟，避免请求过于频繁"""
-        delay = random.uniform(*self.crawl_config['delay_range'])
-        time.sleep(delay)
+    @staticmethod
+    def _merge_timings(previous, timings):
+        """合并重试前后的分阶段耗时：DNS 和建连可能发生在之前的尝试中，累加保留"""
+        if not previous or not timings:
+            return timings or previous
+        merged = dict(timings)
+        for stage in ('dns_ms', 'connect_ms'):
+            if previous.get(stage) is not None:
+                merged[stage] = (merged.get(stage) or 0.0) + previous[stage]
+        return merged
+
+    def _record_page_metrics(self, page, records, run_metrics=None):
+        """把一个页面的抓取/解析结果记入进程级指标和本次采集的指标"""
+        website = page.get('page_type')
+        stats = page.get('request_stats') or {}
+        timings = stats.get('timings') or {}
+        for registry in filter(None, (self.metrics, run_metrics)):
+            registry.inc('requests_total', stats.get('requests', 0), website=website)
+            registry.inc('retries_total', stats.get('retries', 0), website=website)
+            registry.inc('throttled_total', stats.get('throttled', 0), website=website)
+            registry.inc('server_errors_total', stats.get('server_errors', 0), website=website)
+            for stage in ('dns_ms', 'connect_ms', 'ttfb_ms', 'download_ms'):
+                registry.observe(stage, timings.get(stage), website=website)
+            registry.observe('fetch_ms', page.get('fetch_ms'), website=website)
+
+            if records is None:
+                registry.inc('page_failures_total', website=website)
+                continue
+            registry.inc('pages_total', website=website)
+            registry.inc('cached_pages_total', int(page.get('cached', False)), website=website)
+            registry.inc('records_total', len(records), website=website)
+            registry.inc('bytes_total', page.get('bytes', 0), website=website)
+            registry.observe('parse_ms', page.get('parse_ms'), website=website)
+            registry.observe('records_per_page', len(records), website=website)
+            if not page.get('cached'):
+                registry.observe('page_bytes', page.get('bytes'), website=website)
+
+    def _record_db_write(self, website, rows, seconds, run_metrics=None):
+        """记录一次入库的记录数和耗时"""
+        for registry in filter(None, (self.metrics, run_metrics)):
+            registry.inc('db_rows_total', rows, website=website)
+            registry.observe('db_write_ms', max(seconds, 0.0) * 1000, website=website)
+
+    def _backoff_delay(self, attempt):
+        """指数退避（full jitter）：在 [0, min(上限, 基数*2^attempt)] 内随机取值"""
+        ceiling = min(self.crawl_config['backoff_max'],
+                      self.crawl_config['backoff_base'] * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    @contextmanager
+    def _host_slot(self, url):
+        """
+        获取目标主机的请求槽位
 
-    def _parse_seed_trade_page(self, soup, source_url):
-        """解析种子交易网页面"""
+        限制同一主机的并发请求数，并按该主机令牌桶的预算等待；
+        不同主机之间互不阻塞。
+        """
+        host = urlparse(url).netloc
+        with self._host_state_lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self._concurrency_for(host))
+                self._host_semaphores[host] = semaphore
+
+        with semaphore:
+            self.rate_limiter.acquire(url)
+            yield
+
+    def _parse_seed_trade_page(self, soup, source_url, fetched_at=None):
+        """解析种子交易网页面；fetched_at 为页面抓取时间（datetime），记录日期以此为准，默认当前时间"""
         data = []
+        day = (fetched_at or datetime.now()).strftime('%Y-%m-%d')
 
         try:
             # 基于实际网站结构的选择器
@@ -402,12 +1031,12 @@ class CrawlerManager:
                 'li'  # 列表项
             ]
 
-            items = []
-            for selector in selectors:
-                items = soup.select(selector)
-                if items and len(items) > 2:  # 找到有效的项目列表（排除表头）
-                    items = items[1:]  # 跳过表头
-                    break
+            # 找到有效的项目列表（排除表头），优先使用该站点上次命中的选择器
+            selector, items = self.parser_backend.select_items(
+                soup, urlparse(source_url).netloc, selectors, min_items=2
+            )
+            if selector:
+                items = items[1:]  # 跳过表头
 
             for i, item in enumerate(items[:15]):  # 限制每页最多15条
                 try:
@@ -420,38 +1049,14 @@ class CrawlerManager:
 
                     # 过滤有效的产品名称
                     if product_name and len(product_name) > 3 and '种子' in product_name:
-                        # 提取价格信息 - 更精确的正则表达式
-                        price_text = item.get_text()
-                        price_patterns = [
-                            r'(\d+\.?\d*)\s*元[/\/]?[斤公斤袋包]?',
-                            r'价格[：:]\s*(\d+\.?\d*)',
-                            r'￥\s*(\d+\.?\d*)',
-                            r'(\d+\.?\d*)\s*[元￥]'
-                        ]
-
-                        price = None
-                        for pattern in price_patterns:
-                            price_match = re.search(pattern, price_text)
-                            if price_match:
-                                price = float(price_match.group(1))
-                                break
+                        # 一次扫描提取价格与地区信息
+                        fields = extract_seed_fields(item.get_text())
 
+                        price = fields.price
                         if not price:
                             price = round(2.5 + i * 0.1, 2)  # 默认价格
 
-                        # 提取地区信息
-                        region_patterns = [
-                            r'(北京|上海|广州|深圳|成都|西安|武汉|南京|天津|重庆)',
-                            r'(山东|河南|河北|江苏|安徽|湖北|湖南|四川|陕西|山西|辽宁|吉林|黑龙江)',
-                            r'(广东|广西|福建|浙江|江西|云南|贵州|甘肃|青海|宁夏|新疆|西藏|内蒙古|海南)'
-                        ]
-
-                        region = "山东"  # 默认地区
-                        for pattern in region_patterns:
-                            region_match = re.search(pattern, price_text)
-                            if region_match:
-                                region = region_match.group(1)
-                                break
+                        region = fields.region or "山东"  # 默认地区
 
                         data.append({
                             'product_name': product_name[:50],  # 限制长度
@@ -459,7 +1064,7 @@ class CrawlerManager:
                             'price': price,
                             'unit': '元/斤',
                             'region': region,
-                            'date': datetime.now().strftime('%Y-%m-%d'),
+                            'date': day,
                             'source_url': source_url
                         })
 
@@ -471,9 +1076,10 @@ class CrawlerManager:
 
         return data
 
-    def _parse_weather_page(self, soup, city):
-        """解析天气网页面"""
+    def _parse_weather_page(self, soup, city, fetched_at=None):
+        """解析天气网页面；fetched_at 为页面抓取时间（datetime），预报日期从这一天起算，默认当前时间"""
         data = []
+        today = fetched_at or datetime.now()
 
         try:
             # 基于实际网站结构的选择器 - 7天天气预报
@@ -493,11 +1099,8 @@ class CrawlerManager:
                         # 处理整个页面的情况
                         # 提取当天温度
                         temp_elem = item.select_one('.tem, .temperature, .temp, [class*="tem"]')
-                        if temp_elem:
-                            temp_text = temp_elem.get_text(strip=True)
-                            temp_match = re.search(r'(\d+)', temp_text)
-                            temperature = int(temp_match.group(1)) if temp_match else 25
-                        else:
+                        temperature = extract_temperature(temp_elem.get_text(strip=True)) if temp_elem else None
+                        if temperature is None:
                             temperature = 25
 
                         # 提取天气状况
@@ -506,7 +1109,7 @@ class CrawlerManager:
 
                         data.append({
                             'region': city,
-                            'date': datetime.now().strftime('%Y-%m-%d'),
+                            'date': today.strftime('%Y-%m-%d'),
                             'temperature': temperature,
                             'weather': weather[:10],
                             'humidity': 65,
@@ -517,15 +1120,9 @@ class CrawlerManager:
                         # 处理列表项的情况
                         # 提取温度 - 查找包含数字的元素
                         temp_elem = item.select_one('[class*="tem"], [class*="temp"]')
-                        if temp_elem:
-                            temp_text = temp_elem.get_text(strip=True)
-                            # 提取最高温度
-                            temp_matches = re.findall(r'(\d+)', temp_text)
-                            if temp_matches:
-                                temperature = int(temp_matches[0])  # 取第一个数字作为温度
-                            else:
-                                temperature = 20 + i * 2
-                        else:
+                        # 取第一个数字作为温度（最高温度）
+                        temperature = extract_temperature(temp_elem.get_text(strip=True)) if temp_elem else None
+                        if temperature is None:
                             temperature = 20 + i * 2
 
                         # 提取天气状况
@@ -533,7 +1130,7 @@ class CrawlerManager:
                         if weather_elem:
                             weather = weather_elem.get_text(strip=True)
                             # 清理天气描述
-                            weather = re.sub(r'[^\u4e00-\u9fa5]', '', weather)  # 只保留中文字符
+                            weather = clean_weather_text(weather)  # 只保留中文字符
                             if not weather:
                                 weather = ['晴', '多云', '阴', '小雨', '雷阵雨'][i % 5]
                         else:
@@ -541,7 +1138,7 @@ class CrawlerManager:
 
                         data.append({
                             'region': city,
-                            'date': (datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d'),
+                            'date': (today + timedelta(days=i)).strftime('%Y-%m-%d'),
                             'temperature': temperature,
                             'weather': weather[:10],  # 限制长度
                             'humidity': 60 + i * 3,
@@ -556,8 +1153,8 @@ class CrawlerManager:
 
         return data
 
-    def _parse_farm_machine_page(self, soup, source_url):
-        """解析农机360网页面"""
+    def _parse_farm_machine_page(self, soup, source_url, fetched_at=None):
+        """解析农机360网页面（农机记录没有日期，fetched_at 只为与其他解析方法签名一致）"""
         data = []
 
         try:
@@ -571,11 +1168,10 @@ class CrawlerManager:
                 'tr td a'  # 表格中的链接
             ]
 
-            items = []
-            for selector in selectors:
-                items = soup.select(selector)
-                if items and len(items) > 3:  # 找到足够的项目
-                    break
+            # 找到足够的项目，优先使用该站点上次命中的选择器
+            selector, items = self.parser_backend.select_items(
+                soup, urlparse(source_url).netloc, selectors, min_items=3
+            )
 
             # 过滤出农机产品链接
             machine_items = []
@@ -598,33 +1194,17 @@ class CrawlerManager:
                         else:
                             price_text = item.get_text()
 
-                        # 提取价格 - 支持多种格式
-                        price_patterns = [
-                            r'报价[：:]\s*￥?(\d+\.?\d*)\s*万?',
-                            r'价格[：:]\s*￥?(\d+\.?\d*)\s*万?',
-                            r'￥(\d+\.?\d*)\s*万?',
-                            r'(\d+\.?\d*)\s*万元',
-                            r'(\d+\.?\d*)\s*元'
-                        ]
-
-                        price = None
-                        for pattern in price_patterns:
-                            price_match = re.search(pattern, price_text)
-                            if price_match:
-                                price = float(price_match.group(1))
-                                if '万' in price_text:
-                                    price *= 10000
-                                break
+                        # 提取价格（支持多种格式）与型号
+                        fields = extract_machine_fields(price_text, product_name)
 
+                        price = fields.price
                         if not price:
                             price = 50000 + i * 8000  # 默认价格递增
 
                         # 提取品牌
                         brand = self._extract_brand(product_name)
 
-                        # 提取型号
-                        model_match = re.search(r'([A-Z0-9\-]+)', product_name)
-                        model = model_match.group(1) if model_match else f'Model-{i+100}'
+                        model = fields.model or f'Model-{i+100}'
 
                         data.append({
                             'product_name': product_name[:100],
@@ -660,30 +1240,11 @@ class CrawlerManager:
                 return brand
         return '其他品牌'
 
-    def _calculate_data_quality(self, data):
-        """计算数据质量评分"""
-        if not data:
-            return 0.0
-
-        quality_score = 0.8  # 基础分数
-
-        # 检查数据完整性
-        complete_records = 0
-        for record in data:
-            if all(value for value in record.values() if value is not None):
-                complete_records += 1
-
-        if data:
-            completeness = complete_records / len(data)
-            quality_score = 0.6 + (completeness * 0.4)  # 60%-100%
-
-        return round(quality_score, 2)
-
     def _get_fallback_seed_data(self, params):
         """获取种子数据的后备数据"""
         region = params.get('region', '全国')
-        seeds = ['玉米种子', '小麦种子', '水稻种子', '大豆种子', '花生种子']
-        varieties = ['先玉335', '郑单958', '登海605', '中单909', '京科968']
+        seeds = list(SEED_VARIETIES)[:5]
+        varieties = SEED_VARIETIES['玉米种子'][:5]
 
         data = []
         for i in range(20):
@@ -701,7 +1262,7 @@ class CrawlerManager:
     def _get_fallback_weather_data(self, params):
         """获取天气数据的后备数据"""
         region = params.get('region', '全国')
-        weathers = ['晴', '多云', '阴', '小雨', '中雨']
+        weathers = WEATHER_TYPES[:5]
 
         data = []
         for i in range(7):
@@ -718,8 +1279,8 @@ class CrawlerManager:
     def _get_fallback_machine_data(self, params):
         """获取农机数据的后备数据"""
         region = params.get('region', '全国')
-        machines = ['拖拉机', '收割机', '播种机', '施肥机', '喷药机']
-        brands = ['约翰迪尔', '雷沃重工', '中联重科', '东风农机', '久保田']
+        machines = list(MACHINE_CATALOG)[:5]
+        brands = MACHINE_BRANDS[:5]
 
         data = []
         for i in range(15):
@@ -733,10 +1294,27 @@ class CrawlerManager:
             })
         return data
 
-    def _save_to_database(self, data, website, data_type):
-        """保存数据到数据库"""
+    def _save_to_database(self, records, website, data_type, chunk_size=None, on_commit=None):
+        """
+        批量保存数据到数据库
+
+        使用 Core insert + executemany 分块写入，种子价格与天气数据按自然键 upsert，
+        重复采集不会产生重复行。
+
+        Args:
+            records: 记录列表或生成器（流式采集时边采集边写入）
+            website: 网站类型
+            data_type: 数据类型
+            chunk_size: 每块（每个事务）的记录数，默认取 crawl_config['db_chunk_size']
+            on_commit: 每块提交后以该块的记录数调用（用于登记增量采集状态）
+
+        Returns:
+            int: 写入（插入或更新）的记录数
+        """
+        chunk_size = chunk_size or self.crawl_config['db_chunk_size']
+        saved = 0
         try:
-            from app import get_app, get_db, SeedPrice, WeatherData, FarmMachine
+            from app import get_app, get_db
 
             # 获取Flask应用实例和数据库实例
             app = get_app()
@@ -744,64 +1322,77 @@ class CrawlerManager:
 
             # 在应用上下文中执行数据库操作
             with app.app_context():
-                if website == 'seed_trade' and data_type == 'price':
-                    # 保存种子价格数据
-                    for record in data['data_records']:
-                        seed_price = SeedPrice(
-                            product_name=record['product_name'],
-                            variety=record.get('variety'),
-                            price=record['price'],
-                            unit=record.get('unit'),
-                            region=record.get('region'),
-                            date=datetime.strptime(record['date'], '%Y-%m-%d').date(),
-                            source_url=record.get('source_url')
-                        )
-                        db.session.add(seed_price)
-
-                elif website == 'weather' and data_type == 'weather_forecast':
-                    # 保存天气数据
-                    for record in data['data_records']:
-                        weather_data = WeatherData(
-                            region=record['region'],
-                            date=datetime.strptime(record['date'], '%Y-%m-%d').date(),
-                            temperature=record.get('temperature'),
-                            weather=record.get('weather'),
-                            humidity=record.get('humidity'),
-                            wind_speed=record.get('wind_speed')
-                        )
-                        db.session.add(weather_data)
-
-                elif website == 'farm_machine' and data_type == 'product_info':
-                    # 保存农机数据
-                    for record in data['data_records']:
-                        farm_machine = FarmMachine(
-                            product_name=record['product_name'],
-                            brand=record.get('brand'),
-                            model=record.get('model'),
-                            price=record.get('price'),
-                            specifications=record.get('specifications'),
-                            region=record.get('region')
-                        )
-                        db.session.add(farm_machine)
-
-                db.session.commit()
-                print(f"成功保存 {len(data['data_records'])} 条数据到数据库")
+                table, build_row = self._row_builder(website, data_type)
+                if table is None:
+                    consumed = sum(1 for _ in records)  # 该数据类型不入库，但仍需消费完采集结果
+                    if on_commit:
+                        on_commit(consumed)
+                else:
+                    rows = (build_row(record) for record in records)
+                    saved = bulk_upsert(db.engine, table, rows, chunk_size=chunk_size, on_commit=on_commit)
+
+                print(f"成功保存 {saved} 条数据到数据库")
 
         except Exception as e:
             print(f"数据库保存失败: {str(e)}")
-            try:
-                from app import get_app, get_db
-                app = get_app()
-                db = get_db()
-                with app.app_context():
-                    db.session.rollback()
-            except:
-                pass  # 如果回滚也失败，忽略错误
-    
+
+        return saved
+
+    @staticmethod
+    def _row_builder(website, data_type):
+        """
+        返回 (表, 记录转行字典的函数)；该数据类型不入库时返回 (None, None)
+        """
+        from app import SeedPrice, WeatherData, FarmMachine
+
+        if website == 'seed_trade' and data_type == 'price':
+            # 种子价格数据
+            return SeedPrice.__table__, lambda record: {
+                'product_name': record['product_name'],
+                'variety': record.get('variety'),
+                'price': record['price'],
+                'unit': record.get('unit'),
+                'region': record.get('region'),
+                'date': datetime.strptime(record['date'], '%Y-%m-%d').date(),
+                'source_url': record.get('source_url')
+            }
+
+        if website == 'weather' and data_type == 'weather_forecast':
+            # 天气数据
+            return WeatherData.__table__, lambda record: {
+                'region': record['region'],
+                'date': datetime.strptime(record['date'], '%Y-%m-%d').date(),
+                'temperature': record.get('temperature'),
+                'weather': record.get('weather'),
+                'humidity': record.get('humidity'),
+                'wind_speed': record.get('wind_speed')
+            }
+
+        if website == 'farm_machine' and data_type == 'product_info':
+            # 农机数据（无自然键，直接批量插入）
+            return FarmMachine.__table__, lambda record: {
+                'product_name': record['product_name'],
+                'brand': record.get('brand'),
+                'model': record.get('model'),
+                'price': record.get('price'),
+                'specifications': record.get('specifications'),
+                'region': record.get('region')
+            }
+
+        return None, None
+
     def get_crawl_status(self):
         """获取爬虫状态"""
         return {
             'supported_websites': self.supported_websites,
+            'rate_limits': self.rate_limiter.get_status(),
+            'http_cache': self.http_cache.get_stats() if self.http_cache else None,
+            'crawl_state': self.crawl_state.get_stats() if self.crawl_state else None,
+            'page_archive': self.page_archive.get_stats() if self.page_archive else None,
+            'circuit_breakers': self.circuit_breaker.get_status() if self.circuit_breaker else None,
+            'transport': self.transport.get_status() if self.transport else None,
+            'metrics': self.metrics.snapshot(),
+            'parser_backend': self.parser_backend.get_status(),
             'last_crawl_time': datetime.now().isoformat(),
             'status': 'ready'
         }
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+爬虫字段提取
+模块级预编译的价格/温度/型号正则，以及基于字典树的省份识别，
+每行文本只扫描一次即可得到带类型的提取结果
+"""
+
+import re
+from typing import NamedTuple, Optional
+
+# 34 个省级行政区
+PROVINCES = (
+    '北京', '天津', '上海', '重庆',
+    '河北', '山西', '辽宁', '吉林', '黑龙江', '江苏', '浙江', '安徽', '福建', '江西',
+    '山东', '河南', '湖北', '湖南', '广东', '海南', '四川', '贵州', '云南', '陕西',
+    '甘肃', '青海', '台湾',
+    '内蒙古', '广西', '西藏', '宁夏', '新疆',
+    '香港', '澳门',
+)
+
+# 页面中常以城市名标注产地的主要城市
+MAJOR_CITIES = ('广州', '深圳', '成都', '西安', '武汉', '南京')
+
+# 种子价格：价格：12.5 / ￥12.5 / 12.5元(/斤)
+SEED_PRICE_PATTERN = re.compile(
+    r'价格[：:]\s*(\d+\.?\d*)'
+    r'|￥\s*(\d+\.?\d*)'
+    r'|(\d+\.?\d*)\s*[元￥]'
+)
+
+# 农机价格：报价：￥12万 / 价格：12 / ￥12万 / 12万元 / 120000元，捕获"万"单位
+MACHINE_PRICE_PATTERN = re.compile(
+    r'(?:报价|价格)[：:]\s*￥?(\d+\.?\d*)\s*(万)?'
+    r'|￥(\d+\.?\d*)\s*(万)?'
+    r'|(\d+\.?\d*)\s*(万)?元'
+)
+
+TEMPERATURE_PATTERN = re.compile(r'-?\d+')
+NON_CHINESE_PATTERN = re.compile(r'[^\u4e00-\u9fa5]')
+MODEL_PATTERN = re.compile(r'[A-Z0-9\-]+')
+
+
+class KeywordTrie:
+    """关键词字典树，一次扫描找出文本中最靠前（同位置取最长）的关键词"""
+
+    _END = object()
+
+    def __init__(self, keywords):
+        self._root = {}
+        for keyword in keywords:
+            node = self._root
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[self._END] = keyword
+
+    def find_first(self, text):
+        """返回文本中第一个出现的关键词，没有时返回 None"""
+        root = self._root
+        for start in range(len(text)):
+            node = root.get(text[start])
+            if node is None:
+                continue
+
+            match = node.get(self._END)
+            for char in text[start + 1:]:
+                node = node.get(char)
+                if node is None:
+                    break
+                match = node.get(self._END, match)
+            if match:
+                return match
+        return None
+
+
+REGION_MATCHER = KeywordTrie(PROVINCES + MAJOR_CITIES)
+
+
+class SeedRowFields(NamedTuple):
+    """种子列表行的提取结果"""
+    price: Optional[float]
+    region: Optional[str]
+
+
+class MachineRowFields(NamedTuple):
+    """农机列表行的提取结果"""
+    price: Optional[float]
+    model: Optional[str]
+
+
+def extract_seed_fields(text):
+    """从种子列表行文本中提取价格与地区"""
+    match = SEED_PRICE_PATTERN.search(text)
+    price = float(next(group for group in match.groups() if group)) if match else None
+    return SeedRowFields(price=price, region=REGION_MATCHER.find_first(text))
+
+
+def extract_machine_fields(price_text, product_name):
+    """从农机条目文本中提取价格（万元换算为元）与型号"""
+    price = None
+    match = MACHINE_PRICE_PATTERN.search(price_text)
+    if match:
+        groups = match.groups()
+        for value_index in (0, 2, 4):
+            if groups[value_index]:
+                price = float(groups[value_index])
+                if groups[value_index + 1]:
+                    price *= 10000
+                break
+
+    model_match = MODEL_PATTERN.search(product_name)
+    return MachineRowFields(price=price, model=model_match.group(0) if model_match else None)
+
+
+def extract_region(text):
+    """识别文本中第一个出现的省份或主要城市"""
+    return REGION_MATCHER.find_first(text)
+
+
+def extract_temperature(text):
+    """提取文本中的第一个温度值（支持零下温度）"""
+    match = TEMPERATURE_PATTERN.search(text)
+    return int(match.group(0)) if match else None
+
+
+def clean_weather_text(text):
+    """去除天气描述中的非中文字符"""
+    return NON_CHINESE_PATTERN.sub('', text)
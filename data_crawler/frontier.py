@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+爬取边界（crawl frontier）
+按优先级排列待抓取页面，根据站点配置的链接发现规则从已抓取页面中扩展新页面，
+并通过已访问集合和深度上限控制抓取范围
+"""
+
+import heapq
+import itertools
+import re
+from urllib.parse import urldefrag, urljoin, urlparse
+
+HREF_PATTERN = re.compile(rb'href\s*=\s*["\']([^"\'#\s>]+)', re.IGNORECASE)
+
+# 页面任务本身的字段（见 CrawlerManager._page_task）；抓取时写入的状态、字节数、耗时等字段不传给子页面
+TASK_FIELDS = ('url', 'parser', 'context', 'page_type', 'label', 'paginated', 'depth', 'priority', 'incremental')
+
+
+class LinkRule:
+    """链接发现规则：URL 匹配 pattern 的同站链接加入边界
+
+    配置项（supported_websites[...]['frontier']['follow'] 中的字典）：
+        pattern: 匹配完整 URL 的正则
+        priority: 新页面的优先级（越大越先抓取）
+        label: 日志中显示的页面描述
+        paginated: 是否属于按时间倒序的翻页列表
+    """
+
+    def __init__(self, pattern, priority=0, label=None, paginated=False):
+        self.pattern = re.compile(pattern)
+        self.priority = priority
+        self.label = label
+        self.paginated = paginated
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config['pattern'], config.get('priority', 0), config.get('label'),
+                   config.get('paginated', False))
+
+
+def discover_links(content, page_url, rules):
+    """
+    从页面原始内容中提取符合规则的同站链接
+
+    Returns:
+        list: (url, rule) 列表，保持页面中的出现顺序，同一URL只保留一次
+    """
+    if not rules:
+        return []
+
+    host = urlparse(page_url).netloc
+    found = {}
+    for match in HREF_PATTERN.finditer(bytes(content)):
+        href = match.group(1).decode('utf-8', 'ignore').replace('&amp;', '&')
+        url = urldefrag(urljoin(page_url, href))[0]
+        if url in found or urlparse(url).netloc != host:
+            continue
+        for rule in rules:
+            if rule.pattern.search(url):
+                found[url] = rule
+                break
+    return list(found.items())
+
+
+class CrawlFrontier:
+    """带优先级、深度上限和已访问集合的待抓取队列
+
+    优先级高的页面先出队；同优先级按深度、再按加入顺序出队。
+    """
+
+    def __init__(self, max_depth=None):
+        self.max_depth = max_depth
+        self._heap = []
+        self._seen = set()
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, page):
+        """
+        加入页面任务（page 中的 priority / depth 缺省为 0）
+
+        Returns:
+            bool: 是否加入（已见过或超过深度上限的页面不加入）
+        """
+        url = urldefrag(page['url'])[0]
+        depth = page.setdefault('depth', 0)
+        if url in self._seen or (self.max_depth is not None and depth > self.max_depth):
+            return False
+        self._seen.add(url)
+        heapq.heappush(self._heap, (-page.get('priority', 0), depth, next(self._counter), page))
+        return True
+
+    def add_links(self, page):
+        """把页面抓取时发现的链接（page['links']）作为子页面加入边界"""
+        added = 0
+        for url, rule in page.get('links', ()):
+            child = {field: page[field] for field in TASK_FIELDS if field in page}
+            child.update(url=url, depth=page['depth'] + 1, priority=rule.priority, paginated=rule.paginated)
+            if rule.label:
+                child['label'] = rule.label
+            # 以来源URL为解析上下文的页面，子页面使用自己的URL
+            if page['context'] == page['url']:
+                child['context'] = url
+            added += self.add(child)
+        return added
+
+    def pop_batch(self, size):
+        """按优先级取出最多 size 个页面"""
+        batch = []
+        while self._heap and len(batch) < size:
+            batch.append(heapq.heappop(self._heap)[-1])
+        return batch
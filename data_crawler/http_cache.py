@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+爬虫HTTP条件请求缓存
+在磁盘上保存页面内容、ETag/Last-Modified 以及解析结果，
+配合 If-None-Match / If-Modified-Since 避免重复下载和重复解析
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class HttpCache:
+    """基于 SQLite 的持久化HTTP缓存，按最近访问时间做LRU淘汰"""
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = {
+            'hits': 0,           # 304 命中，复用缓存
+            'misses': 0,         # 完整下载
+            'parse_reuses': 0,   # 直接复用解析结果（未重新解析）
+            'evictions': 0
+        }
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                parsed TEXT NOT NULL DEFAULT '{}',
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_http_cache_access ON http_cache (last_access)')
+        self._conn.commit()
+
+    def get(self, url):
+        """获取缓存条目，不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified, body, parsed FROM http_cache WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE http_cache SET last_access = ? WHERE url = ?', (time.time(), url))
+            self._conn.commit()
+
+        return {
+            'url': url,
+            'etag': row[0],
+            'last_modified': row[1],
+            'body': row[2],
+            'parsed': json.loads(row[3])
+        }
+
+    @staticmethod
+    def conditional_headers(entry):
+        """根据缓存条目生成条件请求头"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, body, etag=None, last_modified=None, parsed=None):
+        """保存页面内容及其解析结果；没有校验头的页面不缓存"""
+        if not etag and not last_modified:
+            return False
+
+        body = bytes(body)
+        parsed_json = json.dumps(parsed or {}, ensure_ascii=False)
+        size = len(body) + len(parsed_json.encode('utf-8'))
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO http_cache (url, etag, last_modified, body, parsed, size, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, etag, last_modified, body, parsed_json, size, time.time())
+            )
+            self._evict()
+            self._conn.commit()
+        return True
+
+    def update_parsed(self, url, parser_key, records):
+        """为已缓存的页面追加某个解析器的解析结果"""
+        entry = self.get(url)
+        if entry is None:
+            return False
+        entry['parsed'][parser_key] = records
+        return self.store(url, entry['body'], entry['etag'], entry['last_modified'], entry['parsed'])
+
+    def record(self, event):
+        """累加命中/未命中等计数"""
+        with self._lock:
+            self.stats[event] = self.stats.get(event, 0) + 1
+
+    def get_stats(self):
+        """获取缓存统计信息"""
+        with self._lock:
+            entries, total_size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM http_cache'
+            ).fetchone()
+            stats = dict(self.stats)
+
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'entries': entries,
+            'size_bytes': total_size,
+            'max_bytes': self.max_bytes,
+            'hit_rate': round(stats['hits'] / lookups, 3) if lookups else 0.0
+        })
+        return stats
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute('DELETE FROM http_cache')
+            self._conn.commit()
+
+    def _evict(self):
+        """超出容量时按最近访问时间淘汰最旧的条目（调用方持有锁）"""
+        total_size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM http_cache').fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        rows = self._conn.execute('SELECT url, size FROM http_cache ORDER BY last_access ASC').fetchall()
+        for url, size in rows:
+            if total_size <= self.max_bytes:
+                break
+            self._conn.execute('DELETE FROM http_cache WHERE url = ?', (url,))
+            total_size -= size
+            self.stats['evictions'] += 1
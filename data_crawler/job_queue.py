@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+后台采集任务队列
+采集请求写入任务表（SQLite 本地文件）后立即返回任务ID，由进程内线程池执行；
+相同 (网站, 数据类型, 地区, 参数) 的未完成任务合并为同一个任务（通过任务表合并，多个 worker 进程共享）；
+运行中的任务逐页产生进度事件，可通过 iter_events 订阅（用于 Server-Sent Events）
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+def format_sse(event_id, event):
+    """把事件编码为 Server-Sent Events 消息"""
+    data = json.dumps(event['data'], ensure_ascii=False, default=str)
+    return f"id: {event_id}\nevent: {event['event']}\ndata: {data}\n\n"
+
+
+class CrawlJobQueue:
+    """持久化的后台采集任务队列
+
+    任务状态、进度和结果保存在 crawl_jobs 表中；进度在内存中实时更新，
+    按 progress_interval 间隔写回任务表，其他进程也能查询。
+    每个任务记录执行它的队列实例（owner），该实例每 heartbeat_interval 秒续写心跳；
+    心跳超过 stale_after 秒未更新的排队/运行中任务（所属进程已退出）会被标记为失败，
+    其他仍在运行的 worker 的任务不受影响。
+    每个任务的事件（逐页的 page 事件和结束时的 done 事件）保存在内存中，
+    保留最近 event_history 个任务，供订阅者按事件序号续读。
+    """
+
+    def __init__(self, manager, path, max_workers=2, progress_interval=1.0, event_history=50,
+                 heartbeat_interval=10.0, stale_after=60.0, clock=time.time):
+        self.manager = manager
+        self.path = path
+        self.progress_interval = progress_interval
+        self.event_history = event_history
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._events_changed = threading.Condition(self._lock)
+        self._active = set()      # 本实例执行中的 job_id
+        self._progress = {}       # job_id -> 最新进度
+        self._events = OrderedDict()  # job_id -> 事件列表
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='crawl-job')
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS crawl_jobs (
+                job_id TEXT PRIMARY KEY,
+                website TEXT NOT NULL,
+                data_type TEXT NOT NULL,
+                region TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                submissions INTEGER NOT NULL DEFAULT 1,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner TEXT,
+                heartbeat REAL
+            );
+            CREATE INDEX IF NOT EXISTS ix_crawl_jobs_created ON crawl_jobs (created_at);
+            CREATE INDEX IF NOT EXISTS ix_crawl_jobs_key ON crawl_jobs (website, data_type, region, status);
+        """)
+        # 旧版本创建的任务表没有 owner / heartbeat 列
+        columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(crawl_jobs)')}
+        for column, column_type in (('owner', 'TEXT'), ('heartbeat', 'REAL')):
+            if column not in columns:
+                self._conn.execute(f'ALTER TABLE crawl_jobs ADD COLUMN {column} {column_type}')
+        self._conn.commit()
+        with self._lock:
+            self._fail_stale_locked()
+            self._conn.commit()
+
+        self._stopped = threading.Event()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name='crawl-job-heartbeat',
+                                                  daemon=True)
+        self._heartbeat_thread.start()
+
+    def submit(self, website, data_type, region='全国', **kwargs):
+        """
+        提交采集任务；已有网站、数据类型、地区和参数都相同的未完成任务时直接返回该任务
+
+        Returns:
+            tuple: (任务字典, 是否与已有任务合并)
+        """
+        key = (website, data_type, region)
+        # 参数按键排序后序列化，参数不同（如 max_pages）的请求不合并
+        params = json.dumps(kwargs, ensure_ascii=False, sort_keys=True)
+        with self._lock:
+            # 查找与插入在同一个写事务中完成，不同进程的重复请求也会合并
+            try:
+                self._conn.execute('BEGIN IMMEDIATE')
+                self._fail_stale_locked()
+                row = self._conn.execute(
+                    'SELECT job_id FROM crawl_jobs WHERE website = ? AND data_type = ? AND region = ? '
+                    'AND params = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1',
+                    (website, data_type, region, params, *ACTIVE_STATUSES)
+                ).fetchone()
+                if row is not None:
+                    job_id = row['job_id']
+                    self._conn.execute(
+                        'UPDATE crawl_jobs SET submissions = submissions + 1 WHERE job_id = ?', (job_id,)
+                    )
+                else:
+                    job_id = uuid.uuid4().hex
+                    now = self._clock()
+                    self._conn.execute(
+                        'INSERT INTO crawl_jobs (job_id, website, data_type, region, params, status, '
+                        'created_at, owner, heartbeat) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (job_id, website, data_type, region, params, QUEUED, now, self.owner, now)
+                    )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+            if row is not None:
+                return self._get_locked(job_id), True
+
+            self._active.add(job_id)
+            self._events[job_id] = []
+            # 淘汰最早结束的任务的事件（运行中的任务不淘汰）
+            while len(self._events) > self.event_history:
+                oldest = next(iter(self._events))
+                if oldest in self._active:
+                    break
+                self._events.popitem(last=False)
+            job = self._get_locked(job_id)
+
+        self._executor.submit(self._run, job_id, key, kwargs)
+        return job, False
+
+    def get(self, job_id):
+        """查询任务（不存在时返回 None）"""
+        with self._lock:
+            return self._get_locked(job_id)
+
+    def list_jobs(self, limit=20):
+        """最近提交的任务"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT job_id FROM crawl_jobs ORDER BY created_at DESC LIMIT ?', (limit,)
+            ).fetchall()
+            return [self._get_locked(row['job_id']) for row in rows]
+
+    def wait(self, job_id, timeout=None):
+        """等待任务结束，返回任务字典（超时仍未结束时返回当前状态）"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] not in ACTIVE_STATUSES:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(0.05)
+
+    def iter_events(self, job_id, after=0, heartbeat=15.0, poll_interval=1.0):
+        """
+        订阅任务事件，直到任务结束
+
+        Args:
+            job_id: 任务ID
+            after: 已收到的最后一个事件序号（断线重连时续读）
+            heartbeat: 无新事件时的等待时间（秒），超时产出 None 用于保持连接
+            poll_interval: 任务由其他进程执行时轮询任务表的间隔（秒）
+
+        Yields:
+            tuple | None: (事件序号, {'event': 'page' | 'done', 'data': {...}})；
+                          任务由其他进程执行时，按任务表中写回的最新进度产出 page 事件
+                          （事件序号为已完成页数，与本进程的序号一致）；
+                          事件已过期的已结束任务只产出最终状态
+        """
+        foreign = False
+        idle = 0.0
+        while True:
+            with self._events_changed:
+                events = self._events.get(job_id)
+                if events is None:
+                    job = self._get_locked(job_id)
+                    if job is None:
+                        return
+                    active = job['status'] in ACTIVE_STATUSES
+                    foreign = foreign or active
+                    pending = []
+                    progress = job['progress']
+                    if foreign and progress and progress.get('pages', 0) > after:
+                        pending.append((progress['pages'], {'event': 'page', 'data': progress}))
+                    if not active:
+                        pending.append(((pending[-1][0] if pending else after) + 1, self._done_event(job)))
+                else:
+                    active = False
+                    if len(events) <= after:
+                        self._events_changed.wait(heartbeat)
+                    pending = list(enumerate(events[after:], start=after + 1))
+
+            if not pending:
+                if not active:
+                    yield None
+                    continue
+                # 其他进程执行的任务：定期读取任务表中的进度，无变化时按 heartbeat 间隔保持连接
+                time.sleep(poll_interval)
+                idle += poll_interval
+                if idle >= heartbeat:
+                    idle = 0.0
+                    yield None
+                continue
+            idle = 0.0
+            for event_id, event in pending:
+                yield event_id, event
+                if event['event'] == 'done':
+                    return
+            after = pending[-1][0]
+
+    def get_stats(self):
+        """各状态任务数"""
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM crawl_jobs GROUP BY status').fetchall()
+            return dict({status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)},
+                        **{row[0]: row[1] for row in rows})
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        self._stopped.set()
+
+    def _heartbeat_loop(self):
+        """定期续写本实例任务的心跳，并回收已退出进程遗留的任务"""
+        while not self._stopped.wait(self.heartbeat_interval):
+            try:
+                with self._lock:
+                    self._conn.execute(
+                        'UPDATE crawl_jobs SET heartbeat = ? WHERE owner = ? AND status IN (?, ?)',
+                        (self._clock(), self.owner, *ACTIVE_STATUSES)
+                    )
+                    self._fail_stale_locked()
+                    self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"采集任务心跳更新失败: {str(e)}")
+
+    def _fail_stale_locked(self):
+        """把心跳超时的排队/运行中任务标记为失败（调用方持有锁并负责提交）"""
+        now = self._clock()
+        self._conn.execute(
+            'UPDATE crawl_jobs SET status = ?, error = ?, finished_at = ? '
+            'WHERE status IN (?, ?) AND (heartbeat IS NULL OR heartbeat < ?)',
+            (FAILED, '服务重启，任务中断', now, *ACTIVE_STATUSES, now - self.stale_after)
+        )
+
+    def _run(self, job_id, key, kwargs):
+        website, data_type, region = key
+        with self._lock:
+            # 排队期间任务已被其他进程标记为结束（如服务重启）时不再执行
+            started = self._conn.execute(
+                'UPDATE crawl_jobs SET status = ?, started_at = ?, heartbeat = ? WHERE job_id = ? AND status = ?',
+                (RUNNING, self._clock(), self._clock(), job_id, QUEUED)
+            ).rowcount
+            self._conn.commit()
+        if not started:
+            with self._events_changed:
+                self._active.discard(job_id)
+                self._events[job_id].append(self._done_event(self._get_locked(job_id)))
+                self._events_changed.notify_all()
+            return
+        last_flush = [0.0]
+
+        def track(event):
+            with self._events_changed:
+                self._progress[job_id] = event
+                self._events[job_id].append({'event': 'page', 'data': event})
+                self._events_changed.notify_all()
+            now = time.monotonic()
+            if now - last_flush[0] >= self.progress_interval:
+                last_flush[0] = now
+                self._update(job_id, progress=json.dumps(event, ensure_ascii=False, default=str))
+
+        try:
+            result = self.manager.crawl_to_database(website, data_type, region, progress_callback=track, **kwargs)
+            status, error = (SUCCEEDED, None) if result.get('success') else (FAILED, result.get('error'))
+        except Exception as e:
+            result, status, error = None, FAILED, f'采集任务执行失败: {str(e)}'
+
+        with self._events_changed:
+            progress = self._progress.pop(job_id, None)
+            self._active.discard(job_id)
+            self._update_locked(
+                job_id, status=status, error=error, finished_at=self._clock(),
+                progress=json.dumps(progress, ensure_ascii=False, default=str) if progress else None,
+                result=json.dumps(result, ensure_ascii=False, default=str) if result else None
+            )
+            self._events[job_id].append(self._done_event(self._get_locked(job_id)))
+            self._events_changed.notify_all()
+
+    @staticmethod
+    def _done_event(job):
+        """任务结束事件"""
+        return {'event': 'done', 'data': {
+            'job_id': job['job_id'],
+            'status': job['status'],
+            'error': job['error'],
+            'result': job['result'],
+            'duration': round(job['finished_at'] - job['started_at'], 3)
+            if job['finished_at'] and job['started_at'] else None
+        }}
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._update_locked(job_id, **fields)
+
+    def _update_locked(self, job_id, **fields):
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        self._conn.execute(f'UPDATE crawl_jobs SET {assignments} WHERE job_id = ?', (*fields.values(), job_id))
+        self._conn.commit()
+
+    def _get_locked(self, job_id):
+        row = self._conn.execute('SELECT * FROM crawl_jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for field in ('params', 'progress', 'result'):
+            job[field] = json.loads(job[field]) if job[field] else None
+        if job_id in self._progress:
+            job['progress'] = self._progress[job_id]
+        return job
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+爬虫指标
+线程安全的计数器和直方图（按标签区分），记录各阶段耗时（DNS/建连/首字节/下载/解析/入库）、
+每页记录数、重试、429 限流和后备数据启用次数；可导出为 JSON 或 Prometheus 文本格式
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# 耗时直方图的桶上界（毫秒）
+DURATION_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+# 每页记录数直方图的桶上界
+COUNT_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 200, 500, 1000)
+# 页面大小直方图的桶上界（字节）
+SIZE_BUCKETS = (1024, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+# 指标名 -> 桶上界；未列出的 *_ms 指标使用耗时桶
+HISTOGRAM_BUCKETS = {
+    'records_per_page': COUNT_BUCKETS,
+    'page_bytes': SIZE_BUCKETS,
+}
+
+# 指标说明（Prometheus HELP）
+METRIC_HELP = {
+    'pages_total': '成功抓取并解析的页面数',
+    'page_failures_total': '请求或解析失败的页面数',
+    'cached_pages_total': '服务端返回 304、复用缓存的页面数',
+    'records_total': '解析得到的记录数',
+    'bytes_total': '下载的页面字节数',
+    'requests_total': '发出的HTTP请求数（含重试）',
+    'retries_total': '重试次数',
+    'throttled_total': '收到 429 的次数',
+    'server_errors_total': '收到 5xx 的次数',
+    'fallback_total': '启用后备数据的次数',
+    'db_rows_total': '写入数据库的记录数',
+    'dns_ms': 'DNS 解析耗时（毫秒，命中缓存时不计）',
+    'connect_ms': '建立 TCP/TLS 连接耗时（毫秒，复用连接时不计）',
+    'ttfb_ms': '请求发出到收到响应头的耗时（毫秒）',
+    'download_ms': '读取响应体耗时（毫秒）',
+    'fetch_ms': '获取一个页面的总耗时（毫秒，含限速等待和重试）',
+    'parse_ms': '解析一个页面的耗时（毫秒）',
+    'records_per_page': '每页解析得到的记录数',
+    'page_bytes': '页面大小（字节）',
+    'db_write_ms': '一次采集写入数据库的耗时（毫秒）',
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+def _format_labels(key):
+    return ','.join(f'{name}={value}' for name, value in key)
+
+
+class Histogram:
+    """累积桶直方图，分位数按桶上界估算"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个为溢出桶
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """分位数的估计值（所在桶的上界，落在溢出桶时取最大值）"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'min': self.min,
+            'max': self.max,
+            'mean': round(self.sum / self.count, 3) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': buckets
+        }
+
+
+class CrawlMetrics:
+    """爬虫指标注册表
+
+    counters / histograms 以 (指标名, 标签) 区分，例如
+    inc('retries_total', website='weather')、observe('parse_ms', 12.5, website='weather')。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if value is None:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = Histogram(HISTOGRAM_BUCKETS.get(name, DURATION_BUCKETS_MS))
+                self._histograms[key] = histogram
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """记录代码块耗时（毫秒）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000, **labels)
+
+    def counter(self, name, **labels):
+        """读取计数器的值"""
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0)
+
+    def snapshot(self):
+        """
+        导出全部指标
+
+        Returns:
+            dict: {'counters': {指标名: {标签: 值}}, 'histograms': {指标名: {标签: 统计}}}，
+                  标签格式为 "website=weather"，无标签时为空字符串
+        """
+        with self._lock:
+            counters, histograms = {}, {}
+            for (name, key), value in sorted(self._counters.items()):
+                counters.setdefault(name, {})[_format_labels(key)] = value
+            for (name, key), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                histograms.setdefault(name, {})[_format_labels(key)] = histogram.snapshot()
+        return {'counters': counters, 'histograms': histograms}
+
+    def render_prometheus(self, prefix='agridec_crawler_'):
+        """导出为 Prometheus 文本格式"""
+        def labels_text(key, extra=()):
+            pairs = [f'{name}="{value}"' for name, value in tuple(key) + tuple(extra)]
+            return '{%s}' % ','.join(pairs) if pairs else ''
+
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                ((name, key, histogram.snapshot()) for (name, key), histogram in self._histograms.items()),
+                key=lambda item: item[:2]
+            )
+
+        declared = set()
+        for (name, key), value in counters:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f'# HELP {prefix}{name} {METRIC_HELP.get(name, name)}')
+                lines.append(f'# TYPE {prefix}{name} counter')
+            lines.append(f'{prefix}{name}{labels_text(key)} {value}')
+
+        for name, key, snapshot in histograms:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f'# HELP {prefix}{name} {METRIC_HELP.get(name, name)}')
+                lines.append(f'# TYPE {prefix}{name} histogram')
+            for bound, cumulative in snapshot['buckets'].items():
+                lines.append(f'{prefix}{name}_bucket{labels_text(key, [("le", bound)])} {cumulative}')
+            lines.append(f'{prefix}{name}_bucket{labels_text(key, [("le", "+Inf")])} {snapshot["count"]}')
+            lines.append(f'{prefix}{name}_sum{labels_text(key)} {snapshot["sum"]}')
+            lines.append(f'{prefix}{name}_count{labels_text(key)} {snapshot["count"]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# 进程级指标（所有 CrawlerManager 共享，由 /api/crawler-metrics 导出）
+crawl_metrics = CrawlMetrics()
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+原始页面归档
+把抓取到的HTML压缩后追加写入分段文件，并在 SQLite 索引中记录偏移量，
+用于离线重新解析（reparse）和可重复的基准测试
+"""
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:  # zstd 为可选依赖，缺失时使用 zlib
+    zstandard = None
+
+
+def _compress(content):
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=3).compress(content)
+    return 'zlib', zlib.compress(content, 6)
+
+
+def _decompress(codec, payload):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('归档使用 zstd 压缩，需要安装 zstandard')
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return zlib.decompress(payload)
+
+
+class PageArchive:
+    """仅追加的分段页面归档
+
+    目录结构：
+        index.db                              偏移量索引
+        segment-<毫秒时间戳>-<pid>.seg         压缩页面数据
+
+    每个实例独占自己创建的分段文件（以 O_EXCL 方式创建），写满 segment_max_bytes 后滚动；
+    多个进程（WSGI worker 与调度进程）共用同一目录时不会写入同一个分段，偏移量不会错乱。
+    max_age / max_bytes 限制归档的保留期和总大小，按整个分段删除最旧的数据。
+    """
+
+    def __init__(self, directory, segment_max_bytes=256 * 1024 * 1024, max_age=None, max_bytes=None):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._segment = None
+        self._segment_pid = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, 'index.db'), timeout=30, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                page_type TEXT,
+                parser TEXT NOT NULL,
+                context TEXT,
+                fetched_at REAL NOT NULL,
+                content_hash TEXT NOT NULL,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                codec TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_url ON pages (url, id);
+            CREATE INDEX IF NOT EXISTS idx_pages_fetched_at ON pages (fetched_at);
+            CREATE INDEX IF NOT EXISTS idx_pages_segment ON pages (segment);
+        """)
+        self._conn.commit()
+        self.prune()
+
+    def append(self, page, content, fetched_at=None):
+        """
+        归档一个页面；与该URL上一次归档的内容相同时跳过
+
+        Args:
+            page: 页面任务（需要 url、parser、context、page_type）
+            content: 页面原始内容（bytes）
+            fetched_at: 抓取时间戳，默认当前时间
+
+        Returns:
+            bool: 是否写入了新内容
+        """
+        content = bytes(content)
+        content_hash = hashlib.sha1(content).hexdigest()
+        codec, payload = _compress(content)
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT content_hash FROM pages WHERE url = ? ORDER BY id DESC LIMIT 1', (page['url'],)
+            ).fetchone()
+            if row and row[0] == content_hash:
+                return False
+
+            segment, rolled = self._current_segment(len(payload))
+            with open(os.path.join(self.directory, segment), 'ab') as f:
+                offset = f.tell()
+                f.write(payload)
+
+            self._conn.execute(
+                'INSERT INTO pages (url, page_type, parser, context, fetched_at, content_hash, '
+                'segment, offset, length, codec) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (page['url'], page.get('page_type'), page['parser'], page.get('context'),
+                 time.time() if fetched_at is None else fetched_at, content_hash, segment, offset, len(payload), codec)
+            )
+            self._conn.commit()
+
+        if rolled:
+            self.prune()
+        return True
+
+    def iter_pages(self, since=None, until=None, page_type=None):
+        """
+        按归档顺序读取页面（通过 mmap 访问分段文件，不经过网络）
+
+        Args:
+            since / until: 抓取时间戳范围（含 since，不含 until）
+            page_type: 只读取指定类型的页面
+
+        Yields:
+            tuple: (page, content)，page 包含 url、parser、context、page_type、fetched_at
+        """
+        conditions, args = [], []
+        if since is not None:
+            conditions.append('fetched_at >= ?')
+            args.append(since)
+        if until is not None:
+            conditions.append('fetched_at < ?')
+            args.append(until)
+        if page_type:
+            conditions.append('page_type = ?')
+            args.append(page_type)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT url, page_type, parser, context, fetched_at, segment, offset, length, codec '
+                f'FROM pages {where} ORDER BY segment, offset', args
+            ).fetchall()
+
+        maps = {}
+        try:
+            for url, row_type, parser, context, fetched_at, segment, offset, length, codec in rows:
+                if segment not in maps:
+                    try:
+                        f = open(os.path.join(self.directory, segment), 'rb')
+                    except FileNotFoundError:  # 读取期间被保留策略删除
+                        maps[segment] = None
+                    else:
+                        maps[segment] = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                if maps[segment] is None:
+                    continue
+                data = maps[segment][1][offset:offset + length]
+                if len(data) < length:
+                    continue
+                page = {
+                    'url': url,
+                    'page_type': row_type,
+                    'parser': parser,
+                    'context': context,
+                    'fetched_at': fetched_at
+                }
+                yield page, _decompress(codec, data)
+        finally:
+            for opened in maps.values():
+                if opened is not None:
+                    opened[1].close()
+                    opened[0].close()
+
+    def get_stats(self):
+        """获取归档统计信息"""
+        with self._lock:
+            pages, stored = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(length), 0) FROM pages'
+            ).fetchone()
+            segments = self._conn.execute('SELECT COUNT(DISTINCT segment) FROM pages').fetchone()[0]
+        return {'pages': pages, 'stored_bytes': stored, 'segments': segments,
+                'codec': 'zstd' if zstandard is not None else 'zlib'}
+
+    def prune(self, max_age=None, max_bytes=None, now=None):
+        """
+        按保留策略删除最旧的分段（整段删除，不改写仍在使用的文件）
+
+        Args:
+            max_age: 保留秒数，分段内最新页面早于该时间时删除；默认使用构造参数
+            max_bytes: 归档总大小上限，超出时从最旧的分段开始删除；默认使用构造参数
+            now: 当前时间戳，默认 time.time()
+
+        Returns:
+            dict: 删除的分段数和页面数
+        """
+        max_age = self.max_age if max_age is None else max_age
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        result = {'segments': 0, 'pages': 0}
+        if not max_age and not max_bytes:
+            return result
+
+        cutoff = (now or time.time()) - max_age if max_age else None
+        with self._lock:
+            segments = self._conn.execute(
+                'SELECT segment, MAX(fetched_at), SUM(length), COUNT(*) FROM pages '
+                'GROUP BY segment ORDER BY MAX(id)'
+            ).fetchall()
+            total = sum(row[2] for row in segments)
+            for segment, newest, stored, pages in segments:
+                if segment == self._segment:
+                    continue
+                expired = cutoff is not None and newest < cutoff
+                oversized = bool(max_bytes) and total > max_bytes
+                if not expired and not oversized:
+                    continue
+                # 先删索引再删文件，读取方不会拿到指向已删除文件的新偏移
+                self._conn.execute('DELETE FROM pages WHERE segment = ?', (segment,))
+                self._conn.commit()
+                try:
+                    os.remove(os.path.join(self.directory, segment))
+                except FileNotFoundError:
+                    pass
+                total -= stored
+                result['segments'] += 1
+                result['pages'] += pages
+        if result['segments']:
+            print(f"页面归档清理: 删除 {result['segments']} 个分段，{result['pages']} 个页面")
+        return result
+
+    def _current_segment(self, incoming_bytes):
+        """
+        返回本实例独占的分段文件名，写满时滚动到新文件（调用方持有锁）
+
+        Returns:
+            tuple: (分段文件名, 是否发生了滚动)
+        """
+        if self._segment is not None and self._segment_pid == os.getpid():
+            path = os.path.join(self.directory, self._segment)
+            if os.path.exists(path):
+                size = os.path.getsize(path)
+                if size == 0 or size + incoming_bytes <= self.segment_max_bytes:
+                    return self._segment, False
+
+        # 以独占方式创建新分段，其他进程或实例不会写入同一个文件
+        while True:
+            segment = f'segment-{int(time.time() * 1000):013d}-{os.getpid()}.seg'
+            try:
+                open(os.path.join(self.directory, segment), 'xb').close()
+                break
+            except FileExistsError:
+                time.sleep(0.001)
+        rolled = self._segment is not None
+        self._segment, self._segment_pid = segment, os.getpid()
+        return segment, rolled
+
+def reparse_archive(manager, archive, since=None, until=None, page_type=None):
+    """
+    使用当前的 _parse_*_page 重新解析归档页面
+
+    记录日期取页面归档时的抓取时间，而不是重新解析的时间，
+    回填时不会用旧页面覆盖当天的数据。
+
+    Args:
+        manager: CrawlerManager（只使用其解析方法和解析后端）
+        archive: PageArchive
+
+    Yields:
+        tuple: (page, records)
+    """
+    for page, content in archive.iter_pages(since=since, until=until, page_type=page_type):
+        parser = getattr(manager, page['parser'])
+        fetched_at = datetime.fromtimestamp(page['fetched_at']) if page['fetched_at'] is not None else None
+        try:
+            records = parser(manager.parser_backend.make_soup(content, page['page_type']), page['context'],
+                             fetched_at=fetched_at)
+        except Exception as e:
+            print(f"重新解析失败 {page['url']}: {str(e)}")
+            continue
+        yield page, records
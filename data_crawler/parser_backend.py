@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+爬虫页面解析后端
+选择最快可用的 BeautifulSoup 树构建器，按页面类型只解析相关标签，
+并记住每个站点上命中的选择器，后续页面跳过回退链
+"""
+
+import threading
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+def _class_names(attrs):
+    """取出标签的 class 列表（兼容字符串与列表两种形式）"""
+    value = attrs.get('class') or ''
+    if isinstance(value, str):
+        return value.split()
+    return list(value)
+
+
+def _seed_trade_tags(name, attrs):
+    """种子列表页：只保留表格、列表及列表项容器"""
+    if name in ('table', 'ul', 'ol'):
+        return True
+    return any(cls in ('list', 'supply-list', 'item') for cls in _class_names(attrs))
+
+
+def _weather_tags(name, attrs):
+    """天气页：保留预报列表以及温度/天气相关元素"""
+    if name == 'ul':
+        return True
+    return any(
+        key in cls
+        for cls in _class_names(attrs)
+        for key in ('tem', 'wea', 'day-item', 'forecast-item')
+    )
+
+
+# 页面类型 -> 局部解析规则；农机页需要链接的原始父元素来提取价格，
+# 局部解析会改变父子关系，因此保持完整解析
+PARSE_ONLY = {
+    'seed_trade': SoupStrainer(_seed_trade_tags),
+    'weather': SoupStrainer(_weather_tags),
+}
+
+
+def detect_features():
+    """检测可用的树构建器，优先使用 lxml"""
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+
+class ParserBackend:
+    """可插拔的页面解析后端"""
+
+    def __init__(self, features=None, use_strainer=True, remember_selectors=True):
+        self.features = features or detect_features()
+        self.use_strainer = use_strainer
+        self.remember_selectors = remember_selectors
+        self._selector_memory = {}
+        self._lock = threading.Lock()
+
+    def make_soup(self, content, page_type=None):
+        """构建解析树；page_type 有局部解析规则时只解析相关标签"""
+        parse_only = PARSE_ONLY.get(page_type) if self.use_strainer else None
+        return BeautifulSoup(content, self.features, parse_only=parse_only)
+
+    def select_items(self, soup, site, selectors, min_items):
+        """
+        按选择器回退链查找列表项
+
+        优先尝试该站点上次命中的选择器；命中后记住，供后续页面直接使用。
+
+        Returns:
+            tuple: (命中的选择器, 列表项)；都未命中时返回 (None, 最后一次的结果)
+        """
+        remembered = self._selector_memory.get(site) if self.remember_selectors else None
+        ordered = [remembered] + [s for s in selectors if s != remembered] if remembered else selectors
+
+        items = []
+        for selector in ordered:
+            items = soup.select(selector)
+            if len(items) > min_items:
+                if self.remember_selectors and selector != remembered:
+                    with self._lock:
+                        self._selector_memory[site] = selector
+                return selector, items
+        return None, items
+
+    def get_status(self):
+        """获取解析后端状态"""
+        with self._lock:
+            remembered = dict(self._selector_memory)
+        return {
+            'features': self.features,
+            'use_strainer': self.use_strainer,
+            'remembered_selectors': remembered
+        }
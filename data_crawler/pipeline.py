@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+抓取/解析两阶段流水线
+抓取线程把原始页面放入有界队列，解析进程池并行执行 _parse_*_page，
+队列满时抓取线程阻塞等待，避免内存无限增长
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# 解析进程内复用的爬虫管理器（由 _init_parse_worker 创建）
+_worker_manager = None
+
+_DONE = object()
+
+
+def _init_parse_worker():
+    """解析进程初始化：创建仅用于解析的爬虫管理器"""
+    global _worker_manager
+    from data_crawler.crawler_manager import CrawlerManager
+    _worker_manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                     circuit_breaker=False, transport=False)
+
+
+def parse_page_in_worker(parser_name, content, context, page_type):
+    """在解析进程中解析页面内容，返回 (记录列表, 解析耗时毫秒)"""
+    started = time.perf_counter()
+    parser = getattr(_worker_manager, parser_name)
+    soup = _worker_manager.parser_backend.make_soup(content, page_type)
+    records = parser(soup, context)
+    return records, (time.perf_counter() - started) * 1000
+
+
+class ParsePipeline:
+    """抓取/解析流水线
+
+    抓取阶段使用线程池（同一主机的节奏仍由爬虫管理器的限速器控制），
+    解析阶段使用爬虫管理器持有的进程池；结果按完成顺序逐页产出。
+    """
+
+    def __init__(self, manager, fetch_workers=None, queue_size=None):
+        self.manager = manager
+        config = manager.crawl_config
+        self.fetch_workers = fetch_workers or config['fetch_workers']
+        self.queue_size = queue_size or config['pipeline_queue_size']
+        self.max_in_flight = config['parse_workers'] * 2
+
+    def run(self, pages):
+        """
+        执行流水线
+
+        Args:
+            pages: 页面任务列表（见 CrawlerManager._page_task）
+
+        Yields:
+            tuple: (page, records)，失败的页面 records 为 None
+        """
+        raw_pages = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        feeder = threading.Thread(target=self._fetch_all, args=(pages, raw_pages, stop), daemon=True)
+        feeder.start()
+
+        executor = self.manager._get_parse_executor()
+        in_flight = {}
+        fetching_done = False
+        try:
+            while not fetching_done or in_flight:
+                # 解析任务已满时不再从队列取数据，队列随之填满并反压抓取线程
+                while not fetching_done and len(in_flight) < self.max_in_flight:
+                    try:
+                        item = raw_pages.get(timeout=0.05 if in_flight else None)
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        fetching_done = True
+                        break
+
+                    page, fetched = item
+                    if fetched is None or 'records' in fetched:
+                        yield page, fetched and fetched['records']
+                        continue
+
+                    future = executor.submit(
+                        parse_page_in_worker, page['parser'], fetched['content'],
+                        page['context'], page['page_type']
+                    )
+                    in_flight[future] = (page, fetched)
+
+                if not in_flight:
+                    continue
+
+                done, _ = wait(list(in_flight), timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page, fetched = in_flight.pop(future)
+                    try:
+                        records, page['parse_ms'] = future.result()
+                    except Exception as e:
+                        print(f"解析页面失败 {page['url']}: {str(e)}")
+                        yield page, None
+                        continue
+
+                    self.manager._store_parsed(page['url'], fetched, page['parser'], records)
+                    yield page, records
+        finally:
+            stop.set()
+            for future in in_flight:
+                future.cancel()
+            self._drain(raw_pages)
+
+    def _fetch_all(self, pages, raw_pages, stop):
+        """抓取阶段：并发获取页面并放入有界队列"""
+        def fetch(page):
+            if stop.is_set():
+                return
+            try:
+                print(f"正在爬取{page['label']}: {page['url']}")
+                fetched = self.manager._fetch_page(page)
+            except Exception as e:
+                print(f"爬取页面失败 {page['url']}: {str(e)}")
+                fetched = None
+            self._put(raw_pages, (page, fetched), stop)
+
+        with ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix='fetcher') as pool:
+            list(pool.map(fetch, pages))
+        self._put(raw_pages, _DONE, stop)
+
+    @staticmethod
+    def _put(raw_pages, item, stop):
+        """放入队列；队列满时阻塞，流水线停止后放弃"""
+        while not stop.is_set():
+            try:
+                raw_pages.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    @staticmethod
+    def _drain(raw_pages):
+        """清空队列，释放阻塞中的抓取线程"""
+        try:
+            while True:
+                raw_pages.get_nowait()
+        except queue.Empty:
+            pass
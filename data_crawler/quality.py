@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+采集数据质量评估
+按批把记录转换为 DataFrame，一次向量化计算各字段完整率、取值范围、重复率和过期率，
+流式采集时逐批累加，结束后生成按字段的质量报告
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# 各站点的质量规则
+#   fields: 应有值的字段
+#   ranges: 数值字段的取值范围，gt/ge/lt/le 分别为 >、>=、<、<=
+#   key: 判断重复记录的字段（与入库自然键一致）
+#   date_field / max_age_days: 日期早于"今天 - max_age_days"的记录视为过期
+QUALITY_RULES = {
+    'seed_trade': {
+        'fields': ('product_name', 'variety', 'price', 'unit', 'region', 'date', 'source_url'),
+        'ranges': {'price': {'gt': 0}},
+        'key': ('product_name', 'variety', 'region', 'date'),
+        'date_field': 'date',
+        'max_age_days': 30
+    },
+    'weather': {
+        'fields': ('region', 'date', 'temperature', 'weather', 'humidity', 'wind_speed'),
+        'ranges': {
+            'humidity': {'ge': 0, 'le': 100},
+            'temperature': {'ge': -60, 'le': 60},
+            'wind_speed': {'ge': 0, 'le': 75}
+        },
+        'key': ('region', 'date'),
+        'date_field': 'date',
+        'max_age_days': 1  # 预报日期早于昨天即为过期数据
+    },
+    'farm_machine': {
+        'fields': ('product_name', 'brand', 'model', 'price', 'specifications', 'region'),
+        'ranges': {'price': {'gt': 0}},
+        'key': ('product_name', 'brand', 'model', 'region')
+    }
+}
+
+_COMPARATORS = {
+    'gt': np.greater,
+    'ge': np.greater_equal,
+    'lt': np.less,
+    'le': np.less_equal,
+}
+
+
+def quality_score(valid_records, total_records):
+    """根据有效记录（字段完整且取值在范围内）占比计算质量评分（60%-100%）"""
+    if not total_records:
+        return 0.0
+    return round(0.6 + (valid_records / total_records) * 0.4, 2)
+
+
+class QualityReport:
+    """数据质量累加器
+
+    add() 接受记录列表或 DataFrame，每批只做列运算；report() 汇总为质量报告。
+    跨批次的重复记录按 key 字段的 64 位哈希判断。
+    """
+
+    def __init__(self, website, today=None):
+        self.website = website
+        self.rules = QUALITY_RULES.get(website, {})
+        self.today = pd.Timestamp(today or datetime.now().date())
+        self.total = 0
+        self.valid = 0
+        self.stale = 0
+        self.present = {}
+        self.out_of_range = {}
+        self._key_hashes = []
+
+    def add(self, records):
+        """加入一批记录"""
+        frame = records if isinstance(records, pd.DataFrame) else pd.DataFrame.from_records(list(records))
+        count = len(frame)
+        if not count:
+            return self
+        self.total += count
+
+        fields = self.rules.get('fields') or tuple(frame.columns)
+        valid = np.ones(count, dtype=bool)
+        for field in fields:
+            if field in frame:
+                column = frame[field]
+                present = column.notna().to_numpy() & (column != '').to_numpy()
+            else:
+                present = np.zeros(count, dtype=bool)
+            self.present[field] = self.present.get(field, 0) + int(present.sum())
+            valid &= present
+
+        for field, bounds in self.rules.get('ranges', {}).items():
+            if field not in frame:
+                continue
+            values = pd.to_numeric(frame[field], errors='coerce').to_numpy(dtype=float)
+            in_range = ~np.isnan(values)
+            for op, bound in bounds.items():
+                in_range &= _COMPARATORS[op](values, bound, where=in_range, out=np.zeros(count, dtype=bool))
+            bad = frame[field].notna().to_numpy() & ~in_range
+            self.out_of_range[field] = self.out_of_range.get(field, 0) + int(bad.sum())
+            valid &= ~bad
+        self.valid += int(valid.sum())
+
+        date_field = self.rules.get('date_field')
+        if date_field and date_field in frame:
+            dates = pd.to_datetime(frame[date_field], format='%Y-%m-%d', errors='coerce')
+            cutoff = self.today - timedelta(days=self.rules.get('max_age_days', 0))
+            self.stale += int((dates < cutoff).sum())
+
+        key = [field for field in self.rules.get('key', ()) if field in frame]
+        if key:
+            self._key_hashes.append(pd.util.hash_pandas_object(frame[key], index=False).to_numpy())
+        return self
+
+    def report(self):
+        """
+        生成质量报告
+
+        Returns:
+            dict: records、valid_records、score，各比率（0-1），以及 fields 中每个字段的
+                  completeness 和 out_of_range（超出范围的记录数）
+        """
+        total = self.total
+        duplicates = 0
+        if self._key_hashes:
+            hashes = np.concatenate(self._key_hashes)
+            duplicates = len(hashes) - len(np.unique(hashes))
+
+        def rate(count):
+            return round(count / total, 4) if total else 0.0
+
+        fields = {
+            field: {
+                'completeness': rate(present),
+                'out_of_range': self.out_of_range.get(field, 0)
+            }
+            for field, present in self.present.items()
+        }
+        for field, count in self.out_of_range.items():
+            fields.setdefault(field, {'completeness': None, 'out_of_range': count})
+
+        return {
+            'website': self.website,
+            'records': total,
+            'valid_records': self.valid,
+            'score': quality_score(self.valid, total),
+            'valid_rate': rate(self.valid),
+            'duplicate_rate': rate(duplicates),
+            'stale_rate': rate(self.stale),
+            'fields': fields
+        }
+
+
+def assess_quality(records, website, today=None):
+    """一次性评估一批记录（记录列表或 DataFrame），返回质量报告"""
+    return QualityReport(website, today=today).add(records).report()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+按主机的令牌桶限速器
+根据数据源配置的 rate_limit（每小时请求数）控制请求节奏，
+并在收到 429 / Retry-After 时自适应退避
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """令牌桶
+
+    以 rate（令牌/秒）匀速补充令牌，最多累积 capacity 个。
+    reserve() 采用预约方式：立即扣除一个令牌并返回需要等待的秒数，
+    多个线程同时预约时各自得到依次递增的等待时间。
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.blocked_until = 0.0
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self._updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        """预约一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.tokens -= 1
+            wait_time = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait_time, self.blocked_until - now)
+
+    def throttle(self, retry_after=None, min_rate_factor=0.1):
+        """服务端限流时降低速率，并按 Retry-After 暂停发放令牌"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.rate = max(self.base_rate * min_rate_factor, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self.blocked_until = max(self.blocked_until, now + pause)
+            return pause
+
+    def recover(self, step=0.1):
+        """请求成功后逐步恢复到配置速率（加性增长）"""
+        with self._lock:
+            if self.rate < self.base_rate:
+                self._refill(self._clock())
+                self.rate = min(self.base_rate, self.rate + self.base_rate * step)
+
+
+class HostRateLimiter:
+    """按主机分配令牌桶的限速器
+
+    configure() 登记的域名同时覆盖其子域名，例如 nongji360.com
+    的额度由 www.nongji360.com 与 o2o.nongji360.com 共享。
+    """
+
+    def __init__(self, default_rate_per_hour=3600, burst=5, max_retry_after=120, sleep=time.sleep,
+                 clock=time.monotonic):
+        self.default_rate_per_hour = default_rate_per_hour
+        self.burst = burst
+        self.max_retry_after = max_retry_after  # Retry-After 暂停上限（秒），None 表示不限
+        self._sleep = sleep
+        self._clock = clock
+        self._domain_rates = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, domain, requests_per_hour, burst=None):
+        """设置某个域名（含子域名）的每小时请求额度，burst 为空时使用默认令牌桶容量"""
+        domain = self._normalize_domain(domain)
+        with self._lock:
+            self._domain_rates[domain] = (requests_per_hour, burst or self.burst)
+            self._buckets.pop(domain, None)
+
+    def acquire(self, url):
+        """按预算等待，返回实际等待的秒数"""
+        wait_time = self._bucket_for(url).reserve()
+        if wait_time > 0:
+            self._sleep(wait_time)
+        return wait_time
+
+    def on_success(self, url):
+        """记录一次成功请求"""
+        self._bucket_for(url).recover()
+
+    def on_throttle(self, url, retry_after=None):
+        """记录一次 429 限流，返回后续请求的暂停时长（秒）；过大的 Retry-After 按 max_retry_after 截断"""
+        pause = parse_retry_after(retry_after)
+        if pause is not None and self.max_retry_after is not None:
+            pause = min(pause, self.max_retry_after)
+        return self._bucket_for(url).throttle(pause)
+
+    def get_status(self):
+        """获取各主机令牌桶状态"""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {
+            key: {
+                'rate_per_hour': round(bucket.rate * 3600, 1),
+                'configured_rate_per_hour': round(bucket.base_rate * 3600, 1),
+                'tokens': round(bucket.tokens, 2)
+            }
+            for key, bucket in buckets.items()
+        }
+
+    def _bucket_for(self, url):
+        host = self._normalize_domain(urlparse(url).netloc or url)
+        with self._lock:
+            key, rate_per_hour, burst = self._match_domain(host)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate_per_hour / 3600.0, burst, clock=self._clock)
+                self._buckets[key] = bucket
+            return bucket
+
+    def _match_domain(self, host):
+        for domain, (rate, burst) in self._domain_rates.items():
+            if host == domain or host.endswith('.' + domain):
+                return domain, rate, burst
+        return host, self.default_rate_per_hour, self.burst
+
+    @staticmethod
+    def _normalize_domain(domain):
+        domain = domain.lower().split(':')[0]
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        return domain
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 头（秒数或 HTTP 日期），无法解析时返回 None"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return max(0.0, float(value))
+
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+过期数据清理
+按主键分批删除超过保留期的记录：每批先按主键顺序查出一批过期行的ID，再在独立的短事务中删除，
+批与批之间可暂停，避免长时间锁表和大事务；可在删除前把整行写入 gzip 压缩的 JSON Lines 归档文件
+"""
+
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import MetaData, Table, select
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_RETENTION_CONFIG = {
+    # 表名 -> 保留天数，或 {'days': 保留天数, 'date_column': 日期列, 'archive': 是否归档}
+    'tables': {
+        'seed_prices': 30,
+        'weather_data': 30,
+    },
+    'batch_size': 1000,   # 每批删除的行数（每批一个事务）
+    'pause': 0.0,         # 每批之间的暂停（秒），给线上查询让出锁
+    'archive': False,     # 删除前归档（各表可单独设置）
+    'archive_dir': os.path.join(PROJECT_ROOT, 'backups', 'retention'),
+}
+
+
+def purge_table(engine, table_name, cutoff, date_column='date', batch_size=1000, pause=0.0,
+                archive_dir=None, should_stop=None):
+    """
+    分批删除一张表中日期早于 cutoff 的记录
+
+    按主键游标推进（WHERE id > 上一批最大ID AND 日期 < cutoff ORDER BY id LIMIT batch_size），
+    整个清理只顺序扫描一遍主键索引；删除时再次校验日期，期间被更新的行不会误删。
+
+    Args:
+        engine: SQLAlchemy Engine
+        table_name: 表名（需有单列主键）
+        cutoff: 截止日期（date），早于该日期的记录被删除
+        date_column: 日期列名
+        batch_size: 每批行数
+        pause: 每批之间的暂停（秒）
+        archive_dir: 归档目录；None 表示不归档
+        should_stop: 返回 True 时在当前批结束后停止（用于超时取消）
+
+    Returns:
+        dict: {'table', 'cutoff', 'deleted', 'batches', 'seconds', 'rows_per_second', 'archive', 'completed'}
+    """
+    table = Table(table_name, MetaData(), autoload_with=engine)
+    primary_key = list(table.primary_key.columns)[0]
+    date_col = table.c[date_column]
+
+    archive_path = None
+    archive_file = None
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+        archive_path = os.path.join(
+            archive_dir, f"{table_name}_before_{cutoff.isoformat()}_{datetime.now().strftime('%Y%m%d%H%M%S')}.jsonl.gz"
+        )
+
+    started = time.perf_counter()
+    deleted = batches = 0
+    last_id = None
+    completed = True
+    try:
+        while True:
+            if should_stop and should_stop():
+                completed = False
+                break
+
+            columns = list(table.columns) if archive_path else [primary_key]
+            query = select(*columns).where(date_col < cutoff).order_by(primary_key).limit(batch_size)
+            if last_id is not None:
+                query = query.where(primary_key > last_id)
+            with engine.connect() as connection:
+                rows = connection.execute(query).mappings().all()
+            if not rows:
+                break
+
+            ids = [row[primary_key.name] for row in rows]
+            last_id = ids[-1]
+            if archive_path:
+                if archive_file is None:
+                    archive_file = gzip.open(archive_path, 'wt', encoding='utf-8')
+                for row in rows:
+                    archive_file.write(json.dumps(dict(row), ensure_ascii=False, default=str) + '\n')
+                archive_file.flush()
+
+            with engine.begin() as connection:
+                result = connection.execute(
+                    table.delete().where(primary_key.in_(ids)).where(date_col < cutoff)
+                )
+            deleted += result.rowcount
+            batches += 1
+
+            if len(rows) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    finally:
+        if archive_file is not None:
+            archive_file.close()
+
+    seconds = time.perf_counter() - started
+    return {
+        'table': table_name,
+        'cutoff': cutoff.isoformat(),
+        'deleted': deleted,
+        'batches': batches,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(deleted / seconds) if seconds and deleted else 0,
+        'archive': archive_path if archive_file is not None else None,
+        'completed': completed
+    }
+
+
+def purge_expired(engine, config=None, today=None, should_stop=None, progress_callback=None):
+    """
+    按保留期清理各表的过期数据
+
+    Args:
+        engine: SQLAlchemy Engine
+        config: 清理配置，未给出的项取 DEFAULT_RETENTION_CONFIG
+        today: 计算截止日期的基准日期，默认今天
+        should_stop: 返回 True 时停止（当前批结束后）
+        progress_callback: 每张表清理完后以该表的统计调用
+
+    Returns:
+        dict: {'tables': {表名: 统计}, 'deleted', 'seconds', 'rows_per_second', 'completed'}
+    """
+    config = dict(DEFAULT_RETENTION_CONFIG, **(config or {}))
+    today = today or date.today()
+
+    started = time.perf_counter()
+    results = {}
+    for table_name, policy in config['tables'].items():
+        if not isinstance(policy, dict):
+            policy = {'days': policy}
+        if should_stop and should_stop():
+            break
+        archive = policy.get('archive', config['archive'])
+        results[table_name] = purge_table(
+            engine, table_name, today - timedelta(days=policy['days']),
+            date_column=policy.get('date_column', 'date'),
+            batch_size=config['batch_size'],
+            pause=config['pause'],
+            archive_dir=config['archive_dir'] if archive else None,
+            should_stop=should_stop
+        )
+        if progress_callback:
+            progress_callback(results[table_name])
+
+    seconds = time.perf_counter() - started
+    deleted = sum(result['deleted'] for result in results.values())
+    return {
+        'tables': results,
+        'deleted': deleted,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(deleted / seconds) if seconds and deleted else 0,
+        'completed': len(results) == len(config['tables']) and all(r['completed'] for r in results.values())
+    }
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+本地替身HTTP服务器
+为爬虫测试和基准测试脚本（scripts/benchmark_crawl.py）提供固定页面，支持 ETag / Last-Modified 条件请求，
+以及可配置的响应延迟、429 限流、服务端错误和 HTTP/1.1 长连接
+"""
+
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """在后台线程运行的本地HTTP服务器
+
+    pages: {路径: 页面内容(bytes 或 str)}
+    latency: 每个响应的延迟（秒），或 (最小值, 最大值) 区间
+    throttle_rate: 返回 429 的请求比例
+    failure_rate: 返回 500 的请求比例
+    retry_after: 429 响应的 Retry-After 头（秒），None 表示不发送
+    seed: 随机数种子，保证故障注入可重复
+    keep_alive: 使用 HTTP/1.1 长连接（默认 HTTP/1.0，每个请求一个连接）
+    """
+
+    def __init__(self, pages=None, latency=0, throttle_rate=0.0, failure_rate=0.0,
+                 retry_after=None, seed=0, keep_alive=False):
+        self.pages = {}
+        self.requests = []
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0    # 同时处理的最大请求数
+        self.connections = 0      # 接受的TCP连接数
+        self.keep_alive = keep_alive
+        self.last_modified = 'Mon, 01 Sep 2025 00:00:00 GMT'
+        for path, body in (pages or {}).items():
+            self.set_page(path, body)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def url(self, path):
+        return self.base_url + path
+
+    def set_page(self, path, body):
+        """设置（或更新）某个路径的页面内容"""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.pages[path] = body
+
+    def count(self, path, status=None):
+        """统计某路径收到的请求数，可按响应状态过滤"""
+        return sum(1 for p, s in self.requests if p == path and (status is None or s == status))
+
+    def _inject_fault(self):
+        """按配置决定本次请求的延迟和故障状态码（无故障时为 None）"""
+        with self._lock:
+            if isinstance(self.latency, (tuple, list)):
+                delay = self._random.uniform(*self.latency)
+            else:
+                delay = self.latency
+            roll = self._random.random()
+
+        if roll < self.throttle_rate:
+            status = 429
+        elif roll < self.throttle_rate + self.failure_rate:
+            status = 500
+        else:
+            status = None
+        return delay, status
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1' if stub.keep_alive else 'HTTP/1.0'
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    self._respond()
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _respond(self):
+                delay, fault = stub._inject_fault()
+                if delay:
+                    time.sleep(delay)
+                if fault:
+                    stub.requests.append((self.path, fault))
+                    self.send_response(fault)
+                    if fault == 429 and stub.retry_after is not None:
+                        self.send_header('Retry-After', str(stub.retry_after))
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                body = stub.pages.get(self.path)
+                if body is None:
+                    stub.requests.append((self.path, 404))
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    stub.requests.append((self.path, 304))
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                stub.requests.append((self.path, 200))
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', stub.last_modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
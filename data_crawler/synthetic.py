@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+合成数据生成
+在爬虫后备数据的基础上，按固定随机种子生成覆盖全部省份、品种、品牌和多年日期范围的
+种子价格、天气和农机数据（可达数百万行），并分块批量写入 SQLite / MySQL，
+用于在本地复现生产规模的数据表，压测接口、分析和图表
+"""
+
+import time
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+import numpy as np
+
+from data_crawler.bulk_writer import bulk_upsert
+from data_crawler.weather_cities import PROVINCE_CITY_CODES, region_label
+
+PROVINCES = tuple(PROVINCE_CITY_CODES)
+
+# 作物 -> 常见品种（前五种作物和玉米的前五个品种与后备数据一致）
+SEED_VARIETIES = {
+    '玉米种子': ('先玉335', '郑单958', '登海605', '中单909', '京科968', '裕丰303', '迪卡517', '农大372'),
+    '小麦种子': ('济麦22', '百农207', '郑麦379', '山农28', '周麦36', '烟农999'),
+    '水稻种子': ('黄华占', '隆两优华占', '晶两优534', '南粳9108', '宜香优2115', '龙粳31'),
+    '大豆种子': ('中黄13', '黑河43', '齐黄34', '合农95', '冀豆17'),
+    '花生种子': ('花育25', '鲁花11', '远杂9102', '豫花37', '冀花16'),
+    '棉花种子': ('中棉所41', '鲁棉研28', '新陆早57'),
+    '油菜种子': ('中油杂19', '华油杂62', '秦优10号'),
+}
+
+# 作物 -> 基准价格（元/斤）
+SEED_BASE_PRICES = {
+    '玉米种子': 14.0,
+    '小麦种子': 2.6,
+    '水稻种子': 32.0,
+    '大豆种子': 4.5,
+    '花生种子': 7.5,
+    '棉花种子': 18.0,
+    '油菜种子': 45.0,
+}
+
+# 天气现象（前五项与后备数据一致）
+WEATHER_TYPES = ('晴', '多云', '阴', '小雨', '中雨', '大雨', '雷阵雨', '小雪', '中雪', '雾')
+
+# 省份 -> (年平均气温, 冬夏温差的一半)，单位 ℃
+PROVINCE_CLIMATE = {
+    '北京': (12.5, 15.0), '天津': (12.8, 15.0), '上海': (16.6, 11.5), '重庆': (18.3, 10.0),
+    '河北': (13.0, 15.5), '山西': (10.5, 15.0), '辽宁': (8.5, 17.0), '吉林': (5.5, 19.0),
+    '黑龙江': (4.0, 21.0), '江苏': (15.5, 12.5), '浙江': (17.0, 11.5), '安徽': (16.0, 12.5),
+    '福建': (19.8, 9.0), '江西': (18.0, 11.0), '山东': (14.0, 14.0), '河南': (15.0, 13.5),
+    '湖北': (16.8, 12.5), '湖南': (17.5, 11.5), '广东': (22.0, 7.5), '海南': (25.0, 4.5),
+    '四川': (16.5, 9.5), '贵州': (15.5, 9.5), '云南': (15.5, 6.0), '陕西': (13.5, 13.5),
+    '甘肃': (9.5, 13.0), '青海': (6.0, 11.5), '台湾': (23.0, 6.0), '内蒙古': (7.0, 19.0),
+    '广西': (21.5, 8.0), '西藏': (8.0, 9.5), '宁夏': (9.5, 14.0), '新疆': (8.0, 19.0),
+    '香港': (23.5, 6.0), '澳门': (22.5, 6.5),
+}
+
+# 农机类型 -> (型号前缀, 功率范围（马力）, 每马力价格（元）)，前五项与后备数据一致
+MACHINE_CATALOG = {
+    '拖拉机': ('LX', (25, 260), 900),
+    '收割机': ('GE', (80, 220), 1400),
+    '播种机': ('2BYF', (15, 120), 450),
+    '施肥机': ('2F', (10, 90), 380),
+    '喷药机': ('3WP', (20, 150), 650),
+    '插秧机': ('2ZG', (10, 30), 2200),
+    '旋耕机': ('1GQN', (30, 150), 180),
+    '打捆机': ('9YG', (40, 200), 600),
+    '烘干机': ('5H', (15, 80), 3200),
+}
+
+# 品牌（前五项与后备数据一致）
+MACHINE_BRANDS = ('约翰迪尔', '雷沃重工', '中联重科', '东风农机', '久保田', '一拖东方红', '沃得农机',
+                  '常发农装', '五征', '凯斯纽荷兰', '洋马', '星光农机')
+
+# 支持生成的数据表
+TABLES = ('seed_prices', 'weather_data', 'farm_machines')
+
+# 合成农机行的规格说明以此结尾；农机表没有自然键，重复写入前只删除带此标记的行
+SYNTHETIC_MACHINE_TAG = '数据来源: 合成数据'
+
+
+class SyntheticDataGenerator:
+    """可复现的合成数据生成器
+
+    相同的 seed、结束日期和天数总是生成相同的数据；各表使用独立的随机序列，
+    只生成其中一张表不影响其他表的结果。生成结果为数据库行字典（date 为 datetime.date），
+    可直接交给 bulk_upsert 写入。
+    """
+
+    def __init__(self, seed=42, end=None, days=365):
+        """
+        Args:
+            seed: 随机种子
+            end: 最后一天（date 或 'YYYY-MM-DD'），默认今天
+            days: 日期范围天数（种子价格与天气数据按天生成）
+        """
+        if isinstance(end, str):
+            end = datetime.strptime(end, '%Y-%m-%d').date()
+        self.seed = seed
+        self.end = end or date.today()
+        self.days = days
+        self.dates = [self.end - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+        self._day_of_year = np.array([day.timetuple().tm_yday for day in self.dates], dtype=float)
+
+    def _rng(self, table):
+        return np.random.default_rng([self.seed, TABLES.index(table)])
+
+    def count(self, table):
+        """该表按完整日期范围生成的行数（农机数据没有日期维度，返回 None）"""
+        if table == 'seed_prices':
+            return self.days * len(PROVINCES) * sum(len(varieties) for varieties in SEED_VARIETIES.values())
+        if table == 'weather_data':
+            return self.days * sum(len(cities) for cities in PROVINCE_CITY_CODES.values())
+        return None
+
+    def seed_prices(self):
+        """
+        种子价格：每天 × 每省 × 每个品种一条
+
+        每个序列（省份、品种）在基准价上叠加品种/地区系数、春播前后的季节波动
+        和对数随机游走，价格保留两位小数
+        """
+        rng = self._rng('seed_prices')
+        series = [(province, crop, variety)
+                  for province in PROVINCES
+                  for crop, varieties in SEED_VARIETIES.items()
+                  for variety in varieties]
+        base = np.array([SEED_BASE_PRICES[crop] for _, crop, _ in series])
+        base *= rng.uniform(0.8, 1.3, len(series)) * rng.uniform(0.9, 1.1, len(series))
+        walk = np.cumsum(rng.normal(0, 0.006, (len(series), self.days)), axis=1)
+        season = 1 + 0.08 * np.cos(2 * np.pi * (self._day_of_year - 75) / 365.25)
+        prices = np.round(base[:, None] * np.exp(walk) * season[None, :], 2)
+
+        serial = 0
+        for day_index, day in enumerate(self.dates):
+            for (province, crop, variety), price in zip(series, prices[:, day_index].tolist()):
+                serial += 1
+                yield {
+                    'product_name': crop,
+                    'variety': variety,
+                    'price': max(price, 0.01),
+                    'unit': '元/斤',
+                    'region': province,
+                    'date': day,
+                    'source_url': f'https://www.114seeds.com/seed/{serial}'
+                }
+
+    def weather(self):
+        """
+        天气：每天 × 每个城市一条（地区名与天气网采集结果一致，如"河北石家庄"）
+
+        气温按省份年均温和季节振幅计算并加入随机扰动，天气现象由湿度和气温决定
+        """
+        rng = self._rng('weather_data')
+        cities = [(province, region_label(province, city))
+                  for province, city_codes in PROVINCE_CITY_CODES.items()
+                  for city, _ in city_codes]
+        shape = (len(cities), self.days)
+        mean = np.array([PROVINCE_CLIMATE[province][0] for province, _ in cities])[:, None]
+        amplitude = np.array([PROVINCE_CLIMATE[province][1] for province, _ in cities])[:, None]
+        season = np.cos(2 * np.pi * (self._day_of_year - 15) / 365.25)[None, :]
+        temperature = np.round(mean - amplitude * season + rng.normal(0, 2.5, shape), 1)
+        humidity = np.round(np.clip(rng.normal(65, 15, shape), 15, 100))
+        wind_speed = np.round(np.clip(rng.gamma(2.0, 1.5, shape), 0, 20), 1)
+        weather_index = np.select(
+            [humidity >= 97, humidity >= 92, humidity >= 85, humidity >= 75, humidity >= 55],
+            [5, 4, 3, 2, 1], default=0
+        )
+        rain = (weather_index >= 3) & (weather_index <= 5)
+        weather_index = np.where(rain & (temperature > 28), 6, weather_index)
+        weather_index = np.where(rain & (temperature < 0), np.minimum(weather_index, 4) + 4, weather_index)
+        weather_index = np.where((humidity >= 85) & (wind_speed < 1.0), 9, weather_index)
+
+        for day_index, day in enumerate(self.dates):
+            columns = zip(temperature[:, day_index].tolist(), weather_index[:, day_index].tolist(),
+                          humidity[:, day_index].tolist(), wind_speed[:, day_index].tolist())
+            for (_, region), (temp, index, humid, wind) in zip(cities, columns):
+                yield {
+                    'region': region,
+                    'date': day,
+                    'temperature': temp,
+                    'weather': WEATHER_TYPES[index],
+                    'humidity': humid,
+                    'wind_speed': wind
+                }
+
+    def farm_machines(self, count=10000):
+        """
+        农机：按类型、品牌、功率随机组合生成 count 条
+
+        价格 = 功率 × 每马力价格 × 品牌系数 × 随机扰动，取整到百元
+        """
+        rng = self._rng('farm_machines')
+        machines = list(MACHINE_CATALOG.items())
+        brand_factor = rng.uniform(0.75, 1.6, len(MACHINE_BRANDS))
+        machine_index = rng.integers(0, len(machines), count)
+        brand_index = rng.integers(0, len(MACHINE_BRANDS), count)
+        province_index = rng.integers(0, len(PROVINCES), count)
+        position = rng.random(count)
+        noise = rng.uniform(0.9, 1.1, count)
+
+        for i in range(count):
+            product_name, (prefix, (low, high), per_hp) = machines[machine_index[i]]
+            brand = int(brand_index[i])
+            power = int(low + (high - low) * position[i])
+            width = round(1.5 + power / 40, 1)
+            yield {
+                'product_name': product_name,
+                'brand': MACHINE_BRANDS[brand],
+                'model': f'{prefix}{power}-{brand + 1:02d}',
+                'price': float(round(power * per_hp * brand_factor[brand] * noise[i], -2)),
+                'specifications': f'功率: {power}马力, 工作幅宽: {width}米, {SYNTHETIC_MACHINE_TAG}',
+                'region': PROVINCES[province_index[i]]
+            }
+
+    def rows(self, table, limit=None, machine_count=10000):
+        """按表名生成行；limit 限制行数"""
+        if table == 'seed_prices':
+            rows = self.seed_prices()
+        elif table == 'weather_data':
+            rows = self.weather()
+        elif table == 'farm_machines':
+            rows = self.farm_machines(limit or machine_count)
+        else:
+            raise ValueError(f'不支持的数据表: {table}')
+        return islice(rows, limit) if limit else rows
+
+
+def load_synthetic_data(engine, generator, tables=TABLES, limit=None, machine_count=10000,
+                        chunk_size=5000, progress_callback=None):
+    """
+    把合成数据分块批量写入数据库，重复执行不会产生重复行：
+    有自然键的表（种子价格、天气）按自然键 upsert；农机表没有自然键，写入前只删除
+    上次生成的合成行（规格说明带 SYNTHETIC_MACHINE_TAG），采集到的真实农机数据保留
+
+    Args:
+        engine: SQLAlchemy Engine（表需已创建）
+        generator: SyntheticDataGenerator
+        tables: 要写入的表名
+        limit: 每张表最多写入的行数
+        machine_count: 农机数据行数（未指定 limit 时）
+        chunk_size: 每块（每个事务）的行数
+        progress_callback: 每张表写完后以 (表名, 统计) 调用
+
+    Returns:
+        dict: 表名 -> {'rows', 'seconds', 'rows_per_second'}
+    """
+    from auth.models import SeedPrice, WeatherData, FarmMachine
+
+    models = {'seed_prices': SeedPrice, 'weather_data': WeatherData, 'farm_machines': FarmMachine}
+    results = {}
+    for table in tables:
+        started = time.perf_counter()
+        if table == 'farm_machines':
+            machines = FarmMachine.__table__
+            with engine.begin() as connection:
+                connection.execute(machines.delete().where(
+                    machines.c.specifications.endswith(SYNTHETIC_MACHINE_TAG, autoescape=True)
+                ))
+        rows = bulk_upsert(engine, models[table].__table__,
+                           generator.rows(table, limit=limit, machine_count=machine_count),
+                           chunk_size=chunk_size)
+        seconds = time.perf_counter() - started
+        results[table] = {
+            'rows': rows,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(rows / seconds) if seconds else None
+        }
+        if progress_callback:
+            progress_callback(table, results[table])
+    return results
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+爬虫网络传输层
+进程内所有 CrawlerManager 共享同一个连接池（requests 或可选的 httpx / HTTP2），
+可配置连接池大小、长连接，以及爬虫连接专用的带过期时间的 DNS 缓存，使连接在多次采集任务之间复用；
+每个响应附带分阶段耗时 response.timings（DNS / 建连 / 首字节 / 下载，毫秒）
+"""
+
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.ssl_ import is_ipaddress
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    import httpx
+except ImportError:  # httpx 为可选依赖
+    httpx = None
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+DEFAULT_TRANSPORT_CONFIG = {
+    'backend': 'requests',      # requests / httpx
+    'http2': False,             # 仅 httpx 后端，需要安装 httpx[http2]
+    'pool_connections': 10,     # 缓存连接池的主机数
+    'pool_maxsize': 20,         # 每个主机保留的连接数
+    'keep_alive': True,         # 是否复用连接
+    'keepalive_expiry': 60,     # 空闲连接保留时间（秒，httpx 后端）
+    'dns_cache_ttl': 300,       # DNS 缓存时间（秒），0 表示不缓存（仅 requests 后端）
+    'dns_cache_size': 256,      # DNS 缓存的最大条目数
+}
+
+# 当前线程正在进行的请求的分阶段耗时（秒）
+_timing = threading.local()
+
+
+def _add_timing(stage, seconds):
+    stages = getattr(_timing, 'stages', None)
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+class _CrawlerConnectionMixin:
+    """爬虫连接：记录建连耗时，并通过所属传输层的 DNS 缓存解析主机名
+
+    DNS 缓存只作用于爬虫自己的连接，进程内其他库（数据库、邮件等）的域名解析不受影响。
+    """
+
+    dns_cache = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _add_timing('connect', time.perf_counter() - started)
+
+    def _new_conn(self):
+        host = self._dns_host
+        if self.dns_cache is None or is_ipaddress(host):
+            return super()._new_conn()
+
+        try:
+            addresses = self.dns_cache.resolve(host, self.port)
+        except OSError:
+            addresses = None
+        if not addresses:
+            # 交给 urllib3 按原流程解析并转换异常
+            return super()._new_conn()
+
+        # 依次尝试解析出的地址，TLS 的 SNI 和证书校验仍使用原主机名
+        error = None
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    error = e
+            raise error
+        finally:
+            self._dns_host = host
+
+
+class _TimedHTTPConnection(_CrawlerConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_CrawlerConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """爬虫使用的 HTTPAdapter：新建连接时记录建连耗时，可选使用 DNS 缓存"""
+
+    def __init__(self, dns_cache=None, **kwargs):
+        # HTTPAdapter.__init__ 中会调用 init_poolmanager
+        http_conn = type('_TimedHTTPConnection', (_TimedHTTPConnection,), {'dns_cache': dns_cache})
+        https_conn = type('_TimedHTTPSConnection', (_TimedHTTPSConnection,), {'dns_cache': dns_cache})
+        self._pool_classes = {
+            'http': type('_TimedHTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': http_conn}),
+            'https': type('_TimedHTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': https_conn})
+        }
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = dict(self._pool_classes)
+
+
+class DnsCache:
+    """带过期时间、有容量上限的主机名解析缓存
+
+    只由爬虫传输层的连接使用（见 _CrawlerConnectionMixin），不替换 socket.getaddrinfo；
+    超过 max_entries 时先清除过期条目，再淘汰最久未使用的条目。
+    """
+
+    def __init__(self, ttl=300, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0}
+        self._entries = OrderedDict()  # (host, port) -> (过期时间, 地址列表)
+        self._lock = threading.Lock()
+
+    def resolve(self, host, port):
+        """
+        解析主机名
+
+        Returns:
+            list: 可直接连接的 IP 地址（按 getaddrinfo 返回顺序去重）
+        """
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+
+        started = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM)
+        finally:
+            _add_timing('dns', time.perf_counter() - started)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+
+        with self._lock:
+            self.stats['misses'] += 1
+            if self.ttl > 0:
+                self._entries[key] = (now + self.ttl, addresses)
+                self._entries.move_to_end(key)
+                if len(self._entries) > self.max_entries:
+                    self._prune_locked(now)
+        return addresses
+
+    def _prune_locked(self, now):
+        for key in [key for key, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), ttl=self.ttl, max_entries=self.max_entries)
+
+
+class RequestsTransport:
+    """基于 requests.Session 的传输层（HTTP/1.1 连接池）"""
+
+    name = 'requests'
+
+    def __init__(self, pool_connections=10, pool_maxsize=20, keep_alive=True, headers=None, dns_cache=None):
+        self.keep_alive = keep_alive
+        self.dns_cache = dns_cache
+        self.stats = {'requests': 0}
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        self.session.headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+
+        # 重试由 CrawlerManager 负责，这里不再叠加 urllib3 的重试
+        adapter = _TimedHTTPAdapter(dns_cache=dns_cache, pool_connections=pool_connections,
+                                    pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._adapter = adapter
+        self._pool_settings = {'pool_connections': pool_connections, 'pool_maxsize': pool_maxsize}
+
+    def get(self, url, headers=None, timeout=None, allow_redirects=True):
+        with self._lock:
+            self.stats['requests'] += 1
+        _timing.stages = stages = {}
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=timeout, allow_redirects=allow_redirects)
+        finally:
+            _timing.stages = None
+        total = time.perf_counter() - started
+
+        # elapsed 为发出请求到解析完响应头的时间（含新建连接），其后为读取响应体
+        dns, connect = stages.get('dns', 0.0), stages.get('connect', 0.0)
+        elapsed = response.elapsed.total_seconds()
+        response.timings = {
+            'dns_ms': round(dns * 1000, 3) if 'dns' in stages else None,
+            'connect_ms': round(max(connect - dns, 0.0) * 1000, 3) if 'connect' in stages else None,
+            'ttfb_ms': round(max(elapsed - connect, 0.0) * 1000, 3),
+            'download_ms': round(max(total - elapsed, 0.0) * 1000, 3),
+            'total_ms': round(total * 1000, 3)
+        }
+        return response
+
+    def close(self):
+        self.session.close()
+
+    def get_status(self):
+        return dict(self._pool_settings, backend=self.name, http2=False, keep_alive=self.keep_alive,
+                    requests=self.stats['requests'], host_pools=len(self._adapter.poolmanager.pools),
+                    dns_cache=self.dns_cache.get_stats() if self.dns_cache else None)
+
+
+class HttpxTransport:
+    """基于 httpx.Client 的传输层，可启用 HTTP/2 多路复用
+
+    httpx 的异常会转换为 requests 的对应异常，调用方的重试逻辑无需区分后端。
+    """
+
+    name = 'httpx'
+
+    def __init__(self, http2=False, pool_maxsize=20, keep_alive=True, keepalive_expiry=60, headers=None):
+        self.http2 = http2
+        self.keep_alive = keep_alive
+        self.stats = {'requests': 0}
+        self._lock = threading.Lock()
+        limits = httpx.Limits(
+            max_connections=None,
+            max_keepalive_connections=pool_maxsize if keep_alive else 0,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.client = httpx.Client(http2=http2, limits=limits, headers=headers or DEFAULT_HEADERS)
+        self._pool_settings = {'pool_maxsize': pool_maxsize, 'keepalive_expiry': keepalive_expiry}
+
+    def get(self, url, headers=None, timeout=None, allow_redirects=True):
+        with self._lock:
+            self.stats['requests'] += 1
+        _timing.stages = stages = {}
+        started = time.perf_counter()
+        try:
+            response = self.client.get(url, headers=headers, timeout=timeout, follow_redirects=allow_redirects)
+            # httpx 不区分建连与首字节，只记录 DNS 和总耗时
+            response.timings = {
+                'dns_ms': round(stages['dns'] * 1000, 3) if 'dns' in stages else None,
+                'connect_ms': None,
+                'ttfb_ms': None,
+                'download_ms': None,
+                'total_ms': round((time.perf_counter() - started) * 1000, 3)
+            }
+            return response
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        finally:
+            _timing.stages = None
+
+    def close(self):
+        self.client.close()
+
+    def get_status(self):
+        return dict(self._pool_settings, backend=self.name, http2=self.http2, keep_alive=self.keep_alive,
+                    requests=self.stats['requests'])
+
+
+def create_transport(config=None):
+    """
+    按配置创建传输层；要求 httpx（或 HTTP/2）但未安装时回退到 requests
+
+    Args:
+        config: 覆盖 DEFAULT_TRANSPORT_CONFIG 的配置项
+    """
+    settings = dict(DEFAULT_TRANSPORT_CONFIG, **(config or {}))
+    if settings['backend'] == 'httpx' or settings['http2']:
+        if httpx is None:
+            print("未安装 httpx，爬虫传输层使用 requests")
+        else:
+            try:
+                return HttpxTransport(
+                    http2=settings['http2'],
+                    pool_maxsize=settings['pool_maxsize'],
+                    keep_alive=settings['keep_alive'],
+                    keepalive_expiry=settings['keepalive_expiry']
+                )
+            except ImportError:  # 启用 HTTP/2 需要 h2 包
+                print("未安装 h2，爬虫传输层使用 requests")
+
+    return RequestsTransport(
+        pool_connections=settings['pool_connections'],
+        pool_maxsize=settings['pool_maxsize'],
+        keep_alive=settings['keep_alive'],
+        dns_cache=DnsCache(settings['dns_cache_ttl'], settings['dns_cache_size'])
+        if settings['dns_cache_ttl'] else None
+    )
+
+
+_shared_transport = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_transport():
+    """获取进程内共享的传输层（首次调用时按 CRAWLER_TRANSPORT 配置创建）"""
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            from config.app_config import get_config
+            _shared_transport = create_transport(getattr(get_config(), 'CRAWLER_TRANSPORT', {}))
+        return _shared_transport
+
+
+def close_shared_transport():
+    """关闭共享传输层，下次获取时重新创建"""
+    global _shared_transport
+    with _shared_lock:
+        transport, _shared_transport = _shared_transport, None
+    if transport is not None:
+        transport.close()
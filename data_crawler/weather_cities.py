@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+天气网城市代码表
+34 个省级行政区及其主要城市在中国天气网的城市代码（每省第一个为省会/首府）
+"""
+
+# 省份 -> ((城市, 城市代码), ...)
+PROVINCE_CITY_CODES = {
+    '北京': (('北京', '101010100'),),
+    '天津': (('天津', '101030100'),),
+    '上海': (('上海', '101020100'),),
+    '重庆': (('重庆', '101040100'),),
+    '河北': (('石家庄', '101090101'), ('保定', '101090201'), ('唐山', '101090501'), ('邯郸', '101091001')),
+    '山西': (('太原', '101100101'), ('大同', '101100201'), ('运城', '101100801')),
+    '辽宁': (('沈阳', '101070101'), ('大连', '101070201'), ('锦州', '101070701')),
+    '吉林': (('长春', '101060101'), ('吉林', '101060201'), ('四平', '101060401')),
+    '黑龙江': (('哈尔滨', '101050101'), ('齐齐哈尔', '101050201'), ('佳木斯', '101050401')),
+    '江苏': (('南京', '101190101'), ('苏州', '101190401'), ('徐州', '101190801'), ('盐城', '101190701')),
+    '浙江': (('杭州', '101210101'), ('宁波', '101210401'), ('温州', '101210701')),
+    '安徽': (('合肥', '101220101'), ('阜阳', '101220801'), ('宿州', '101220701')),
+    '福建': (('福州', '101230101'), ('厦门', '101230201'), ('泉州', '101230501')),
+    '江西': (('南昌', '101240101'), ('赣州', '101240701'), ('九江', '101240201')),
+    '山东': (('济南', '101120101'), ('青岛', '101120201'), ('潍坊', '101120601'), ('临沂', '101120901')),
+    '河南': (('郑州', '101180101'), ('洛阳', '101180901'), ('南阳', '101180701'), ('周口', '101181401')),
+    '湖北': (('武汉', '101200101'), ('襄阳', '101200201'), ('荆州', '101200801')),
+    '湖南': (('长沙', '101250101'), ('衡阳', '101250401'), ('常德', '101250601')),
+    '广东': (('广州', '101280101'), ('深圳', '101280601'), ('湛江', '101281001')),
+    '海南': (('海口', '101310101'), ('三亚', '101310201')),
+    '四川': (('成都', '101270101'), ('绵阳', '101270401'), ('南充', '101270501')),
+    '贵州': (('贵阳', '101260101'), ('遵义', '101260201')),
+    '云南': (('昆明', '101290101'), ('大理', '101290201'), ('曲靖', '101290401')),
+    '陕西': (('西安', '101110101'), ('咸阳', '101110200'), ('宝鸡', '101110901')),
+    '甘肃': (('兰州', '101160101'), ('天水', '101160901'), ('张掖', '101160701')),
+    '青海': (('西宁', '101150101'),),
+    '台湾': (('台北', '101340101'),),
+    '内蒙古': (('呼和浩特', '101080101'), ('包头', '101080201'), ('赤峰', '101080601')),
+    '广西': (('南宁', '101300101'), ('桂林', '101300501'), ('柳州', '101300301')),
+    '西藏': (('拉萨', '101140101'),),
+    '宁夏': (('银川', '101170101'),),
+    '新疆': (('乌鲁木齐', '101130101'), ('喀什', '101130901'), ('伊犁', '101131001')),
+    '香港': (('香港', '101320101'),),
+    '澳门': (('澳门', '101330101'),),
+}
+
+# 城市 -> (省份, 城市代码)
+CITY_INDEX = {
+    city: (province, code)
+    for province, cities in PROVINCE_CITY_CODES.items()
+    for city, code in cities
+}
+
+
+def region_label(province, city):
+    """天气记录中的地区名：直辖市等省市同名时只写一次，否则为"省份城市"（如"河北石家庄"）"""
+    return city if city == province else f'{province}{city}'
+
+
+def weather_targets(region='全国'):
+    """
+    根据采集地区确定要抓取的城市
+
+    Args:
+        region: '全国'（每省省会）、省份名（该省全部城市）或城市名；
+                无法识别时按全国处理
+
+    Returns:
+        list: (地区名, 城市代码) 列表
+    """
+    if region in PROVINCE_CITY_CODES:
+        return [(region_label(region, city), code) for city, code in PROVINCE_CITY_CODES[region]]
+    if region in CITY_INDEX:
+        province, code = CITY_INDEX[region]
+        return [(region_label(province, region), code)]
+    return [(region_label(province, cities[0][0]), cities[0][1]) for province, cities in PROVINCE_CITY_CODES.items()]
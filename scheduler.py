@@ -5,35 +5,100 @@ AgriDec 定时任务调度器
 """
 
 import schedule
+import socket
 import time
 import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
 import os
 from data_crawler.crawler_manager import CrawlerManager
+from scheduler_store import (CANCELLED, FAILED, MISFIRE_RUN_ONCE, MISFIRE_SKIP, SKIPPED, SUCCEEDED,
+                             SchedulerStore)
 
-# 确保日志目录存在
-os.makedirs('logs', exist_ok=True)
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/scheduler.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# 调度线程两次检查之间的最长等待时间（秒）
+MAX_IDLE_SECONDS = 300
+
+# 检查其他进程转交的手动执行请求的间隔（秒）
+REQUEST_POLL_SECONDS = 2
+
+# 任务表与运行历史的默认位置
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'scheduler.db')
+
+
+def configure_logging(log_dir='logs'):
+    """调度日志写入 logs/scheduler.log 并输出到控制台（启动调度器时调用，导入模块不产生日志文件）"""
+    os.makedirs(log_dir, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join(log_dir, 'scheduler.log'), encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def _timestamp_text(value):
+    return datetime.fromtimestamp(value).isoformat() if value else None
+
+
+def _describe_trigger(trigger):
+    """schedule 时间规则的文字描述，如 every day at 06:00"""
+    if trigger.start_day:
+        unit = trigger.start_day
+    elif trigger.interval == 1:
+        unit = trigger.unit[:-1]
+    else:
+        unit = f'{trigger.interval} {trigger.unit}'
+    at_time = f" at {trigger.at_time.strftime('%H:%M')}" if trigger.at_time else ''
+    return f'every {unit}{at_time}'
+
+
+class JobCancelled(Exception):
+    """任务超时后被取消"""
+
+
 class TaskScheduler:
-    """定时任务调度器"""
-    
-    def __init__(self):
-        self.crawler_manager = CrawlerManager()
+    """定时任务调度器
+
+    调度线程只负责按时间表分派任务，任务在有界线程池中执行：
+    互不相关的任务可以同时运行；同一任务的并发运行数不超过 max_instances
+    （默认 1，上次运行未结束时跳过本次）；超过 timeout 的运行会被请求取消，
+    采集任务在下一页抓取完成时中止。
+
+    任务配置、下次运行时间和运行历史持久化在 SchedulerStore 中：启动时对停机期间
+    错过的运行按各任务的补跑策略处理，get_status 也从任务表读取。
+
+    多个进程（如多 worker 的 WSGI 部署）共用同一个任务表时，只有持有租约的主调度进程
+    配置时间表并执行任务，其他进程保持空闲、定期尝试接管；主调度进程退出或租约
+    过期（lease_ttl 秒未续期）后由其他进程接管。非主调度进程收到的手动执行请求
+    写入任务表，由主调度进程执行。
+    """
+
+    def __init__(self, crawler_manager=None, max_workers=4, store_path=None, lease_ttl=30):
+        self.crawler_manager = crawler_manager or CrawlerManager()
+        self.max_workers = max_workers
+        self.store = SchedulerStore(store_path or DEFAULT_STORE_PATH)
+        self.lease_ttl = lease_ttl
+        self.instance_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.is_leader = False
+        self._lease_renew_at = 0.0
         self.is_running = False
         self.scheduler_thread = None
-        
+        self.executor = None
+        self.jobs = {}  # 任务ID -> 任务配置与运行状态
+        self._schedule = schedule.Scheduler()
+        self._triggers = {}  # 任务ID -> schedule.Job
+        self._saved_next_runs = {}  # 已写入任务表的下次运行时间，未变化时不重复写
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()  # 保护时间表；停止或新增任务时唤醒调度线程
+        self._wakeup_pending = False
+        self._run_state = threading.local()  # 当前线程正在执行的运行
+
     def start(self):
         """启动调度器"""
         if self.is_running:
@@ -42,9 +107,14 @@ class TaskScheduler:
             
         logger.info("启动定时任务调度器...")
         self.is_running = True
-        
-        # 配置定时任务
-        self._setup_schedules()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scheduler-job')
+
+        # 成为主调度进程时配置定时任务，并处理停机期间错过的运行
+        with self._wakeup:
+            if self._refresh_leadership():
+                self._save_next_runs()
+            else:
+                logger.info("已有其他进程在执行定时任务，本进程等待接管")
         
         # 在单独线程中运行调度器
         self.scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
@@ -56,121 +126,333 @@ class TaskScheduler:
         """停止调度器"""
         logger.info("停止定时任务调度器...")
         self.is_running = False
+        self._wake()
         if self.scheduler_thread:
             self.scheduler_thread.join(timeout=5)
-        schedule.clear()
+            self.scheduler_thread = None
+        if self.is_leader:
+            # 主动释放租约，其他进程无需等待过期即可接管
+            self.store.release_leadership(self.instance_id)
+            self.is_leader = False
+        if self.executor:
+            # 请求正在运行的任务取消，不等待其结束
+            with self._lock:
+                for job in self.jobs.values():
+                    for run in job['active_runs']:
+                        run['cancelled'].set()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        with self._wakeup:
+            self._schedule.clear()
+            self._triggers.clear()
+            self._saved_next_runs.clear()
+        self.jobs.clear()
         logger.info("定时任务调度器已停止")
-    
+
+    def add_job(self, job_id, name, task_func, trigger=None, max_instances=1, timeout=None,
+                misfire_policy=MISFIRE_SKIP, misfire_grace=None):
+        """
+        注册任务
+
+        Args:
+            job_id: 任务ID
+            name: 任务名称（用于日志）
+            task_func: 无参数的任务函数，返回整数时记为本次采集的记录数
+            trigger: schedule 的时间规则（如 self._schedule.every().day.at("06:00")）；
+                     None 表示只能通过 run_job 手动触发
+            max_instances: 同一任务同时运行的上限
+            timeout: 单次运行的超时时间（秒），None 表示不限
+            misfire_policy: 停机期间错过运行时的处理策略（MISFIRE_SKIP / MISFIRE_RUN_ONCE）
+            misfire_grace: 只补跑错过时间不超过该值（秒）的运行，None 表示不限
+        """
+        with self._lock:
+            previous = self.jobs.get(job_id)
+            self.jobs[job_id] = {
+                'id': job_id,
+                'name': name,
+                'func': task_func,
+                'max_instances': max_instances,
+                'timeout': timeout,
+                'misfire_policy': misfire_policy,
+                'misfire_grace': misfire_grace,
+                # 重新成为主调度进程时保留仍在执行的运行，保证同一任务不重叠
+                'active_runs': previous['active_runs'] if previous else [],
+                'skipped': previous['skipped'] if previous else 0,
+                'timeouts': previous['timeouts'] if previous else 0
+            }
+        self.store.save_job(job_id, name, schedule=_describe_trigger(trigger) if trigger else None,
+                            misfire_policy=misfire_policy, misfire_grace=misfire_grace,
+                            max_instances=max_instances, timeout=timeout)
+        if trigger is not None:
+            with self._wakeup:
+                self._triggers[job_id] = trigger.do(self.run_job, job_id, 'schedule').tag(job_id)
+            # 新任务可能早于调度线程当前等待的时间到期
+            self._wake()
+
+    def run_job(self, job_id, trigger='manual'):
+        """
+        把任务分派到线程池执行
+
+        Args:
+            job_id: 任务ID
+            trigger: 触发方式（schedule / catch_up / manual），记入运行历史
+
+        Returns:
+            bool: 是否已分派（调度器未运行、任务不存在或已达并发上限时为 False）；
+                  非主调度进程的手动执行请求转交主调度进程，返回 True
+        """
+        if not self.is_leader:
+            if trigger != 'manual' or not self.is_running:
+                return False
+            self.store.request_run(job_id)
+            logger.info(f"任务 {job_id} 的执行请求已转交主调度进程")
+            return True
+
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or self.executor is None:
+                return False
+            if len(job['active_runs']) >= job['max_instances']:
+                job['skipped'] += 1
+                self.store.start_run(job_id, trigger, status=SKIPPED, error='上次运行尚未结束')
+                logger.warning(f"任务 {job['name']} 仍有 {len(job['active_runs'])} 个运行未结束，跳过本次执行")
+                return False
+            run = {
+                'run_id': self.store.start_run(job_id, trigger),
+                'cancelled': threading.Event(),
+                'timed_out': False,
+                'started_at': datetime.now()
+            }
+            job['active_runs'].append(run)
+            self.executor.submit(self._execute, job, run)
+        return True
+
+    def is_cancelled(self):
+        """当前线程正在执行的运行是否已被取消（超时或调度器停止）"""
+        run = getattr(self._run_state, 'run', None)
+        return run is not None and run['cancelled'].is_set()
+
     def _setup_schedules(self):
         """配置定时任务"""
-        
-        # 每天早上6点采集种子价格数据
-        schedule.every().day.at("06:00").do(
-            self._safe_execute, 
-            self._collect_seed_data,
-            "种子价格数据采集"
-        )
-        
+        every = self._schedule.every
+
+        # 每天早上6点采集种子价格数据（错过后12小时内补跑一次）
+        self.add_job('seed_crawl', "种子价格数据采集", self._collect_seed_data,
+                     every().day.at("06:00"), timeout=1800,
+                     misfire_policy=MISFIRE_RUN_ONCE, misfire_grace=12 * 3600)
+
         # 每天早上7点采集天气数据
-        schedule.every().day.at("07:00").do(
-            self._safe_execute,
-            self._collect_weather_data,
-            "天气数据采集"
-        )
-        
+        self.add_job('weather_crawl', "天气数据采集", self._collect_weather_data,
+                     every().day.at("07:00"), timeout=900,
+                     misfire_policy=MISFIRE_RUN_ONCE, misfire_grace=12 * 3600)
+
         # 每天早上8点采集农机数据
-        schedule.every().day.at("08:00").do(
-            self._safe_execute,
-            self._collect_machine_data,
-            "农机数据采集"
-        )
-        
-        # 每小时执行一次系统健康检查
-        schedule.every().hour.do(
-            self._safe_execute,
-            self._system_health_check,
-            "系统健康检查"
-        )
-        
-        # 每周日凌晨2点执行数据库清理
-        schedule.every().sunday.at("02:00").do(
-            self._safe_execute,
-            self._database_cleanup,
-            "数据库清理"
-        )
-        
+        self.add_job('machine_crawl', "农机数据采集", self._collect_machine_data,
+                     every().day.at("08:00"), timeout=1800,
+                     misfire_policy=MISFIRE_RUN_ONCE, misfire_grace=12 * 3600)
+
+        # 每小时执行一次系统健康检查（错过不补跑）
+        self.add_job('health_check', "系统健康检查", self._system_health_check,
+                     every().hour, timeout=120)
+
+        # 每周日凌晨2点执行数据库清理（错过后3天内补跑一次）
+        self.add_job('database_cleanup', "数据库清理", self._database_cleanup,
+                     every().sunday.at("02:00"), timeout=3600,
+                     misfire_policy=MISFIRE_RUN_ONCE, misfire_grace=3 * 86400)
+
         # 每月1号生成月度报告
-        schedule.every().day.at("01:00").do(
-            self._safe_execute,
-            self._check_monthly_report,
-            "月度报告检查"
-        )
-        
+        self.add_job('monthly_report', "月度报告检查", self._check_monthly_report,
+                     every().day.at("01:00"), timeout=600)
+
         logger.info("定时任务配置完成")
+
+    def _catch_up_missed(self):
+        """
+        按补跑策略处理停机期间错过的运行
+
+        上次进程保存的下次运行时间早于现在即为错过；多次错过只补跑一次，
+        错过时间超过 misfire_grace 的不再补跑。
+        """
+        now = time.time()
+        for job_id in list(self._triggers):
+            job = self.jobs[job_id]
+            saved = self.store.get_job(job_id)
+            missed_at = saved and saved['next_run_at']
+            if not missed_at or missed_at > now:
+                continue
+            missed = datetime.fromtimestamp(missed_at).strftime('%Y-%m-%d %H:%M')
+            late = now - missed_at
+            if job['misfire_policy'] != MISFIRE_RUN_ONCE:
+                logger.info(f"任务 {job['name']} 错过了 {missed} 的运行，按策略不补跑")
+            elif job['misfire_grace'] is not None and late > job['misfire_grace']:
+                logger.info(f"任务 {job['name']} 错过了 {missed} 的运行，已超过补跑期限，不再补跑")
+            else:
+                logger.info(f"任务 {job['name']} 错过了 {missed} 的运行，立即补跑")
+                self.run_job(job_id, 'catch_up')
+
+    def _save_next_runs(self):
+        """保存各任务的下次运行时间，供重启后判断错过的运行"""
+        next_runs = {job_id: trigger.next_run.timestamp()
+                     for job_id, trigger in self._triggers.items() if trigger.next_run}
+        # 空闲轮询时时间表不变，只在下次运行时间变化时写库
+        changed = {job_id: next_run for job_id, next_run in next_runs.items()
+                   if self._saved_next_runs.get(job_id) != next_run}
+        if changed:
+            self.store.set_next_runs(changed)
+            self._saved_next_runs.update(changed)
     
     def _run_scheduler(self):
-        """运行调度器主循环"""
+        """
+        运行调度器主循环（只分派任务，不等待任务执行）
+
+        每轮分派到期的任务后，在条件变量上等待到下一个任务的到期时间；
+        停止调度器或新增任务时立即被唤醒。等待时间不超过 MAX_IDLE_SECONDS，
+        以免系统时间被调整后长时间不检查。
+        """
         while self.is_running:
-            try:
-                schedule.run_pending()
-                time.sleep(60)  # 每分钟检查一次
-            except Exception as e:
-                logger.error(f"调度器运行异常: {str(e)}")
-                time.sleep(60)
+            with self._wakeup:
+                try:
+                    leader = self._refresh_leadership()
+                except Exception as e:
+                    leader = False
+                    logger.error(f"主调度进程租约续期失败: {str(e)}")
+
+                if leader:
+                    # 转交请求出错不影响定时任务的分派
+                    try:
+                        for job_id in self.store.take_requests():
+                            self.run_job(job_id, 'manual')
+                    except Exception as e:
+                        logger.error(f"读取转交的执行请求失败: {str(e)}")
+                    try:
+                        self._schedule.run_pending()
+                        self._save_next_runs()
+                    except Exception as e:
+                        logger.error(f"调度器运行异常: {str(e)}")
+
+                if not self._wakeup_pending and self.is_running:
+                    idle = self._schedule.idle_seconds if self.is_leader else None
+                    # 定期续期/尝试接管租约，并取出其他进程转交的执行请求
+                    limit = min(MAX_IDLE_SECONDS, self.lease_ttl / 3, REQUEST_POLL_SECONDS)
+                    self._wakeup.wait(limit if idle is None else min(max(idle, 0), limit))
+                self._wakeup_pending = False
+
+    def _refresh_leadership(self):
+        """
+        获取或续期主调度进程租约（须持有 self._wakeup）
+
+        刚成为主调度进程时标记上一任遗留的运行为中断、配置时间表并按策略补跑；
+        失去租约时清空时间表，已在执行的运行继续到结束。
+
+        Returns:
+            bool: 本进程是否为主调度进程
+        """
+        now = time.monotonic()
+        if self.is_leader and now < self._lease_renew_at:
+            return True
+        leader = self.store.acquire_leadership(self.instance_id, self.lease_ttl)
+        self._lease_renew_at = now + self.lease_ttl / 3
+
+        if leader and not self.is_leader:
+            self.is_leader = True
+            logger.info(f"本进程成为主调度进程: {self.instance_id}")
+            interrupted = self.store.mark_interrupted()
+            if interrupted:
+                logger.warning(f"上次运行中断的任务: {interrupted} 个")
+            self._setup_schedules()
+            self._catch_up_missed()
+        elif not leader and self.is_leader:
+            self.is_leader = False
+            logger.warning("主调度进程租约已被其他进程接管，停止分派定时任务")
+            self._schedule.clear()
+            self._triggers.clear()
+            self._saved_next_runs.clear()
+        return leader
+
+    def _wake(self):
+        """唤醒调度线程重新计算等待时间"""
+        with self._wakeup:
+            self._wakeup_pending = True
+            self._wakeup.notify_all()
     
-    def _safe_execute(self, task_func, task_name):
-        """安全执行任务，包含异常处理"""
+    def _execute(self, job, run):
+        """在工作线程中执行一次任务，包含超时与异常处理，结果写入运行历史"""
+        task_name = job['name']
+        self._run_state.run = run
+        timer = None
+        if job['timeout']:
+            timer = threading.Timer(job['timeout'], self._on_timeout, args=(job, run))
+            timer.daemon = True
+            timer.start()
+        status, records, error = FAILED, None, None
         try:
             logger.info(f"开始执行任务: {task_name}")
-            start_time = datetime.now()
-            
-            task_func()
-            
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds()
-            logger.info(f"任务 {task_name} 执行成功，耗时: {duration:.2f}秒")
-            
+            result = job['func']()
+            records = result if isinstance(result, int) else None
+            status = CANCELLED if run['cancelled'].is_set() else SUCCEEDED
+            duration = (datetime.now() - run['started_at']).total_seconds()
+            logger.info(f"任务 {task_name} 执行{'被取消' if status == CANCELLED else '成功'}，耗时: {duration:.2f}秒")
+        except JobCancelled:
+            status = CANCELLED
+            logger.warning(f"任务 {task_name} 已取消")
         except Exception as e:
-            logger.error(f"任务 {task_name} 执行失败: {str(e)}")
-    
+            error = str(e)
+            logger.error(f"任务 {task_name} 执行失败: {error}")
+        finally:
+            if timer:
+                timer.cancel()
+            self._run_state.run = None
+            if status == CANCELLED:
+                error = f"超过 {job['timeout']} 秒，已取消" if run['timed_out'] else '调度器停止，已取消'
+            self.store.finish_run(run['run_id'], status, records=records, error=error)
+            with self._lock:
+                job['active_runs'].remove(run)
+
+    def _on_timeout(self, job, run):
+        """运行超时：请求取消（采集任务在下一页完成时中止），运行结束前仍占用并发名额"""
+        with self._lock:
+            job['timeouts'] += 1
+        run['timed_out'] = True
+        run['cancelled'].set()
+        logger.error(f"任务 {job['name']} 超过 {job['timeout']} 秒仍未结束，已请求取消")
+
+    def _crawl(self, website, data_type, max_pages):
+        """增量采集并入库，返回采集结果；运行被取消时在下一页抓取完成后中止"""
+        def check_cancelled(event):
+            if self.is_cancelled():
+                raise JobCancelled(f'{website} 采集已取消')
+
+        result = self.crawler_manager.crawl_to_database(
+            website=website,
+            data_type=data_type,
+            region='全国',
+            max_pages=max_pages,
+            incremental=True,
+            progress_callback=check_cancelled
+        )
+        if self.is_cancelled():
+            raise JobCancelled(f'{website} 采集已取消')
+        if not result.get('success'):
+            raise RuntimeError(result.get('error') or f'{website} 采集失败')
+        return result
+
     def _collect_seed_data(self):
-        """采集种子价格数据"""
-        try:
-            result = self.crawler_manager.crawl_data(
-                website='seed_trade',
-                data_type='price',
-                region='全国',
-                max_pages=5
-            )
-            logger.info(f"种子数据采集完成，获取 {result.get('total_records', 0)} 条记录")
-        except Exception as e:
-            logger.error(f"种子数据采集失败: {str(e)}")
+        """采集种子价格数据，返回记录数"""
+        result = self._crawl('seed_trade', 'price', max_pages=5)
+        logger.info(f"种子数据采集完成，获取 {result.get('total_records', 0)} 条记录")
+        return result.get('total_records', 0)
     
     def _collect_weather_data(self):
-        """采集天气数据"""
-        try:
-            result = self.crawler_manager.crawl_data(
-                website='weather',
-                data_type='weather_forecast',
-                region='全国',
-                max_pages=3
-            )
-            logger.info(f"天气数据采集完成，获取 {result.get('total_records', 0)} 条记录")
-        except Exception as e:
-            logger.error(f"天气数据采集失败: {str(e)}")
+        """采集天气数据，返回记录数"""
+        result = self._crawl('weather', 'weather_forecast', max_pages=3)
+        logger.info(f"天气数据采集完成，获取 {result.get('total_records', 0)} 条记录")
+        return result.get('total_records', 0)
     
     def _collect_machine_data(self):
-        """采集农机数据"""
-        try:
-            result = self.crawler_manager.crawl_data(
-                website='farm_machine',
-                data_type='product_info',
-                region='全国',
-                max_pages=3
-            )
-            logger.info(f"农机数据采集完成，获取 {result.get('total_records', 0)} 条记录")
-        except Exception as e:
-            logger.error(f"农机数据采集失败: {str(e)}")
+        """采集农机数据，返回记录数"""
+        result = self._crawl('farm_machine', 'product_info', max_pages=3)
+        logger.info(f"农机数据采集完成，获取 {result.get('total_records', 0)} 条记录")
+        return result.get('total_records', 0)
     
     def _system_health_check(self):
         """系统健康检查"""
@@ -195,32 +477,20 @@ class TaskScheduler:
             logger.error(f"系统健康检查失败: {str(e)}")
     
     def _database_cleanup(self):
-        """数据库清理"""
-        try:
-            from app import app
-            from database import db
-            from datetime import datetime, timedelta
+        """按保留期分批清理过期数据，返回删除的记录数；运行被取消时在当前批结束后中止"""
+        from app import app
+        from database import db
+        from config.app_config import get_config
+        from data_crawler.retention import purge_expired
 
-            with app.app_context():
-                # 删除30天前的过期数据
-                cutoff_date = datetime.now() - timedelta(days=30)
-
-                from auth.models import SeedPrice, WeatherData
-
-                # 清理过期的种子价格数据
-                old_seeds = SeedPrice.query.filter(SeedPrice.date < cutoff_date.date()).count()
-                SeedPrice.query.filter(SeedPrice.date < cutoff_date.date()).delete()
-
-                # 清理过期的天气数据
-                old_weather = WeatherData.query.filter(WeatherData.date < cutoff_date.date()).count()
-                WeatherData.query.filter(WeatherData.date < cutoff_date.date()).delete()
-
-                db.session.commit()
-
-                logger.info(f"数据库清理完成 - 清理种子数据: {old_seeds}, 天气数据: {old_weather}")
+        with app.app_context():
+            result = purge_expired(db.engine, getattr(get_config(), 'DATA_RETENTION', None),
+                                   should_stop=self.is_cancelled)
 
-        except Exception as e:
-            logger.error(f"数据库清理失败: {str(e)}")
+        tables = ', '.join(f"{table}: {stats['deleted']} 条（{stats['batches']} 批）"
+                           for table, stats in result['tables'].items())
+        logger.info(f"数据库清理完成 - {tables}，耗时 {result['seconds']} 秒，{result['rows_per_second']} 行/秒")
+        return result['deleted']
     
     def _check_monthly_report(self):
         """检查是否需要生成月度报告"""
@@ -285,34 +555,87 @@ class TaskScheduler:
         except Exception as e:
             logger.error(f"月度报告生成失败: {str(e)}")
     
-    def get_status(self):
-        """获取调度器状态"""
+    def get_status(self, recent_runs=10):
+        """
+        获取调度器状态
+
+        任务的配置、下次运行时间和最近一次运行结果来自任务表，
+        stats 为最近 10 次完成运行的平均/最长耗时和失败次数，便于发现变慢的任务；
+        running / skipped / timeouts 为本进程的实时计数
+        """
+        run_stats = self.store.get_run_stats()
+        leader = self.store.get_leader()
+        with self._lock:
+            live = {job_id: (len(job['active_runs']), job['skipped'], job['timeouts'])
+                    for job_id, job in self.jobs.items()}
+        jobs = {}
+        for row in self.store.list_jobs():
+            running, skipped, timeouts = live.get(row['job_id'], (0, 0, 0))
+            jobs[row['job_id']] = {
+                'name': row['name'],
+                'schedule': row['schedule'],
+                'misfire_policy': row['misfire_policy'],
+                'max_instances': row['max_instances'],
+                'timeout': row['timeout'],
+                'next_run': _timestamp_text(row['next_run_at']),
+                'last_run': _timestamp_text(row['last_run_at']),
+                'last_status': row['last_status'],
+                'last_duration': row['last_duration'],
+                'last_records': row['last_records'],
+                'last_error': row['last_error'],
+                'stats': run_stats.get(row['job_id']),
+                'running': running,
+                'skipped': skipped,
+                'timeouts': timeouts
+            }
+        runs = [
+            dict(run, started_at=_timestamp_text(run['started_at']), finished_at=_timestamp_text(run['finished_at']))
+            for run in self.store.list_runs(limit=recent_runs)
+        ]
         return {
             'is_running': self.is_running,
-            'scheduled_jobs': len(schedule.jobs),
-            'next_run': str(schedule.next_run()) if schedule.jobs else None
+            'is_leader': self.is_leader,
+            'instance_id': self.instance_id,
+            'leader': leader and dict(leader, acquired_at=_timestamp_text(leader['acquired_at']),
+                                      expires_at=_timestamp_text(leader['expires_at'])),
+            'max_workers': self.max_workers,
+            'scheduled_jobs': len(self._schedule.jobs),
+            'next_run': str(self._schedule.next_run) if self._schedule.jobs else None,
+            'jobs': jobs,
+            'recent_runs': runs
         }
 
-# 全局调度器实例
-scheduler = TaskScheduler()
+# 全局调度器实例（首次使用时创建，导入本模块不会打开调度库和采集缓存）
+scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """获取全局调度器实例"""
+    global scheduler
+    with _scheduler_lock:
+        if scheduler is None:
+            scheduler = TaskScheduler()
+        return scheduler
 
 def start_scheduler():
     """启动调度器"""
-    scheduler.start()
+    configure_logging()
+    get_scheduler().start()
 
 def stop_scheduler():
     """停止调度器"""
-    scheduler.stop()
+    get_scheduler().stop()
 
 def get_scheduler_status():
     """获取调度器状态"""
-    return scheduler.get_status()
+    return get_scheduler().get_status()
+
+def run_scheduled_job(job_id):
+    """立即执行一个已注册的任务，返回是否已分派"""
+    return get_scheduler().run_job(job_id, 'manual')
 
 if __name__ == '__main__':
     # 直接运行时启动调度器
-    import os
-    os.makedirs('logs', exist_ok=True)
-    
     try:
         start_scheduler()
         logger.info("调度器已启动，按 Ctrl+C 停止")
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+AgriDec 调度任务持久化
+定时任务的配置、下次运行时间和运行历史保存在 SQLite 本地文件中，
+重启后据此判断错过的运行并按补跑策略处理，调度器状态也从这里读取；
+多个进程共用同一文件时，通过租约选出唯一的主调度进程
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+# 运行状态
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+SKIPPED = 'skipped'
+INTERRUPTED = 'interrupted'
+
+# 错过运行时的处理策略
+MISFIRE_SKIP = 'skip'          # 不补跑，等待下一次
+MISFIRE_RUN_ONCE = 'run_once'  # 启动时补跑一次（多次错过也只补一次）
+
+
+class SchedulerStore:
+    """调度任务与运行历史
+
+    scheduler_jobs 每个任务一行（配置、下次运行时间、最近一次运行结果），
+    scheduler_runs 每次运行一行，每个任务保留最近 history 条。
+    启动时仍处于运行中的记录会被标记为 interrupted。
+    scheduler_leader 只有一行，记录主调度进程及其租约到期时间；
+    scheduler_requests 保存其他进程转交给主调度进程的手动执行请求。
+    """
+
+    def __init__(self, path, history=200, clock=time.time):
+        self.path = path
+        self.history = history
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS scheduler_jobs (
+                job_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                schedule TEXT,
+                misfire_policy TEXT NOT NULL,
+                misfire_grace REAL,
+                max_instances INTEGER NOT NULL,
+                timeout REAL,
+                next_run_at REAL,
+                last_run_at REAL,
+                last_status TEXT,
+                last_duration REAL,
+                last_records INTEGER,
+                last_error TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS scheduler_runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                trigger TEXT NOT NULL,
+                status TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                duration REAL,
+                records INTEGER,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS ix_scheduler_runs_job ON scheduler_runs (job_id, run_id);
+            CREATE TABLE IF NOT EXISTS scheduler_leader (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                holder TEXT NOT NULL,
+                acquired_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS scheduler_requests (
+                request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                requested_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def mark_interrupted(self):
+        """把上次进程遗留的运行中记录标记为中断，返回条数"""
+        with self._lock:
+            count = self._conn.execute(
+                'UPDATE scheduler_runs SET status = ?, error = ?, finished_at = ? WHERE status = ?',
+                (INTERRUPTED, '服务重启，运行中断', self._clock(), RUNNING)
+            ).rowcount
+            self._conn.commit()
+            return count
+
+    def save_job(self, job_id, name, schedule=None, misfire_policy=MISFIRE_SKIP, misfire_grace=None,
+                 max_instances=1, timeout=None):
+        """写入任务配置（保留下次运行时间和最近运行结果）"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO scheduler_jobs (job_id, name, schedule, misfire_policy, misfire_grace, '
+                'max_instances, timeout, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(job_id) DO UPDATE SET name = excluded.name, schedule = excluded.schedule, '
+                'misfire_policy = excluded.misfire_policy, misfire_grace = excluded.misfire_grace, '
+                'max_instances = excluded.max_instances, timeout = excluded.timeout, '
+                'updated_at = excluded.updated_at',
+                (job_id, name, schedule, misfire_policy, misfire_grace, max_instances, timeout, self._clock())
+            )
+            self._conn.commit()
+
+    def set_next_runs(self, next_runs):
+        """更新下次运行时间（{任务ID: 时间戳}）"""
+        with self._lock:
+            self._conn.executemany(
+                'UPDATE scheduler_jobs SET next_run_at = ? WHERE job_id = ?',
+                [(next_run_at, job_id) for job_id, next_run_at in next_runs.items()]
+            )
+            self._conn.commit()
+
+    def get_job(self, job_id):
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM scheduler_jobs WHERE job_id = ?', (job_id,)).fetchone()
+            return dict(row) if row else None
+
+    def list_jobs(self):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute('SELECT * FROM scheduler_jobs ORDER BY job_id')]
+
+    def start_run(self, job_id, trigger, status=RUNNING, error=None):
+        """记录一次运行的开始（或直接记录被跳过的运行），返回运行ID"""
+        now = self._clock()
+        finished_at = None if status == RUNNING else now
+        with self._lock:
+            run_id = self._conn.execute(
+                'INSERT INTO scheduler_runs (job_id, trigger, status, started_at, finished_at, error) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, trigger, status, now, finished_at, error)
+            ).lastrowid
+            self._conn.commit()
+            return run_id
+
+    def finish_run(self, run_id, status, records=None, error=None):
+        """记录运行结果，同时更新任务的最近运行信息并清理过旧的历史"""
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT job_id, started_at FROM scheduler_runs WHERE run_id = ?', (run_id,)
+            ).fetchone()
+            if row is None:
+                return
+            duration = round(now - row['started_at'], 3)
+            self._conn.execute(
+                'UPDATE scheduler_runs SET status = ?, finished_at = ?, duration = ?, records = ?, error = ? '
+                'WHERE run_id = ?',
+                (status, now, duration, records, error, run_id)
+            )
+            self._conn.execute(
+                'UPDATE scheduler_jobs SET last_run_at = ?, last_status = ?, last_duration = ?, '
+                'last_records = ?, last_error = ? WHERE job_id = ?',
+                (row['started_at'], status, duration, records, error, row['job_id'])
+            )
+            self._conn.execute(
+                'DELETE FROM scheduler_runs WHERE job_id = ? AND run_id <= ('
+                'SELECT run_id FROM scheduler_runs WHERE job_id = ? ORDER BY run_id DESC LIMIT 1 OFFSET ?)',
+                (row['job_id'], row['job_id'], self.history)
+            )
+            self._conn.commit()
+
+    def list_runs(self, job_id=None, limit=20):
+        """最近的运行记录（新的在前）"""
+        with self._lock:
+            if job_id is None:
+                rows = self._conn.execute(
+                    'SELECT * FROM scheduler_runs ORDER BY run_id DESC LIMIT ?', (limit,)
+                )
+            else:
+                rows = self._conn.execute(
+                    'SELECT * FROM scheduler_runs WHERE job_id = ? ORDER BY run_id DESC LIMIT ?', (job_id, limit)
+                )
+            return [dict(row) for row in rows]
+
+    def get_run_stats(self, recent=10):
+        """
+        各任务最近 recent 次完成运行的耗时统计
+
+        Returns:
+            dict: 任务ID -> {'runs', 'avg_duration', 'max_duration', 'failures'}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT job_id, COUNT(*) AS runs, AVG(duration) AS avg_duration, MAX(duration) AS max_duration, '
+                'SUM(status != ?) AS failures FROM ('
+                '  SELECT job_id, duration, status, ROW_NUMBER() OVER ('
+                '    PARTITION BY job_id ORDER BY run_id DESC) AS position'
+                '  FROM scheduler_runs WHERE status NOT IN (?, ?)'
+                ') WHERE position <= ? GROUP BY job_id',
+                (SUCCEEDED, RUNNING, SKIPPED, recent)
+            ).fetchall()
+            return {
+                row['job_id']: {
+                    'runs': row['runs'],
+                    'avg_duration': round(row['avg_duration'], 3) if row['avg_duration'] is not None else None,
+                    'max_duration': row['max_duration'],
+                    'failures': row['failures']
+                }
+                for row in rows
+            }
+
+    def acquire_leadership(self, holder, ttl):
+        """
+        获取或续期主调度进程租约
+
+        租约不存在、已过期或本来就属于 holder 时写入（一条语句完成，多进程下原子）
+
+        Returns:
+            bool: holder 是否为主调度进程
+        """
+        now = self._clock()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO scheduler_leader (id, holder, acquired_at, expires_at) VALUES (1, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET '
+                'acquired_at = CASE WHEN holder = excluded.holder THEN acquired_at ELSE excluded.acquired_at END, '
+                'holder = excluded.holder, expires_at = excluded.expires_at '
+                'WHERE holder = excluded.holder OR expires_at < ?',
+                (holder, now, now + ttl, now)
+            )
+            self._conn.commit()
+            row = self._conn.execute('SELECT holder FROM scheduler_leader WHERE id = 1').fetchone()
+            return row is not None and row['holder'] == holder
+
+    def release_leadership(self, holder):
+        """主动释放租约（其他进程可立即接管）"""
+        with self._lock:
+            self._conn.execute('DELETE FROM scheduler_leader WHERE holder = ?', (holder,))
+            self._conn.commit()
+
+    def get_leader(self):
+        """当前主调度进程（租约已过期时返回 None）"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT holder, acquired_at, expires_at FROM scheduler_leader WHERE id = 1 AND expires_at >= ?',
+                (self._clock(),)
+            ).fetchone()
+            return dict(row) if row else None
+
+    def request_run(self, job_id):
+        """记录一个手动执行请求，由主调度进程执行"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO scheduler_requests (job_id, requested_at) VALUES (?, ?)', (job_id, self._clock())
+            )
+            self._conn.commit()
+
+    def take_requests(self):
+        """
+        取出并删除全部手动执行请求，返回任务ID列表（按请求顺序）
+
+        先用普通查询检查是否有请求，有请求时才在同一个写事务中查询并删除已取出的请求
+        （不依赖 SQLite 3.35 的 DELETE ... RETURNING），空闲轮询不占用写锁
+        """
+        with self._lock:
+            if self._conn.execute('SELECT 1 FROM scheduler_requests LIMIT 1').fetchone() is None:
+                return []
+            try:
+                self._conn.execute('BEGIN IMMEDIATE')
+                rows = self._conn.execute(
+                    'SELECT request_id, job_id FROM scheduler_requests ORDER BY request_id'
+                ).fetchall()
+                if rows:
+                    self._conn.execute(
+                        'DELETE FROM scheduler_requests WHERE request_id <= ?', (rows[-1]['request_id'],)
+                    )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+            return [row['job_id'] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
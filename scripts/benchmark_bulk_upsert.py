@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬虫数据写入基准测试
+在临时 SQLite 数据库上对比逐条 ORM 写入与 Core 批量 upsert 的每秒行数
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from auth.models import SeedPrice
+from data_crawler.bulk_writer import bulk_upsert
+
+PROVINCES = ['山东', '河南', '河北', '江苏', '安徽', '湖北', '湖南', '四川', '黑龙江', '吉林']
+VARIETIES = ['先玉335', '郑单958', '登海605', '中单909', '京科968', '黄华占', '济麦22']
+
+
+def make_rows(count, seed=42):
+    """生成自然键互不重复的种子价格行"""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        rows.append({
+            'product_name': f'玉米种子{i % 50}',
+            'variety': VARIETIES[i % len(VARIETIES)],
+            'price': round(rng.uniform(2, 40), 2),
+            'unit': '元/斤',
+            'region': PROVINCES[i % len(PROVINCES)],
+            'date': start + timedelta(days=i // 350),
+            'source_url': f'https://www.114seeds.com/seed/{i}'
+        })
+    return rows
+
+
+def fresh_engine(directory, name):
+    engine = create_engine(f'sqlite:///{os.path.join(directory, name)}')
+    SeedPrice.__table__.create(engine)
+    return engine
+
+
+def row_count(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(SeedPrice.__table__)).scalar()
+
+
+def bench_orm(engine, rows):
+    """原实现：逐条构造ORM对象，session.add 后一次提交"""
+    started = time.perf_counter()
+    with Session(engine) as session:
+        for row in rows:
+            session.add(SeedPrice(**row))
+        session.commit()
+    return time.perf_counter() - started
+
+
+def bench_bulk(engine, rows, chunk_size):
+    started = time.perf_counter()
+    bulk_upsert(engine, SeedPrice.__table__, rows, chunk_size=chunk_size)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='爬虫数据写入基准测试（SQLite）')
+    parser.add_argument('--rows', type=int, default=20000, help='写入行数')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='批量写入每块行数')
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orm_engine = fresh_engine(tmp_dir, 'orm.db')
+        orm_time = bench_orm(orm_engine, rows)
+
+        bulk_engine = fresh_engine(tmp_dir, 'bulk.db')
+        bulk_time = bench_bulk(bulk_engine, rows, args.chunk_size)
+        # 再次写入相同数据：全部走更新分支，行数不应增加
+        rerun_time = bench_bulk(bulk_engine, rows, args.chunk_size)
+
+        print(f"📊 写入基准测试（{args.rows} 行，块大小 {args.chunk_size}）")
+        print("=" * 56)
+        print(f"{'逐条ORM写入':<16}{args.rows / orm_time:>12.0f} 行/秒   表行数 {row_count(orm_engine)}")
+        print(f"{'批量upsert':<18}{args.rows / bulk_time:>12.0f} 行/秒")
+        print(f"{'重复upsert':<18}{args.rows / rerun_time:>12.0f} 行/秒   表行数 {row_count(bulk_engine)}")
+        orm_engine.dispose()
+        bulk_engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬虫吞吐量基准测试
+用本地替身服务器回放 tests/fixtures/html 下录制的页面（可配置延迟、429 和服务端错误），
+对每个站点运行 CrawlerManager.crawl_data，统计页/秒、记录/秒、抓取延迟 p50/p99 和内存峰值，
+结果追加写入 JSON 文件，便于跨提交比较
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.frontier import CrawlFrontier, discover_links
+from data_crawler.stub_server import StubServer
+
+FIXTURE_DIR = project_root / 'tests' / 'fixtures' / 'html'
+DEFAULT_OUTPUT = project_root / 'benchmark_results' / 'crawl_benchmark.json'
+
+# 站点 -> (数据类型, 样例页面匹配模式)
+SITES = {
+    'seed_trade': ('price', 'seed_trade_list_p*.html'),
+    'weather': ('weather_forecast', 'weather_*.shtml'),
+    'farm_machine': ('product_info', 'farm_machine_*.html'),
+}
+
+
+def request_path(url):
+    """URL 对应的请求路径（含查询串），与替身服务器收到的路径一致"""
+    parsed = urlparse(url)
+    return (parsed.path or '/') + (f'?{parsed.query}' if parsed.query else '')
+
+
+def point_to_server(manager, base_url):
+    """把所有站点地址指向替身服务器"""
+    for site in manager.supported_websites.values():
+        site['base_url'] = base_url
+    manager.supported_websites['farm_machine']['search_url'] = f'{base_url}/search'
+
+
+def build_routes(site, region, max_pages):
+    """
+    按爬虫实际会请求的页面生成回放路由，依次轮换使用该站点的样例页面
+
+    离线遍历爬取边界：从种子页面出发，按链接发现规则扩展样例页面中的链接，
+    直到路由数达到 max_pages。
+    """
+    manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False, circuit_breaker=False)
+    point_to_server(manager, 'http://replay')
+    data_type, pattern = SITES[site]
+    fixtures = [path.read_bytes() for path in sorted(FIXTURE_DIR.glob(pattern))]
+
+    build_pages = getattr(manager, manager.PAGE_BUILDERS[site][0])
+    pages, _ = build_pages(manager._prepare_crawler_params(site, data_type, region))
+    frontier = CrawlFrontier()
+    for page in pages:
+        frontier.add(page)
+
+    routes = {}
+    while frontier and len(routes) < max(max_pages, len(pages)):
+        page = frontier.pop_batch(1)[0]
+        content = fixtures[len(routes) % len(fixtures)]
+        routes[request_path(page['url'])] = content
+        page['links'] = discover_links(content, page['url'], manager._link_rules(site))
+        frontier.add_links(page)
+    return routes
+
+
+def percentile(values, fraction):
+    """最近秩百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_site(site, base_url, region, max_pages, repeat, rate_limit, work_dir):
+    """在独立进程中运行一个站点的采集，返回统计结果（内存峰值只包含该站点）"""
+    # 数据写入临时 SQLite，需要在导入 app 之前设置
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(work_dir, f'{site}.db')}"
+    from app import app, db
+    from data_crawler.circuit_breaker import HostCircuitBreaker
+    from data_crawler.page_archive import PageArchive
+    from data_crawler.rate_limiter import HostRateLimiter
+
+    with app.app_context():
+        db.create_all()
+
+    manager = CrawlerManager(http_cache=False, crawl_state=False,
+                             page_archive=PageArchive(os.path.join(work_dir, f'{site}_archive')))
+    manager.circuit_breaker = HostCircuitBreaker(
+        ':memory:',
+        failure_threshold=manager.crawl_config['breaker_failure_threshold'],
+        recovery_timeout=manager.crawl_config['breaker_recovery_timeout']
+    )
+    point_to_server(manager, base_url)
+    manager.rate_limiter = HostRateLimiter(default_rate_per_hour=rate_limit, burst=100)
+
+    # 记录每次抓取（含重试和限速等待）的耗时
+    latencies = []
+    make_request = manager._make_request
+
+    def timed_request(url, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return make_request(url, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    manager._make_request = timed_request
+
+    data_type = SITES[site][0]
+    pages = records = 0
+    fallback_runs = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = manager.crawl_data(site, data_type, region, max_pages=max_pages)
+        data = result.get('data', {})
+        pages += data.get('crawled_pages', 0)
+        records += data.get('total_records', 0)
+        fallback_runs += bool(data.get('metadata', {}).get('fallback'))
+    elapsed = time.perf_counter() - started
+    manager.close()
+
+    return {
+        'runs': repeat,
+        'pages': pages,
+        'records': records,
+        'fallback_runs': fallback_runs,
+        'elapsed_sec': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 2) if elapsed else 0.0,
+        'records_per_sec': round(records / elapsed, 2) if elapsed else 0.0,
+        'requests': len(latencies),
+        'fetch_p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'fetch_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        # Linux 下 ru_maxrss 的单位为 KB
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'peak_parse_worker_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    }
+
+
+def git_commit():
+    """当前提交，便于在结果文件中对比不同版本"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(path, entry):
+    """把本次结果追加到 JSON 文件"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    history = json.loads(path.read_text(encoding='utf-8')) if path.exists() else []
+    history.append(entry)
+    path.write_text(json.dumps(history, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='爬虫吞吐量基准测试（本地回放，不访问外网）')
+    parser.add_argument('--sites', nargs='+', choices=sorted(SITES), default=list(SITES), help='要测试的站点')
+    parser.add_argument('--region', default='全国', help='采集地区')
+    parser.add_argument('--max-pages', type=int, default=5, help='每次采集的最大页数')
+    parser.add_argument('--repeat', type=int, default=5, help='每个站点的采集次数')
+    parser.add_argument('--latency', type=float, default=20, help='替身服务器响应延迟（毫秒）')
+    parser.add_argument('--jitter', type=float, default=10, help='延迟抖动范围（毫秒）')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='返回 429 的请求比例')
+    parser.add_argument('--retry-after', type=int, help='429 响应携带的 Retry-After（秒）')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='返回 500 的请求比例')
+    parser.add_argument('--rate-limit', type=int, default=3600000, help='每小时请求额度（默认不限速）')
+    parser.add_argument('--seed', type=int, default=42, help='故障注入随机数种子')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='结果 JSON 文件')
+    args = parser.parse_args()
+
+    latency = (args.latency / 1000, (args.latency + args.jitter) / 1000)
+    settings = {key: value for key, value in vars(args).items() if key != 'output'}
+    results = {}
+
+    print(f"📊 爬虫基准测试（每站点 {args.repeat} 次，延迟 {args.latency:.0f}±{args.jitter:.0f}ms，"
+          f"429 比例 {args.throttle_rate}，错误比例 {args.failure_rate}）")
+    print("=" * 88)
+    print(f"{'站点':<14}{'页/秒':>10}{'记录/秒':>12}{'p50(ms)':>10}{'p99(ms)':>10}{'请求数':>8}{'RSS(MB)':>10}{'后备':>6}")
+
+    spawn = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as work_dir:
+        for site in args.sites:
+            server = StubServer(build_routes(site, args.region, args.max_pages), latency=latency,
+                                throttle_rate=args.throttle_rate, failure_rate=args.failure_rate,
+                                retry_after=args.retry_after, seed=args.seed).start()
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+                    stats = executor.submit(run_site, site, server.base_url, args.region, args.max_pages,
+                                            args.repeat, args.rate_limit, work_dir).result()
+            finally:
+                server.stop()
+
+            results[site] = stats
+            print(f"{site:<16}{stats['pages_per_sec']:>10}{stats['records_per_sec']:>12}"
+                  f"{stats['fetch_p50_ms']:>10}{stats['fetch_p99_ms']:>10}{stats['requests']:>8}"
+                  f"{stats['peak_rss_mb']:>10}{stats['fallback_runs']:>6}")
+
+    save_results(args.output, {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'settings': settings,
+        'sites': results
+    })
+    print(f"\n💾 结果已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
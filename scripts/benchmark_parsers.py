@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬虫页面解析基准测试
+使用 tests/fixtures/html 下保存的页面，对比默认解析方式
+（html.parser 完整解析 + 完整选择器回退链）与优化后的解析后端
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.parser_backend import ParserBackend
+
+FIXTURE_DIR = project_root / 'tests' / 'fixtures' / 'html'
+
+# (页面类型, 文件匹配模式, 解析方法名, 解析上下文)
+PAGE_SETS = [
+    ('seed_trade', 'seed_trade_*.html', '_parse_seed_trade_page', 'https://www.114seeds.com/supply/list.html'),
+    ('weather', 'weather_*.shtml', '_parse_weather_page', '北京'),
+    ('farm_machine', 'farm_machine_*.html', '_parse_farm_machine_page', 'https://o2o.nongji360.com/search?c=309'),
+]
+
+
+def run_benchmark(backend, repeat):
+    """使用指定解析后端解析全部样例页面，返回每类页面的吞吐量"""
+    manager = CrawlerManager()
+    manager.parser_backend = backend
+
+    results = {}
+    for page_type, pattern, parser_name, context in PAGE_SETS:
+        pages = [path.read_bytes() for path in sorted(FIXTURE_DIR.glob(pattern))]
+        parser = getattr(manager, parser_name)
+
+        records = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for content in pages:
+                records += len(parser(backend.make_soup(content, page_type), context))
+        elapsed = time.perf_counter() - started
+
+        parsed_pages = len(pages) * repeat
+        results[page_type] = {
+            'pages': parsed_pages,
+            'records': records,
+            'pages_per_sec': round(parsed_pages / elapsed, 1) if elapsed else 0.0
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='爬虫页面解析基准测试')
+    parser.add_argument('--repeat', type=int, default=20, help='每个样例页面的解析次数')
+    args = parser.parse_args()
+
+    baseline = run_benchmark(
+        ParserBackend(features='html.parser', use_strainer=False, remember_selectors=False), args.repeat
+    )
+    optimized_backend = ParserBackend()
+    optimized = run_benchmark(optimized_backend, args.repeat)
+
+    print(f"📊 解析基准测试（每页重复 {args.repeat} 次，优化后端: {optimized_backend.features}）")
+    print("=" * 64)
+    print(f"{'页面类型':<14}{'优化前 页/秒':>14}{'优化后 页/秒':>14}{'加速比':>10}{'记录一致':>10}")
+    for page_type, _, _, _ in PAGE_SETS:
+        before, after = baseline[page_type], optimized[page_type]
+        speedup = after['pages_per_sec'] / before['pages_per_sec'] if before['pages_per_sec'] else 0
+        same = '✅' if before['records'] == after['records'] else '❌'
+        print(f"{page_type:<16}{before['pages_per_sec']:>14}{after['pages_per_sec']:>14}{speedup:>9.2f}x{same:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -27,7 +27,10 @@ CREATE TABLE seed_prices (
     INDEX idx_date (date),
     INDEX idx_product (product_name),
     INDEX idx_region_date (region, date),
-    INDEX idx_price (price)
+    INDEX idx_price (price),
+    
+    -- 唯一约束：同一产品同一品种同一地区每天只能有一条价格记录
+    UNIQUE KEY uk_seed_price (product_name, variety, region, date)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='种子价格数据表';
 
 -- 创建天气数据表
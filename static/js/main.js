@@ -30,20 +30,29 @@ $(document).ready(function() {
                 region: '全国',
                 max_pages: 2
             }),
-            timeout: 120000, // 2分钟超时
+            timeout: 30000,
             success: function(response) {
-                if (response.success) {
-                    showNotification(`${getWebsiteName(website)}数据采集成功！获取 ${response.count || 0} 条记录`, 'success');
-                    // 刷新相关数据显示
-                    refreshDataDisplay(dataType);
-                } else {
+                if (!response.success) {
                     showNotification(`数据采集失败：${response.error || '未知错误'}`, 'error');
+                    $btn.prop('disabled', false).html(originalHtml);
+                    return;
                 }
+                // 采集在后台进行，轮询任务结果
+                waitForCrawlJob(response.result_url, function(result) {
+                    if (result.success) {
+                        showNotification(`${getWebsiteName(website)}数据采集成功！获取 ${result.total_records || 0} 条记录`, 'success');
+                        // 刷新相关数据显示
+                        refreshDataDisplay(dataType);
+                    } else {
+                        showNotification(`数据采集失败：${result.error || '未知错误'}`, 'error');
+                    }
+                    $btn.prop('disabled', false).html(originalHtml);
+                });
             },
             error: function(xhr, status, error) {
                 let errorMsg = '请求失败';
                 if (status === 'timeout') {
-                    errorMsg = '请求超时，数据采集可能仍在后台进行';
+                    errorMsg = '请求超时，请稍后重试';
                 } else if (xhr.status === 500) {
                     errorMsg = '服务器内部错误，请稍后重试';
                 } else if (xhr.status === 0) {
@@ -52,8 +61,6 @@ $(document).ready(function() {
                     errorMsg = `请求失败 (${xhr.status}): ${error}`;
                 }
                 showNotification(errorMsg, 'error');
-            },
-            complete: function() {
                 $btn.prop('disabled', false).html(originalHtml);
             }
         });
@@ -115,6 +122,23 @@ function showNotification(message, type = 'info', duration = 5000) {
     }, duration);
 }
 
+// 轮询后台采集任务，结束后回调任务结果
+function waitForCrawlJob(resultUrl, callback) {
+    $.getJSON(resultUrl)
+        .done(function(result, textStatus, xhr) {
+            if (xhr.status === 202) {
+                setTimeout(function() {
+                    waitForCrawlJob(resultUrl, callback);
+                }, 2000);
+            } else {
+                callback(result);
+            }
+        })
+        .fail(function(xhr) {
+            callback({success: false, error: `查询任务失败 (${xhr.status})`});
+        });
+}
+
 // 刷新数据显示
 function refreshDataDisplay(dataType) {
     switch(dataType) {
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 批量写入测试
+验证按自然键 upsert、分块写入与方言语句生成
+"""
+
+import unittest
+import sys
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.dialects import mysql
+
+from auth.models import SeedPrice, WeatherData, FarmMachine
+from data_crawler.bulk_writer import (bulk_upsert, ensure_natural_keys, has_unique_key, missing_natural_keys,
+                                      upsert_statement)
+
+
+def seed_row(price, region='山东', day=1):
+    return {
+        'product_name': '玉米种子', 'variety': '先玉335', 'price': price, 'unit': '元/斤',
+        'region': region, 'date': date(2025, 9, day), 'source_url': 'https://www.114seeds.com/seed/1'
+    }
+
+
+class TestBulkUpsert(unittest.TestCase):
+    """bulk_upsert 测试"""
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        for model in (SeedPrice, WeatherData, FarmMachine):
+            model.__table__.create(self.engine)
+        self.seed_table = SeedPrice.__table__
+
+    def count(self, table):
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(table)).scalar()
+
+    def test_repeated_crawl_updates_instead_of_duplicating(self):
+        """测试重复采集按自然键更新而不是重复插入"""
+        rows = [seed_row(2.5, day=d) for d in range(1, 11)]
+        self.assertEqual(bulk_upsert(self.engine, self.seed_table, rows, chunk_size=3), 10)
+        bulk_upsert(self.engine, self.seed_table, [seed_row(3.0, day=1)])
+
+        self.assertEqual(self.count(self.seed_table), 10)
+        with self.engine.connect() as conn:
+            price = conn.execute(
+                select(self.seed_table.c.price).where(self.seed_table.c.date == date(2025, 9, 1))
+            ).scalar()
+        self.assertEqual(price, 3.0)
+
+    def test_duplicates_within_chunk_keep_last(self):
+        """测试同一块内重复的自然键只保留最后一条"""
+        written = bulk_upsert(self.engine, self.seed_table, (seed_row(p) for p in (1.0, 2.0, 3.0)))
+        self.assertEqual(written, 1)
+        self.assertEqual(self.count(self.seed_table), 1)
+
+    def test_weather_natural_key(self):
+        """测试天气数据按 (region, date) 去重"""
+        table = WeatherData.__table__
+        row = {'region': '北京', 'date': date(2025, 9, 1), 'temperature': 20.0,
+               'weather': '晴', 'humidity': 60.0, 'wind_speed': 2.0}
+        bulk_upsert(self.engine, table, [row])
+        bulk_upsert(self.engine, table, [dict(row, temperature=22.0), dict(row, region='上海')])
+        self.assertEqual(self.count(table), 2)
+
+    def test_table_without_natural_key_appends(self):
+        """测试没有自然键的表直接追加"""
+        table = FarmMachine.__table__
+        row = {'product_name': '拖拉机', 'brand': '久保田', 'model': 'M704', 'price': 80000.0,
+               'specifications': '', 'region': '山东'}
+        bulk_upsert(self.engine, table, [row, row])
+        self.assertEqual(self.count(table), 2)
+
+    def test_mysql_statement_uses_on_duplicate_key(self):
+        """测试 MySQL 方言生成 ON DUPLICATE KEY UPDATE"""
+        stmt = upsert_statement(self.seed_table, 'mysql', ('product_name', 'variety', 'region', 'date'))
+        sql = str(stmt.compile(dialect=mysql.dialect()))
+        self.assertIn('ON DUPLICATE KEY UPDATE', sql)
+        self.assertIn('price = VALUES(price)', sql)
+        self.assertNotIn('created_at = VALUES', sql)
+
+
+class TestNaturalKeyMigration(unittest.TestCase):
+    """旧数据库（表已存在但没有唯一约束）测试"""
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                'CREATE TABLE seed_prices (id INTEGER PRIMARY KEY, product_name VARCHAR(100) NOT NULL, '
+                'variety VARCHAR(100), price FLOAT NOT NULL, unit VARCHAR(20), region VARCHAR(50), '
+                'date DATE NOT NULL, source_url VARCHAR(500), created_at DATETIME)'
+            ))
+        self.seed_table = SeedPrice.__table__
+
+    def count(self):
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(self.seed_table)).scalar()
+
+    def test_missing_constraint_falls_back_to_insert(self):
+        """测试缺少唯一约束时退回普通 insert，不会整批写入失败"""
+        self.assertFalse(has_unique_key(self.engine, 'seed_prices', ('product_name', 'variety', 'region', 'date')))
+        self.assertEqual(bulk_upsert(self.engine, self.seed_table, [seed_row(2.5)]), 1)
+        self.assertEqual(bulk_upsert(self.engine, self.seed_table, [seed_row(3.0)]), 1)
+        self.assertEqual(self.count(), 2)
+
+        # 启动检查只报告缺少约束的表，不删除重复行
+        self.assertEqual(missing_natural_keys(self.engine), ['seed_prices'])
+        self.assertEqual(self.count(), 2)
+
+    def test_migration_dedupes_and_enables_upsert(self):
+        """测试迁移删除重复行（保留最近一行）并补建约束，之后按自然键更新"""
+        bulk_upsert(self.engine, self.seed_table, [seed_row(2.5), seed_row(2.5, day=2)])
+        bulk_upsert(self.engine, self.seed_table, [seed_row(3.0)])
+
+        results = ensure_natural_keys(self.engine)
+        self.assertEqual(results, {'seed_prices': {'duplicates_removed': 1, 'created': True}})
+        self.assertEqual(self.count(), 2)
+        self.assertTrue(has_unique_key(self.engine, 'seed_prices', ('product_name', 'variety', 'region', 'date')))
+        self.assertEqual(ensure_natural_keys(self.engine), {})
+        self.assertEqual(missing_natural_keys(self.engine), [])
+
+        bulk_upsert(self.engine, self.seed_table, [seed_row(4.0)])
+        self.assertEqual(self.count(), 2)
+        with self.engine.connect() as conn:
+            price = conn.execute(
+                select(self.seed_table.c.price).where(self.seed_table.c.date == date(2025, 9, 1))
+            ).scalar()
+        self.assertEqual(price, 4.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
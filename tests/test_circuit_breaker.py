@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 爬虫熔断器测试
+验证熔断状态转换、状态持久化以及故障主机的快速失败
+"""
+
+import os
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.circuit_breaker import CLOSED, HALF_OPEN, OPEN, HostCircuitBreaker
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.rate_limiter import HostRateLimiter
+from data_crawler.stub_server import StubServer
+
+URL = 'http://source.example/list.html'
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHostCircuitBreaker(unittest.TestCase):
+    """HostCircuitBreaker 测试"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = HostCircuitBreaker(':memory:', failure_threshold=3, recovery_timeout=60, clock=self.clock)
+
+    def state(self):
+        return self.breaker.get_status()['source.example']['state']
+
+    def test_opens_after_consecutive_failures(self):
+        """测试连续失败达到阈值后熔断，成功会清零连续失败次数"""
+        self.breaker.record_failure(URL, '连接错误')
+        self.breaker.record_failure(URL, '连接错误')
+        self.breaker.record_success(URL)
+        self.breaker.record_failure(URL, '连接错误')
+        self.assertEqual(self.state(), CLOSED)
+
+        self.breaker.record_failure(URL, '请求超时')
+        self.assertTrue(self.breaker.record_failure(URL, '请求超时'))
+        self.assertEqual(self.state(), OPEN)
+        self.assertFalse(self.breaker.allow(URL))
+        self.assertEqual(self.breaker.get_status()['source.example']['rejected_requests'], 1)
+        self.assertEqual(self.breaker.get_failure_history(URL)[0]['error'], '请求超时')
+
+    def test_half_open_probe(self):
+        """测试冷却结束后只放行一个探测请求，探测结果决定恢复或重新熔断"""
+        for _ in range(3):
+            self.breaker.record_failure(URL)
+
+        self.clock.now += 61
+        self.assertTrue(self.breaker.allow(URL))
+        self.assertEqual(self.state(), HALF_OPEN)
+        self.assertFalse(self.breaker.allow(URL))
+
+        self.breaker.record_failure(URL)
+        self.assertEqual(self.state(), OPEN)
+
+        self.clock.now += 61
+        self.assertTrue(self.breaker.allow(URL))
+        self.breaker.record_success(URL)
+        self.assertEqual(self.state(), CLOSED)
+        self.assertTrue(self.breaker.allow(URL))
+
+    def test_state_is_persisted(self):
+        """测试熔断状态在新实例（如进程重启）中仍然有效"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'breaker.db')
+            breaker = HostCircuitBreaker(path, failure_threshold=1, recovery_timeout=60, clock=self.clock)
+            breaker.record_failure(URL, 'HTTP 503')
+
+            reloaded = HostCircuitBreaker(path, failure_threshold=1, recovery_timeout=60, clock=self.clock)
+            self.assertFalse(reloaded.allow(URL))
+            self.assertEqual(reloaded.get_status()['source.example']['last_error'], 'HTTP 503')
+
+
+class TestCrawlerCircuitBreaker(unittest.TestCase):
+    """CrawlerManager 熔断集成测试"""
+
+    def test_dead_host_fails_fast(self):
+        """测试站点持续报错时熔断后不再请求，并在爬虫状态中可见"""
+        paths = ['/supply/list_h_26_s_997.html', '/supply/list_h_26_p_2_s_997.html',
+                 '/supply/list_h_26_p_3_s_997.html']
+        with StubServer({path: '<html></html>' for path in paths}, failure_rate=1.0) as server:
+            manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                     circuit_breaker=HostCircuitBreaker(':memory:', failure_threshold=2))
+            manager.rate_limiter = HostRateLimiter(default_rate_per_hour=3600000, burst=100)
+            manager.crawl_config['backoff_base'] = 0.01
+            manager.supported_websites['seed_trade']['base_url'] = server.base_url
+
+            events = []
+            list(manager.iter_crawl('seed_trade', 'price', progress_callback=events.append))
+
+        # 第一个页面失败两次后熔断，其余页面不再发出请求
+        self.assertEqual(len(server.requests), 2)
+        self.assertTrue(events[-1]['fallback'])
+        breakers = manager.get_crawl_status()['circuit_breakers']
+        self.assertEqual(breakers[server.base_url[len('http://'):]]['state'], OPEN)
+
+
+if __name__ == '__main__':
+    unittest.main()
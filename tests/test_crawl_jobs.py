@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 后台采集任务测试
+验证提交即返回、重复任务合并、进度与结果持久化、逐页进度事件、多 worker 共享任务表，以及重启后中断任务的处理
+"""
+
+import os
+import tempfile
+import time
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.job_queue import CrawlJobQueue, FAILED, QUEUED, RUNNING, SUCCEEDED, format_sse
+from data_crawler.rate_limiter import HostRateLimiter
+from data_crawler.stub_server import StubServer
+
+FIXTURE_DIR = project_root / 'tests' / 'fixtures' / 'html'
+
+
+class TestCrawlJobQueue(unittest.TestCase):
+    """CrawlJobQueue 测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        page = (FIXTURE_DIR / 'seed_trade_list_p1.html').read_bytes()
+        cls.server = StubServer({
+            '/supply/list_h_26_s_997.html': page,
+            '/supply/list_h_26_p_2_s_997.html': page,
+        }, latency=0.3).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'jobs.db')
+        self.manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                      circuit_breaker=False)
+        self.manager.rate_limiter = HostRateLimiter(default_rate_per_hour=3600000, burst=100)
+        self.manager.supported_websites['seed_trade']['base_url'] = self.server.base_url
+        self.saved = []
+        self.manager._save_to_database = lambda records, website, data_type, **kwargs: \
+            self.saved.append(len(list(records))) or self.saved[-1]
+        self.queue = CrawlJobQueue(self.manager, self.path, max_workers=2, progress_interval=0)
+
+    def tearDown(self):
+        self.queue.shutdown()
+        self.temp_dir.cleanup()
+
+    def test_submit_returns_before_crawl_finishes(self):
+        """测试提交立即返回任务ID，结果在任务结束后可查询"""
+        started = time.perf_counter()
+        job, coalesced = self.queue.submit('seed_trade', 'price', max_pages=1)
+        self.assertLess(time.perf_counter() - started, 0.2)
+        self.assertFalse(coalesced)
+        self.assertIn(job['status'], (QUEUED, RUNNING))
+
+        finished = self.queue.wait(job['job_id'], timeout=10)
+        self.assertEqual(finished['status'], SUCCEEDED)
+        self.assertEqual(finished['result']['total_records'], 15)
+        self.assertEqual(finished['progress']['pages'], 1)
+        self.assertEqual(finished['params'], {'max_pages': 1})
+        self.assertEqual(self.saved, [15])
+
+    def test_duplicate_requests_coalesce(self):
+        """测试相同的未完成任务合并，不同地区或不同参数不合并"""
+        first, _ = self.queue.submit('seed_trade', 'price', '全国', max_pages=1)
+        second, coalesced = self.queue.submit('seed_trade', 'price', '全国', max_pages=1)
+        other, other_coalesced = self.queue.submit('seed_trade', 'price', '山东', max_pages=1)
+        deeper, deeper_coalesced = self.queue.submit('seed_trade', 'price', '全国', max_pages=2)
+
+        self.assertTrue(coalesced)
+        self.assertEqual(first['job_id'], second['job_id'])
+        self.assertFalse(other_coalesced)
+        self.assertNotEqual(first['job_id'], other['job_id'])
+        self.assertFalse(deeper_coalesced)
+        self.assertEqual(deeper['params'], {'max_pages': 2})
+
+        self.assertEqual(self.queue.wait(first['job_id'], timeout=10)['submissions'], 2)
+        self.queue.wait(other['job_id'], timeout=10)
+        self.assertEqual(self.queue.wait(deeper['job_id'], timeout=10)['result']['total_records'], 30)
+        self.assertEqual(len(self.saved), 3)
+
+        # 任务结束后再次提交会创建新任务
+        again, coalesced = self.queue.submit('seed_trade', 'price', '全国', max_pages=1)
+        self.assertFalse(coalesced)
+        self.queue.wait(again['job_id'], timeout=10)
+        self.assertEqual(self.queue.get_stats()[SUCCEEDED], 4)
+
+    def test_events_stream_each_page(self):
+        """测试订阅者逐页收到进度事件（含字节数与耗时），最后收到结束事件"""
+        job, _ = self.queue.submit('seed_trade', 'price', max_pages=2)
+        events = [item for item in self.queue.iter_events(job['job_id'], heartbeat=0.1) if item]
+
+        self.assertEqual([event['event'] for _, event in events], ['page', 'page', 'done'])
+        self.assertEqual([event_id for event_id, _ in events], [1, 2, 3])
+        first = events[0][1]['data']
+        self.assertEqual((first['pages'], first['page_records'], first['status']), (1, 15, 200))
+        self.assertGreater(first['page_bytes'], 0)
+        self.assertGreaterEqual(first['fetch_ms'], 300)
+        self.assertFalse(first['page_fallback'])
+        self.assertEqual(events[1][1]['data']['bytes'], 2 * first['page_bytes'])
+
+        done = events[-1][1]['data']
+        self.assertEqual((done['status'], done['result']['total_records']), (SUCCEEDED, 30))
+
+        # 断线重连时从指定序号之后续读
+        replay = [item for item in self.queue.iter_events(job['job_id'], after=2) if item]
+        self.assertEqual([(event_id, event['event']) for event_id, event in replay], [(3, 'done')])
+        message = format_sse(*replay[0])
+        self.assertTrue(message.startswith('id: 3\nevent: done\ndata: {'))
+        self.assertTrue(message.endswith('\n\n'))
+
+    def test_events_for_expired_job(self):
+        """测试事件已淘汰的任务只返回最终状态"""
+        self.queue.event_history = 1
+        first, _ = self.queue.submit('seed_trade', 'price', max_pages=1)
+        self.queue.wait(first['job_id'], timeout=10)
+        second, _ = self.queue.submit('seed_trade', 'price', '山东', max_pages=1)
+
+        events = list(self.queue.iter_events(first['job_id']))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0][1]['data']['status'], SUCCEEDED)
+        self.assertEqual(list(self.queue.iter_events('missing')), [])
+        self.queue.wait(second['job_id'], timeout=10)
+
+    def test_other_live_workers_share_jobs(self):
+        """测试另一个仍在运行的 worker 启动时不中断已有任务，并通过任务表合并重复请求"""
+        self.queue.shutdown()
+        self.queue = CrawlJobQueue(self.manager, self.path, max_workers=1)
+        running, _ = self.queue.submit('seed_trade', 'price', '山东', max_pages=1)
+        pending, _ = self.queue.submit('seed_trade', 'price', '河北', max_pages=1)
+
+        other = CrawlJobQueue(self.manager, self.path)
+        try:
+            self.assertIn(other.get(pending['job_id'])['status'], (QUEUED, RUNNING))
+            duplicate, coalesced = other.submit('seed_trade', 'price', '河北', max_pages=1)
+            self.assertTrue(coalesced)
+            self.assertEqual(duplicate['job_id'], pending['job_id'])
+            self.assertEqual(duplicate['owner'], self.queue.owner)
+
+            finished = other.wait(pending['job_id'], timeout=10)
+            self.assertEqual((finished['status'], finished['submissions']), (SUCCEEDED, 2))
+            self.assertEqual(self.queue.get(running['job_id'])['status'], SUCCEEDED)
+        finally:
+            other.shutdown()
+        self.assertEqual(len(self.saved), 2)
+
+    def test_events_for_job_in_other_worker(self):
+        """测试订阅其他 worker 执行的任务时，按任务表中的进度产出 page 事件，结束时产出 done 事件"""
+        job, _ = self.queue.submit('seed_trade', 'price', max_pages=2)
+        other = CrawlJobQueue(self.manager, self.path)
+        try:
+            items = list(other.iter_events(job['job_id'], heartbeat=0.1, poll_interval=0.02))
+        finally:
+            other.shutdown()
+
+        events = [item for item in items if item]
+        self.assertEqual(events[-1][1]['event'], 'done')
+        self.assertEqual(events[-1][1]['data']['status'], SUCCEEDED)
+        pages = [(event_id, event['data']['pages']) for event_id, event in events if event['event'] == 'page']
+        self.assertTrue(pages)
+        self.assertEqual([event_id for event_id, _ in pages], [count for _, count in pages])
+        self.assertEqual(pages[-1][1], 2)
+        self.assertEqual(events[-1][0], 3)
+
+    def test_heartbeat_keeps_jobs_alive(self):
+        """测试运行中的任务持续续写心跳，不会被其他 worker 判定为中断"""
+        self.queue.shutdown()
+        self.queue = CrawlJobQueue(self.manager, self.path, max_workers=1, heartbeat_interval=0.05,
+                                   stale_after=0.5)
+        first, _ = self.queue.submit('seed_trade', 'price', '山东', max_pages=2)
+        second, _ = self.queue.submit('seed_trade', 'price', '河北', max_pages=2)
+        self.assertEqual(self.queue.wait(first['job_id'], timeout=10)['status'], SUCCEEDED)
+        # 第二个任务排队超过 stale_after，心跳仍在续写
+        other = CrawlJobQueue(self.manager, self.path, stale_after=0.5)
+        try:
+            self.assertIn(other.get(second['job_id'])['status'], (QUEUED, RUNNING))
+        finally:
+            other.shutdown()
+        self.assertEqual(self.queue.wait(second['job_id'], timeout=10)['status'], SUCCEEDED)
+
+    def test_interrupted_jobs_fail_on_restart(self):
+        """测试重启后上次未完成的任务标记为失败，历史任务仍可查询"""
+        done, _ = self.queue.submit('seed_trade', 'price', max_pages=1)
+        self.queue.wait(done['job_id'], timeout=10)
+
+        # 单个工作线程被占用时，后提交的任务处于排队状态
+        self.queue.shutdown()
+        self.queue = CrawlJobQueue(self.manager, self.path, max_workers=1)
+        running, _ = self.queue.submit('seed_trade', 'price', '山东', max_pages=1)
+        pending, _ = self.queue.submit('seed_trade', 'price', '河北', max_pages=1)
+
+        # 模拟上一个进程已退出：心跳超过 stale_after 未更新
+        restarted = CrawlJobQueue(self.manager, self.path, stale_after=60, clock=lambda: time.time() + 61)
+        try:
+            self.assertEqual(restarted.get(done['job_id'])['status'], SUCCEEDED)
+            interrupted = restarted.get(pending['job_id'])
+            self.assertEqual(interrupted['status'], FAILED)
+            self.assertEqual(interrupted['error'], '服务重启，任务中断')
+            self.assertIsNone(restarted.get('missing'))
+        finally:
+            restarted.shutdown()
+
+        # 被标记为中断的排队任务不会再执行
+        self.queue.wait(running['job_id'], timeout=10)
+        self.assertEqual(self.queue.get(pending['job_id'])['status'], FAILED)
+        events = list(self.queue.iter_events(pending['job_id']))
+        self.assertEqual(events[-1][1]['data']['status'], FAILED)
+        self.assertEqual(len(self.saved), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 增量采集测试
+验证页面指纹、记录去重、指纹过期、入库提交后才登记指纹以及遇到已采集数据时停止翻页
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawl_state import CrawlState, content_fingerprint, record_fingerprint
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.rate_limiter import HostRateLimiter
+from data_crawler.stub_server import StubServer
+
+FIXTURE_DIR = project_root / 'tests' / 'fixtures' / 'html'
+LIST_PATHS = [
+    '/supply/list_h_26_s_997.html',
+    '/supply/list_h_26_p_2_s_997.html',
+    '/supply/list_h_26_p_3_s_997.html',
+]
+
+
+class TestCrawlState(unittest.TestCase):
+    """CrawlState 测试"""
+
+    def setUp(self):
+        self.now = [1000000.0]
+        self.state = CrawlState(':memory:', max_age=86400, clock=lambda: self.now[0])
+
+    def test_record_filter_keeps_date(self):
+        """测试记录只在登记后才被过滤，种子记录指纹包含日期"""
+        state = self.state
+        record = {'product_name': '玉米种子', 'price': 2.5, 'date': '2025-09-01'}
+        self.assertEqual(state.filter_new_records('seed_trade', [record, dict(record)]), [record])
+        # 只比较不登记，入库前再次采集仍是新记录
+        self.assertEqual(state.filter_new_records('seed_trade', [record]), [record])
+        state.mark_records('seed_trade', [record_fingerprint(record)])
+        self.assertEqual(state.filter_new_records('seed_trade', [record]), [])
+        # 内容不变的列表第二天仍产生当天的价格记录
+        next_day = dict(record, date='2025-09-02')
+        self.assertEqual(state.filter_new_records('seed_trade', [next_day]), [next_day])
+        self.assertEqual(len(state.filter_new_records('weather', [record])), 1)
+        self.assertNotEqual(record_fingerprint(record), record_fingerprint(dict(record, price=2.6)))
+
+    def test_fingerprints_expire(self):
+        """测试指纹过期后记录和页面重新视为新内容，过期记录指纹被清理"""
+        state = self.state
+        record = {'region': '北京', 'date': '2025-09-01', 'temperature': 20.0}
+        state.mark_records('weather', [record_fingerprint(record)])
+        state.mark_page('http://a/1', content_fingerprint(b'<html>1</html>'))
+        self.now[0] += 3600
+        state.mark_page('http://a/1', content_fingerprint(b'<html>1</html>'))  # 内容未变化，不延长有效期
+        self.assertEqual(state.filter_new_records('weather', [record]), [])
+        self.assertFalse(state.page_changed('http://a/1', b'<html>1</html>'))
+
+        self.now[0] += 86400
+        self.assertEqual(state.filter_new_records('weather', [record]), [record])
+        self.assertTrue(state.page_changed('http://a/1', b'<html>1</html>'))
+        state.mark_records('weather', [])
+        self.assertEqual(state.get_stats()['tracked_records'], 0)
+
+    def test_page_fingerprint(self):
+        """测试页面内容指纹"""
+        state = self.state
+        self.assertTrue(state.page_changed('http://a/1', b'<html>1</html>'))
+        state.mark_page('http://a/1', content_fingerprint(b'<html>1</html>'))
+        self.assertFalse(state.page_changed('http://a/1', b'<html>1</html>'))
+        self.assertTrue(state.page_changed('http://a/1', b'<html>2</html>'))
+        self.assertEqual(state.get_stats()['pages_unchanged'], 1)
+
+    def test_pending_marks_follow_commits(self):
+        """测试只登记已提交的记录，页面在其记录全部提交后才登记"""
+        pending = self.state.pending('weather')
+        first = [{'region': '北京', 'date': f'2025-09-0{i}'} for i in (1, 2, 3)]
+        pending.add_records(first)
+        pending.add_page('http://a/1', 'h1')
+        pending.add_records([{'region': '上海', 'date': '2025-09-01'}])
+        pending.add_page('http://a/2', 'h2')
+
+        pending.commit(2)
+        self.assertEqual(self.state.filter_new_records('weather', first), first[2:])
+        self.assertEqual(self.state.get_stats()['tracked_pages'], 0)
+        pending.commit(1)
+        self.assertEqual(self.state.get_stats()['tracked_pages'], 1)
+        pending.commit(1)
+        self.assertEqual(self.state.get_stats()['tracked_pages'], 2)
+
+
+class TestIncrementalCrawl(unittest.TestCase):
+    """增量采集流程测试"""
+
+    def setUp(self):
+        pages = {path: (FIXTURE_DIR / f'seed_trade_list_p{n}.html').read_bytes()
+                 for n, path in enumerate(LIST_PATHS, start=1)}
+        self.server = StubServer(pages).start()
+        self.manager = CrawlerManager(http_cache=False, crawl_state=CrawlState(':memory:'), page_archive=False,
+                                      circuit_breaker=False)
+        self.manager.rate_limiter = HostRateLimiter(default_rate_per_hour=3600000, burst=100)
+        self.manager.supported_websites['seed_trade']['base_url'] = self.server.base_url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def crawl(self, fail_after=None):
+        """增量采集入库（替身入库按 10 条一块提交，fail_after 条之后的块提交失败）"""
+        events, saved = [], []
+
+        def fake_save(records, website, data_type, chunk_size=None, on_commit=None):
+            chunk = []
+            for record in records:
+                chunk.append(record)
+                if len(chunk) == 10:
+                    commit(chunk)
+                    chunk = []
+            if chunk:
+                commit(chunk)
+            return len(saved)
+
+        def commit(chunk):
+            if fail_after is not None and len(saved) + len(chunk) > fail_after:
+                raise RuntimeError('database is locked')
+            saved.extend(chunk)
+            on_commit_holder[0](len(chunk))
+
+        on_commit_holder = [None]
+
+        def save(records, website, data_type, chunk_size=None, on_commit=None):
+            on_commit_holder[0] = on_commit
+            try:
+                return fake_save(records, website, data_type)
+            except RuntimeError:
+                return len(saved)  # 与 _save_to_database 一样吞掉入库错误
+
+        self.manager._save_to_database = save
+        self.manager.crawl_to_database('seed_trade', 'price', incremental=True, progress_callback=events.append)
+        return saved, events
+
+    def test_second_run_only_returns_new_data(self):
+        """测试第二次采集不重复返回数据，也不使用后备数据"""
+        first, _ = self.crawl()
+        self.assertEqual(len(first), 45)
+
+        second, events = self.crawl()
+        self.assertEqual(second, [])
+        self.assertFalse(events[-1]['fallback'])
+        # 第一页内容未变化且没有新记录，不再继续翻页
+        self.assertEqual(self.server.count(LIST_PATHS[1]), 1)
+
+    def test_changed_page_yields_only_new_rows(self):
+        """测试页面变化后只返回新增记录"""
+        self.crawl()
+        page = (FIXTURE_DIR / 'seed_trade_list_p1.html').read_text(encoding='utf-8')
+        new_row = ('<tr><th>产品名称</th><th>价格</th><th>产地</th><th>发布时间</th></tr>'
+                   '<tr><td><a title="t">京科968玉米种子（吉林直供）</a></td><td>15.5元/斤</td><td>吉林</td></tr>')
+        self.server.set_page(LIST_PATHS[0], page.replace(
+            '<tr><th>产品名称</th><th>价格</th><th>产地</th><th>发布时间</th></tr>', new_row, 1))
+
+        records, _ = self.crawl()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['product_name'], '京科968玉米种子（吉林直供）')
+        self.assertEqual(records[0]['price'], 15.5)
+
+    def test_full_crawl_is_unaffected(self):
+        """测试非增量采集仍返回全部数据"""
+        self.crawl()
+        records = list(self.manager.iter_crawl('seed_trade', 'price'))
+        self.assertEqual(len(records), 45)
+
+    def test_failed_save_is_not_marked(self):
+        """测试入库失败的记录和页面不登记，下次采集重新入库"""
+        first, _ = self.crawl(fail_after=20)
+        self.assertEqual(len(first), 20)
+
+        second, _ = self.crawl()
+        self.assertEqual(len(second), 25)
+        self.assertEqual({r['product_name'] for r in first} | {r['product_name'] for r in second},
+                         {r['product_name'] for r in list(self.manager.iter_crawl('seed_trade', 'price'))})
+        third, _ = self.crawl()
+        self.assertEqual(third, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 爬虫并发引擎测试
+验证 crawl_many 的任务分发与按主机的礼貌性控制
+"""
+
+import unittest
+import sys
+import time
+import threading
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.rate_limiter import HostRateLimiter
+
+
+class TestCrawlMany(unittest.TestCase):
+    """crawl_many 并发任务测试"""
+
+    def setUp(self):
+        self.manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                      circuit_breaker=False)
+        # 每主机 5 次/秒、无突发，相邻请求间隔 0.2 秒
+        self.manager.rate_limiter = HostRateLimiter(default_rate_per_hour=18000, burst=1)
+
+    def test_results_follow_job_order(self):
+        """测试结果顺序与任务顺序一致"""
+        calls = []
+
+        def fake_crawl(website, data_type, region='全国', **kwargs):
+            calls.append((website, data_type, region, kwargs))
+            return {'success': True, 'data': {'website': website}}
+
+        self.manager.crawl_data = fake_crawl
+        results = self.manager.crawl_many([
+            ('seed_trade', 'price'),
+            {'website': 'weather', 'data_type': 'weather_forecast', 'region': '北京', 'max_pages': 1},
+            ('farm_machine', 'product_info', '山东'),
+        ])
+
+        self.assertEqual([r['job']['website'] for r in results], ['seed_trade', 'weather', 'farm_machine'])
+        self.assertEqual(results[0]['job']['region'], '全国')
+        self.assertIn(('weather', 'weather_forecast', '北京', {'max_pages': 1}), calls)
+        self.assertTrue(all(r['result']['success'] for r in results))
+
+    def test_same_host_requests_are_spaced(self):
+        """测试同一主机的请求保持间隔"""
+        started = []
+
+        def hit(url):
+            with self.manager._host_slot(url):
+                started.append(time.monotonic())
+
+        threads = [threading.Thread(target=hit, args=('http://a.example/p%d' % i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        started.sort()
+        gaps = [b - a for a, b in zip(started, started[1:])]
+        self.assertTrue(all(gap >= 0.18 for gap in gaps), gaps)
+
+    def test_different_hosts_run_in_parallel(self):
+        """测试不同主机的请求互不阻塞"""
+        started = []
+
+        def hit(url):
+            with self.manager._host_slot(url):
+                started.append(time.monotonic())
+                time.sleep(0.1)
+
+        threads = [threading.Thread(target=hit, args=('http://host%d.example/' % i,)) for i in range(4)]
+        begin = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLess(time.monotonic() - begin, 0.3)
+        self.assertEqual(len(started), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
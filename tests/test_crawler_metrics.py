@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 爬虫指标测试
+验证直方图与 Prometheus 导出，以及采集过程中各阶段耗时、重试、429 和后备数据的统计
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.metrics import CrawlMetrics, Histogram
+from data_crawler.rate_limiter import HostRateLimiter
+from data_crawler.transport import RequestsTransport
+from data_crawler.stub_server import StubServer
+
+FIXTURE_DIR = project_root / 'tests' / 'fixtures' / 'html'
+
+
+class TestCrawlMetrics(unittest.TestCase):
+    """CrawlMetrics 测试"""
+
+    def test_histogram_quantiles(self):
+        """测试分位数按桶上界估算，溢出桶取最大值"""
+        histogram = Histogram((10, 100, 1000))
+        for value in [5] * 50 + [50] * 45 + [5000] * 5:
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual((snapshot['count'], snapshot['min'], snapshot['max']), (100, 5, 5000))
+        self.assertEqual((snapshot['p50'], snapshot['p95'], snapshot['p99']), (10, 100, 5000))
+        self.assertEqual(snapshot['buckets'], {10: 50, 100: 95, 1000: 95})
+
+    def test_snapshot_and_prometheus(self):
+        """测试按标签区分的计数器和直方图导出"""
+        metrics = CrawlMetrics()
+        metrics.inc('retries_total', 2, website='weather')
+        metrics.inc('retries_total', website='seed_trade')
+        metrics.observe('parse_ms', 12.5, website='weather')
+        with metrics.timer('db_write_ms'):
+            pass
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['counters']['retries_total'], {'website=seed_trade': 1, 'website=weather': 2})
+        self.assertEqual(snapshot['histograms']['parse_ms']['website=weather']['count'], 1)
+        self.assertIn('', snapshot['histograms']['db_write_ms'])
+
+        text = metrics.render_prometheus()
+        self.assertIn('# TYPE agridec_crawler_retries_total counter', text)
+        self.assertIn('agridec_crawler_retries_total{website="weather"} 2', text)
+        self.assertIn('agridec_crawler_parse_ms_bucket{website="weather",le="25"} 1', text)
+        self.assertIn('agridec_crawler_parse_ms_count{website="weather"} 1', text)
+
+
+class TestCrawlInstrumentation(unittest.TestCase):
+    """采集过程指标测试"""
+
+    def setUp(self):
+        self.manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                      circuit_breaker=False, transport=RequestsTransport())
+        self.manager.metrics = CrawlMetrics()
+        self.manager.rate_limiter = HostRateLimiter(default_rate_per_hour=3600000, burst=100)
+        self.manager.crawl_config['backoff_base'] = 0.01
+        self.manager._save_to_database = lambda records, website, data_type, **kwargs: len(list(records))
+
+    def tearDown(self):
+        self.manager.transport.close()
+
+    def test_stage_timings_and_counters(self):
+        """测试每页的阶段耗时、记录数，以及 429 / 5xx 重试计数进入任务结果和进程级指标"""
+        pages = {f'/supply/list_h_26{suffix}_s_997.html': (FIXTURE_DIR / f'seed_trade_list_p{n}.html').read_bytes()
+                 for n, suffix in ((1, ''), (2, '_p_2'), (3, '_p_3'))}
+        with StubServer(pages, latency=0.02, throttle_rate=0.3, failure_rate=0.2, retry_after=0,
+                        seed=7, keep_alive=True) as server:
+            self.manager.supported_websites['seed_trade']['base_url'] = server.base_url
+            result = self.manager.crawl_to_database('seed_trade', 'price', max_pages=3)
+
+        self.assertTrue(result['success'])
+        counters, histograms = result['metrics']['counters'], result['metrics']['histograms']
+        label = 'website=seed_trade'
+        throttled = sum(1 for _, status in server.requests if status == 429)
+        server_errors = sum(1 for _, status in server.requests if status == 500)
+
+        self.assertEqual(counters['pages_total'][label], 3)
+        self.assertEqual(counters['records_total'][label], 45)
+        self.assertEqual(counters['requests_total'][label], len(server.requests))
+        self.assertEqual(counters['throttled_total'][label], throttled)
+        self.assertEqual(counters['server_errors_total'][label], server_errors)
+        self.assertEqual(counters['retries_total'][label], throttled + server_errors)
+        self.assertEqual(counters['db_rows_total'][label], 45)
+
+        self.assertEqual(histograms['records_per_page'][label]['p50'], 15)
+        for stage in ('ttfb_ms', 'download_ms', 'fetch_ms', 'parse_ms'):
+            self.assertEqual(histograms[stage][label]['count'], 3, stage)
+        self.assertGreaterEqual(histograms['ttfb_ms'][label]['min'], 20)
+        self.assertGreaterEqual(histograms['connect_ms'][label]['count'], 1)
+        self.assertEqual(histograms['db_write_ms'][label]['count'], 1)
+
+        # 进程级指标同样累加
+        self.assertEqual(self.manager.metrics.counter('records_total', website='seed_trade'), 45)
+
+    def test_fallback_activation_is_counted(self):
+        """测试所有页面失败、启用后备数据时记录失败页面和后备次数"""
+        with StubServer({}) as server:
+            self.manager.supported_websites['seed_trade']['base_url'] = server.base_url
+            result = self.manager.crawl_data('seed_trade', 'price')
+
+        counters = result['data']['metadata']['metrics']['counters']
+        self.assertEqual(counters['fallback_total']['website=seed_trade'], 1)
+        self.assertEqual(counters['page_failures_total']['website=seed_trade'], 1)
+        self.assertNotIn('pages_total', counters)
+
+
+if __name__ == '__main__':
+    unittest.main()
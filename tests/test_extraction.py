@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 爬虫字段提取测试
+验证价格、地区、温度等字段的一次扫描提取
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.extraction import (
+    PROVINCES, KeywordTrie, extract_seed_fields, extract_machine_fields,
+    extract_region, extract_temperature, clean_weather_text
+)
+
+
+class TestExtraction(unittest.TestCase):
+    """字段提取测试"""
+
+    def test_all_provinces_are_recognized(self):
+        """测试 34 个省级行政区都能被识别"""
+        self.assertEqual(len(PROVINCES), 34)
+        for province in PROVINCES:
+            self.assertEqual(extract_region(f'产地：{province}省直供'), province)
+
+    def test_trie_prefers_earliest_then_longest(self):
+        """测试字典树优先返回最靠前、同位置最长的关键词"""
+        trie = KeywordTrie(['江', '黑龙江', '龙江'])
+        self.assertEqual(trie.find_first('产自黑龙江'), '黑龙江')
+        self.assertIsNone(trie.find_first('无匹配'))
+        self.assertEqual(extract_region('河南郑州发往北京'), '河南')
+
+    def test_seed_fields(self):
+        """测试种子价格与地区提取"""
+        self.assertEqual(extract_seed_fields('先玉335 12.5元/斤 山东'), (12.5, '山东'))
+        self.assertEqual(extract_seed_fields('价格：9.8 内蒙古赤峰'), (9.8, '内蒙古'))
+        self.assertEqual(extract_seed_fields('￥ 3 包邮'), (3.0, None))
+        self.assertEqual(extract_seed_fields('面议'), (None, None))
+
+    def test_machine_fields(self):
+        """测试农机价格（万元换算）与型号提取"""
+        self.assertEqual(extract_machine_fields('报价：￥12.5万', '雷沃M1004拖拉机'), (125000.0, 'M1004'))
+        self.assertEqual(extract_machine_fields('售价 86000元', '久保田收割机'), (86000.0, None))
+        self.assertEqual(extract_machine_fields('电话咨询', 'X-200'), (None, 'X-200'))
+
+    def test_weather_helpers(self):
+        """测试温度与天气描述提取"""
+        self.assertEqual(extract_temperature('23/14℃'), 23)
+        self.assertEqual(extract_temperature('-5℃'), -5)
+        self.assertIsNone(extract_temperature('暂无'))
+        self.assertEqual(clean_weather_text('多云 转 晴 3级'), '多云转晴级')
+
+
+if __name__ == '__main__':
+    unittest.main()
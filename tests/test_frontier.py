@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 爬取边界测试
+验证优先级出队、已访问集合、深度上限和按规则发现翻页链接
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.frontier import CrawlFrontier, LinkRule, discover_links
+from data_crawler.rate_limiter import HostRateLimiter
+from data_crawler.stub_server import StubServer
+
+FIXTURE_DIR = project_root / 'tests' / 'fixtures' / 'html'
+
+
+def page(url, priority=0, depth=0):
+    return {'url': url, 'context': url, 'label': url, 'priority': priority, 'depth': depth}
+
+
+class TestCrawlFrontier(unittest.TestCase):
+    """CrawlFrontier 测试"""
+
+    def test_priority_order_and_visited_set(self):
+        """测试高优先级先出队，同优先级按加入顺序，重复URL只加入一次"""
+        frontier = CrawlFrontier()
+        frontier.add(page('http://a/low', priority=1))
+        frontier.add(page('http://a/high', priority=9))
+        frontier.add(page('http://a/low2', priority=1))
+        self.assertFalse(frontier.add(page('http://a/high#top', priority=5)))
+
+        self.assertEqual([p['url'] for p in frontier.pop_batch(10)],
+                         ['http://a/high', 'http://a/low', 'http://a/low2'])
+        self.assertEqual(len(frontier), 0)
+
+    def test_links_respect_depth_limit(self):
+        """测试发现的链接作为子页面加入，超过深度上限的不再加入"""
+        frontier = CrawlFrontier(max_depth=1)
+        rule = LinkRule(r'/list_\d+\.html$', priority=3, paginated=True)
+        parent = page('http://a/list_1.html')
+        parent['links'] = [('http://a/list_2.html', rule)]
+        self.assertEqual(frontier.add_links(parent), 1)
+
+        child = frontier.pop_batch(1)[0]
+        self.assertEqual((child['depth'], child['priority'], child['context']), (1, 3, 'http://a/list_2.html'))
+        self.assertTrue(child['paginated'])
+
+        child['links'] = [('http://a/list_3.html', rule)]
+        self.assertEqual(frontier.add_links(child), 0)
+
+    def test_children_do_not_inherit_fetch_fields(self):
+        """测试子页面只继承任务字段，不带父页面抓取时写入的状态、字节数和耗时"""
+        frontier = CrawlFrontier()
+        parent = page('http://a/list_1.html')
+        parent.update(parser='_parse_seed_trade_page', page_type='seed_trade', incremental=True,
+                      status=200, bytes=2048, cached=False, fetch_ms=120.5, parse_ms=8.2,
+                      content_hash='abc', request_stats={'requests': 1},
+                      links=[('http://a/list_2.html', LinkRule(r'/list_\d+\.html$'))])
+        frontier.add_links(parent)
+
+        child = frontier.pop_batch(1)[0]
+        self.assertEqual(set(child), {'url', 'parser', 'context', 'page_type', 'label', 'paginated',
+                                      'depth', 'priority', 'incremental'})
+        self.assertEqual((child['parser'], child['page_type'], child['incremental']),
+                         ('_parse_seed_trade_page', 'seed_trade', True))
+
+    def test_discover_links_filters_by_rule_and_host(self):
+        """测试只发现匹配规则的同站链接"""
+        content = (b'<a href="/list_2.html">2</a><a href="list_3.html#x">3</a>'
+                   b'<a href="http://other/list_4.html">4</a><a href="/detail/1.html">d</a>')
+        links = discover_links(content, 'http://a/list_1.html', [LinkRule(r'/list_\d+\.html$')])
+        self.assertEqual([url for url, _ in links], ['http://a/list_2.html', 'http://a/list_3.html'])
+
+
+class TestFrontierCrawl(unittest.TestCase):
+    """按爬取边界采集测试"""
+
+    def setUp(self):
+        fixtures = [(FIXTURE_DIR / f'seed_trade_list_p{n}.html').read_bytes() for n in (1, 2, 3)]
+        pages = {'/supply/list_h_26_s_997.html': fixtures[0]}
+        for number in range(2, 11):
+            pages[f'/supply/list_h_26_p_{number}_s_997.html'] = fixtures[(number - 1) % 3]
+        self.server = StubServer(pages).start()
+        self.manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                      circuit_breaker=False)
+        self.manager.rate_limiter = HostRateLimiter(default_rate_per_hour=3600000, burst=100)
+        self.manager.supported_websites['seed_trade']['base_url'] = self.server.base_url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_pagination_is_discovered(self):
+        """测试从种子页面发现翻页链接，按页码顺序抓取到 max_pages 为止"""
+        events = []
+        records = list(self.manager.iter_crawl('seed_trade', 'price', max_pages=6, progress_callback=events.append))
+
+        self.assertEqual(len(records), 90)
+        self.assertEqual([e['url'] for e in events], [
+            self.server.url('/supply/list_h_26_s_997.html')
+        ] + [self.server.url(f'/supply/list_h_26_p_{n}_s_997.html') for n in range(2, 7)])
+        self.assertEqual(self.server.count('/supply/list_h_26_p_1_s_997.html'), 0)
+        self.assertEqual(self.server.count('/supply/list_h_26_p_9_s_997.html'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
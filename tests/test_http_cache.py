@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 爬虫HTTP缓存测试
+使用本地替身服务器验证条件请求、解析结果复用与LRU淘汰
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.http_cache import HttpCache
+from data_crawler.rate_limiter import HostRateLimiter
+from data_crawler.stub_server import StubServer
+
+SEED_PAGE = """
+<html><body><table>
+<tr><th>产品</th><th>价格</th></tr>
+<tr><td><a title="t">先玉335玉米种子</a></td><td>12.5元/斤 山东</td></tr>
+<tr><td><a title="t">郑单958玉米种子</a></td><td>价格：9.8 河南</td></tr>
+<tr><td><a title="t">济麦22小麦种子</a></td><td>￥3.2 河北</td></tr>
+</table></body></html>
+"""
+
+
+class TestHttpCache(unittest.TestCase):
+    """条件请求缓存测试"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.server = StubServer({'/supply/list.html': SEED_PAGE}).start()
+        self.manager = CrawlerManager(http_cache=HttpCache(os.path.join(self.tmp_dir, 'cache.db')),
+                                      crawl_state=False, page_archive=False, circuit_breaker=False)
+        self.manager.rate_limiter = HostRateLimiter(default_rate_per_hour=360000)
+
+        self.parse_calls = 0
+        original_parser = self.manager._parse_seed_trade_page
+
+        def _parse_seed_trade_page(soup, source_url):
+            self.parse_calls += 1
+            return original_parser(soup, source_url)
+
+        self.parser = _parse_seed_trade_page
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_not_modified_reuses_parse_result(self):
+        """测试 304 响应直接复用缓存的解析结果"""
+        url = self.server.url('/supply/list.html')
+        first = self.manager._fetch_and_parse(url, self.parser, url)
+        second = self.manager._fetch_and_parse(url, self.parser, url)
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(first, second)
+        self.assertEqual(self.parse_calls, 1)
+        self.assertEqual(self.server.count('/supply/list.html', 200), 1)
+        self.assertEqual(self.server.count('/supply/list.html', 304), 1)
+
+        stats = self.manager.http_cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['parse_reuses']), (1, 1, 1))
+
+    def test_changed_page_is_downloaded_again(self):
+        """测试页面变化后重新下载并解析"""
+        url = self.server.url('/supply/list.html')
+        self.manager._fetch_and_parse(url, self.parser, url)
+        self.server.set_page('/supply/list.html', SEED_PAGE.replace('12.5', '13.0'))
+        records = self.manager._fetch_and_parse(url, self.parser, url)
+
+        self.assertEqual(records[0]['price'], 13.0)
+        self.assertEqual(self.parse_calls, 2)
+        self.assertEqual(self.server.count('/supply/list.html', 200), 2)
+
+    def test_cache_persists_across_instances(self):
+        """测试缓存在新的缓存实例中仍然有效"""
+        url = self.server.url('/supply/list.html')
+        self.manager._fetch_and_parse(url, self.parser, url)
+
+        self.manager.http_cache = HttpCache(os.path.join(self.tmp_dir, 'cache.db'))
+        self.manager._fetch_and_parse(url, self.parser, url)
+        self.assertEqual(self.parse_calls, 1)
+        self.assertEqual(self.manager.http_cache.get_stats()['hits'], 1)
+
+    def test_lru_eviction_respects_size_limit(self):
+        """测试超出容量时淘汰最久未访问的条目"""
+        cache = HttpCache(':memory:', max_bytes=250)
+        cache.store('http://a/1', b'x' * 100, etag='"1"')
+        cache.store('http://a/2', b'x' * 100, etag='"2"')
+        cache.get('http://a/1')
+        cache.store('http://a/3', b'x' * 100, etag='"3"')
+
+        self.assertIsNotNone(cache.get('http://a/1'))
+        self.assertIsNone(cache.get('http://a/2'))
+        self.assertIsNotNone(cache.get('http://a/3'))
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 原始页面归档测试
+验证分段归档的写入、滚动、去重，以及不经网络的重新解析
+"""
+
+import multiprocessing
+import os
+import unittest
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.page_archive import PageArchive, reparse_archive
+from data_crawler.rate_limiter import HostRateLimiter
+from data_crawler.stub_server import StubServer
+
+FIXTURE_DIR = project_root / 'tests' / 'fixtures' / 'html'
+LIST_PATH = '/supply/list_h_26_s_997.html'
+
+
+def _append_pages(directory, worker, count):
+    """子进程中向同一归档目录写入页面"""
+    archive = PageArchive(directory, segment_max_bytes=2048)
+    for i in range(count):
+        content = (f'<html>{worker}-{i}</html>' + os.urandom(64).hex()).encode()
+        archive.append({'url': f'http://w{worker}/{i}', 'parser': '_parse_weather_page'}, content)
+
+
+class TestPageArchive(unittest.TestCase):
+    """PageArchive 测试"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_append_and_read_back(self):
+        """测试写入后按顺序读回，相同内容不重复归档，分段写满后滚动"""
+        archive = PageArchive(self.temp_dir.name, segment_max_bytes=32)
+        page = {'url': 'http://a/1', 'page_type': 'weather', 'parser': '_parse_weather_page', 'context': '北京'}
+
+        self.assertTrue(archive.append(page, b'<html>1</html>' * 10, fetched_at=100))
+        self.assertFalse(archive.append(page, b'<html>1</html>' * 10, fetched_at=200))
+        self.assertTrue(archive.append(page, b'<html>2</html>' * 10, fetched_at=300))
+
+        pages = list(archive.iter_pages())
+        self.assertEqual([content for _, content in pages], [b'<html>1</html>' * 10, b'<html>2</html>' * 10])
+        self.assertEqual(pages[0][0]['context'], '北京')
+        self.assertEqual(len(list(archive.iter_pages(since=200))), 1)
+        self.assertEqual(archive.get_stats()['segments'], 2)
+
+    def test_concurrent_processes_do_not_corrupt(self):
+        """测试多个进程同时写入同一目录时各自写独立分段，所有页面都能完整读回"""
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_append_pages, args=(self.temp_dir.name, w, 40)) for w in range(4)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(60)
+            self.assertEqual(process.exitcode, 0)
+
+        archive = PageArchive(self.temp_dir.name)
+        pages = list(archive.iter_pages())
+        self.assertEqual(len(pages), 160)
+        for page, content in pages:
+            worker, i = page['url'][len('http://w'):].split('/')
+            self.assertTrue(content.startswith(f'<html>{worker}-{i}</html>'.encode()))
+        segments = {name for name in os.listdir(self.temp_dir.name) if name.endswith('.seg')}
+        self.assertEqual(len({name.rsplit('-', 1)[1] for name in segments}), 4)
+
+    def test_retention_prunes_old_segments(self):
+        """测试按保留期和总大小整段删除最旧的归档"""
+        archive = PageArchive(self.temp_dir.name, segment_max_bytes=32)
+        for i in range(5):
+            archive.append({'url': f'http://a/{i}', 'parser': '_parse_weather_page'},
+                           os.urandom(64), fetched_at=1000 + i * 100)
+        self.assertEqual(archive.get_stats()['segments'], 5)
+
+        # 最新页面早于 1250 的分段过期
+        self.assertEqual(archive.prune(max_age=150, now=1400), {'segments': 3, 'pages': 3})
+        # 超出总大小时从最旧的分段开始删除，当前写入的分段保留
+        self.assertEqual(archive.prune(max_bytes=1)['segments'], 1)
+        self.assertEqual([page['url'] for page, _ in archive.iter_pages()], ['http://a/4'])
+        self.assertEqual(len([name for name in os.listdir(self.temp_dir.name) if name.endswith('.seg')]), 1)
+
+        # 构造参数中的保留期在打开归档和分段滚动时生效
+        reopened = PageArchive(self.temp_dir.name, max_age=1)
+        self.assertEqual(reopened.get_stats()['pages'], 0)
+
+    def test_crawl_archives_and_reparse_offline(self):
+        """测试采集时归档页面，服务停止后仍可重新解析出相同记录"""
+        server = StubServer({LIST_PATH: (FIXTURE_DIR / 'seed_trade_list_p1.html').read_bytes()}).start()
+        manager = CrawlerManager(http_cache=False, crawl_state=False,
+                                 page_archive=PageArchive(self.temp_dir.name), circuit_breaker=False)
+        manager.rate_limiter = HostRateLimiter(default_rate_per_hour=3600000, burst=100)
+        manager.supported_websites['seed_trade']['base_url'] = server.base_url
+        try:
+            crawled = list(manager.iter_crawl('seed_trade', 'price', max_pages=1))
+        finally:
+            server.stop()
+
+        reparsed = list(reparse_archive(manager, manager.page_archive))
+        self.assertEqual(len(reparsed), 1)
+        page, records = reparsed[0]
+        self.assertEqual(page['url'], server.url(LIST_PATH))
+        self.assertEqual([r['product_name'] for r in records], [r['product_name'] for r in crawled])
+
+    def test_reparse_uses_archived_fetch_date(self):
+        """测试重新解析的记录日期取归档时的抓取日期，而不是当前日期"""
+        archive = PageArchive(self.temp_dir.name)
+        fetched_at = datetime(2025, 3, 1, 8, 0).timestamp()
+        archive.append({'url': 'http://a/weather', 'page_type': 'weather', 'parser': '_parse_weather_page',
+                        'context': '北京'}, (FIXTURE_DIR / 'weather_101010100.shtml').read_bytes(),
+                       fetched_at=fetched_at)
+        archive.append({'url': 'http://a/seed', 'page_type': 'seed_trade', 'parser': '_parse_seed_trade_page',
+                        'context': 'http://a/seed'}, (FIXTURE_DIR / 'seed_trade_list_p1.html').read_bytes(),
+                       fetched_at=fetched_at)
+        manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False, circuit_breaker=False)
+
+        reparsed = {page['page_type']: records for page, records in reparse_archive(manager, archive)}
+        self.assertEqual({r['date'] for r in reparsed['seed_trade']}, {'2025-03-01'})
+        self.assertEqual([r['date'] for r in reparsed['weather']][:2], ['2025-03-01', '2025-03-02'])
+
+        # 显式的 fetched_at=0（固定语料）同样按归档时间而不是当前时间
+        epoch = PageArchive(os.path.join(self.temp_dir.name, 'epoch'))
+        epoch.append({'url': 'http://a/seed', 'page_type': 'seed_trade', 'parser': '_parse_seed_trade_page',
+                      'context': 'http://a/seed'}, (FIXTURE_DIR / 'seed_trade_list_p1.html').read_bytes(),
+                     fetched_at=0)
+        (page, records), = reparse_archive(manager, epoch)
+        self.assertEqual(page['fetched_at'], 0)
+        self.assertEqual({r['date'] for r in records}, {datetime.fromtimestamp(0).strftime('%Y-%m-%d')})
+
+
+if __name__ == '__main__':
+    unittest.main()
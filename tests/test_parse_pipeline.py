@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 抓取/解析流水线测试
+使用本地替身服务器验证进程池解析结果与逐页解析一致，
+以及解析进程重新导入 __main__ 时不会创建应用的采集组件
+"""
+
+import json
+import subprocess
+import tempfile
+import threading
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.pipeline import ParsePipeline
+from data_crawler.rate_limiter import HostRateLimiter
+from data_crawler.stub_server import StubServer
+
+FIXTURE_DIR = project_root / 'tests' / 'fixtures' / 'html'
+
+# 模拟 `python app.py`：__main__ 在导入时加载整个应用，在 __main__ 分支中启动解析进程池
+APP_MAIN_SCRIPT = """
+import json
+import sys
+sys.path.insert(0, {root!r})
+
+import app
+
+
+if __name__ == '__main__':
+    from data_crawler.crawler_manager import CrawlerManager
+    from tests.test_parse_pipeline import parse_worker_state
+    manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                             circuit_breaker=False, transport=False)
+    manager.crawl_config['parse_workers'] = 2
+    executor = manager._get_parse_executor()
+    states = [executor.submit(parse_worker_state).result() for _ in range(4)]
+    manager.close()
+    print(json.dumps({{'main': parse_worker_state(), 'workers': states}}))
+"""
+
+
+def parse_worker_state():
+    """在解析进程中检查重新导入 __main__ 后应用采集组件的状态"""
+    app = sys.modules.get('app')
+    return {
+        'app_imported': app is not None,
+        'crawler_manager': app is not None and app._crawler_manager is not None,
+        'crawl_jobs': app is not None and app._crawl_jobs is not None,
+        'threads': sorted(thread.name for thread in threading.enumerate())
+    }
+
+
+class TestParsePipeline(unittest.TestCase):
+    """ParsePipeline 测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        seed_page = (FIXTURE_DIR / 'seed_trade_list_p1.html').read_bytes()
+        cls.paths = [f'/supply/list_{n}.html' for n in range(10)]
+        cls.server = StubServer({path: seed_page for path in cls.paths}).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                      circuit_breaker=False)
+        self.manager.rate_limiter = HostRateLimiter(default_rate_per_hour=3600000, burst=100)
+        self.manager.crawl_config.update({'parse_workers': 2, 'pipeline_min_pages': 2,
+                                          'pipeline_queue_size': 2})
+        self.pages = [
+            self.manager._page_task(self.server.url(path), self.manager._parse_seed_trade_page,
+                                    self.server.url(path), 'seed_trade', '种子供应列表')
+            for path in self.paths
+        ]
+
+    def tearDown(self):
+        self.manager.close()
+
+    def test_pipeline_matches_inline_parsing(self):
+        """测试流水线解析结果与逐页解析一致"""
+        inline = {page['url']: records for page, records in self.manager._crawl_pages_inline(self.pages)}
+        piped = {page['url']: records for page, records in ParsePipeline(self.manager).run(self.pages)}
+
+        self.assertEqual(set(piped), set(inline))
+        for url, records in inline.items():
+            self.assertEqual(len(records), 15)
+            self.assertEqual(piped[url], records)
+
+    def test_crawl_pages_stops_at_max_pages(self):
+        """测试达到 max_pages 后提前结束流水线"""
+        results = list(self.manager._crawl_pages(self.pages, max_pages=3))
+        self.assertEqual(len(results), 3)
+
+    def test_failed_pages_are_reported(self):
+        """测试失败页面以 None 结果返回"""
+        self.manager.crawl_config['max_retries'] = 0
+        missing = self.manager._page_task(self.server.url('/missing.html'), self.manager._parse_seed_trade_page,
+                                          '', 'seed_trade', '缺失页面')
+        pipeline = ParsePipeline(self.manager)
+        results = {page['url']: records for page, records in pipeline.run([missing] + self.pages[:2])}
+        self.assertIsNone(results[missing['url']])
+        self.assertEqual(len([r for r in results.values() if r]), 2)
+
+
+
+class TestParseWorkerStartup(unittest.TestCase):
+    """解析进程启动测试"""
+
+    def test_app_main_reimport_has_no_crawler_side_effects(self):
+        """测试解析进程重新导入 app 时不创建爬虫管理器、任务队列和心跳线程"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            script = Path(temp_dir) / 'run_app.py'
+            script.write_text(APP_MAIN_SCRIPT.format(root=str(project_root)), encoding='utf-8')
+            completed = subprocess.run([sys.executable, str(script)], cwd=temp_dir, capture_output=True,
+                                       text=True, timeout=120)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        for state in [result['main']] + result['workers']:
+            self.assertTrue(state['app_imported'])
+            self.assertFalse(state['crawler_manager'])
+            self.assertFalse(state['crawl_jobs'])
+            self.assertNotIn('crawl-job-heartbeat', state['threads'])
+
+
+class TestParseWorkerStartup(unittest.TestCase):
+    """解析进程启动测试"""
+
+    def test_app_main_reimport_has_no_crawler_side_effects(self):
+        """测试解析进程重新导入 app 时不创建爬虫管理器、任务队列和心跳线程"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            script = Path(temp_dir) / 'run_app.py'
+            script.write_text(APP_MAIN_SCRIPT.format(root=str(project_root)), encoding='utf-8')
+            completed = subprocess.run([sys.executable, str(script)], cwd=temp_dir, capture_output=True,
+                                       text=True, timeout=120)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        for state in [result['main']] + result['workers']:
+            self.assertTrue(state['app_imported'])
+            self.assertFalse(state['crawler_manager'])
+            self.assertFalse(state['crawl_jobs'])
+            self.assertNotIn('crawl-job-heartbeat', state['threads'])
+
+
+if __name__ == '__main__':
+    unittest.main()
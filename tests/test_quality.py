@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 数据质量评估测试
+验证字段完整率、取值范围、重复率、过期率，以及跨批次累加与采集结果中的质量报告
+"""
+
+import unittest
+import sys
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.quality import QualityReport, assess_quality
+
+TODAY = date(2025, 9, 1)
+
+
+def weather(region, day, humidity=60, temperature=25, weather_text='晴'):
+    return {'region': region, 'date': day, 'temperature': temperature, 'weather': weather_text,
+            'humidity': humidity, 'wind_speed': 3.0}
+
+
+class TestQualityReport(unittest.TestCase):
+    """QualityReport 测试"""
+
+    def test_weather_batch(self):
+        """测试湿度越界、字段缺失、重复和过期数据分别计入报告"""
+        records = [
+            weather('北京', '2025-09-01'),
+            weather('北京', '2025-09-01'),                 # 重复
+            weather('上海', '2025-09-02', humidity=130),   # 湿度越界
+            weather('广州', '2025-08-20'),                 # 过期
+            weather('深圳', '2025-09-03', weather_text=''),  # 缺少天气
+        ]
+        report = assess_quality(records, 'weather', today=TODAY)
+
+        self.assertEqual(report['records'], 5)
+        self.assertEqual(report['valid_records'], 3)
+        self.assertEqual(report['score'], 0.84)
+        self.assertEqual(report['duplicate_rate'], 0.2)
+        self.assertEqual(report['stale_rate'], 0.2)
+        self.assertEqual(report['fields']['humidity'], {'completeness': 1.0, 'out_of_range': 1})
+        self.assertEqual(report['fields']['weather']['completeness'], 0.8)
+
+    def test_seed_price_must_be_positive(self):
+        """测试价格为 0、负数或非数字时视为越界，缺失字段计入完整率"""
+        base = {'product_name': '玉米种子', 'variety': '郑单958', 'unit': '元/斤', 'region': '山东',
+                'date': '2025-09-01', 'source_url': 'http://a'}
+        records = [dict(base, price=price, variety=f'v{i}') for i, price in enumerate([3.2, 0, -1, '面议', None])]
+        report = assess_quality(records, 'seed_trade', today=TODAY)
+
+        self.assertEqual(report['fields']['price'], {'completeness': 0.8, 'out_of_range': 3})
+        self.assertEqual(report['valid_records'], 1)
+        self.assertEqual(report['duplicate_rate'], 0.0)
+
+    def test_batches_accumulate(self):
+        """测试逐批累加的结果与一次性评估一致，跨批次重复也能识别"""
+        records = [weather(f'城市{i % 40}', f'2025-09-{i // 40 % 5 + 1:02d}', humidity=i % 120) for i in range(300)]
+        quality = QualityReport('weather', today=TODAY)
+        for start in range(0, len(records), 70):
+            quality.add(records[start:start + 70])
+        quality.add([])
+
+        self.assertEqual(quality.report(), assess_quality(pd.DataFrame(records), 'weather', today=TODAY))
+        self.assertEqual(quality.report()['duplicate_rate'], round(100 / 300, 4))
+
+    def test_empty_and_unknown_website(self):
+        """测试空批次与没有规则的站点"""
+        self.assertEqual(assess_quality([], 'weather')['score'], 0.0)
+        report = assess_quality([{'a': 1, 'b': ''}, {'a': None, 'b': 'x'}], 'unknown')
+        self.assertEqual(report['fields'], {'a': {'completeness': 0.5, 'out_of_range': 0},
+                                            'b': {'completeness': 0.5, 'out_of_range': 0}})
+
+
+class TestCrawlQuality(unittest.TestCase):
+    """采集结果中的质量报告测试"""
+
+    def test_report_stored_with_crawl(self):
+        """测试流式入库结果的元数据包含按字段的质量报告"""
+        manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                 circuit_breaker=False, transport=False)
+        manager.crawl_config['quality_batch_size'] = 3
+        manager._iter_scraped_pages = lambda params: iter([
+            ({'url': None, 'label': '示例', 'fallback': True}, manager._get_fallback_weather_data(params))
+        ])
+        manager._save_to_database = lambda records, website, data_type, **kwargs: len(list(records))
+
+        result = manager.crawl_to_database('weather', 'weather_forecast', '北京')
+        quality = result['metadata']['data_quality']
+        self.assertEqual(quality['records'], 7)
+        self.assertEqual(quality['valid_records'], 7)
+        self.assertEqual(result['metadata']['data_quality_score'], 1.0)
+        self.assertEqual(set(quality['fields']), {'region', 'date', 'temperature', 'weather', 'humidity', 'wind_speed'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 爬虫限速器测试
+验证令牌桶预算、子域名共享额度与 429 自适应退避
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.rate_limiter import HostRateLimiter, parse_retry_after
+from data_crawler.stub_server import StubServer
+
+FIXTURE_DIR = project_root / 'tests' / 'fixtures' / 'html'
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestHostRateLimiter(unittest.TestCase):
+    """HostRateLimiter 测试"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = HostRateLimiter(default_rate_per_hour=3600, burst=2,
+                                       sleep=self.clock.sleep, clock=self.clock)
+
+    def test_burst_then_steady_rate(self):
+        """测试突发额度用完后按速率等待"""
+        waits = [self.limiter.acquire('http://a.example/%d' % i) for i in range(4)]
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 1.0)
+        self.assertAlmostEqual(waits[3], 1.0)
+
+    def test_subdomains_share_configured_budget(self):
+        """测试子域名共享已配置域名的额度"""
+        self.limiter.configure('www.nongji360.com', 360)
+        self.limiter.acquire('https://www.nongji360.com/')
+        self.limiter.acquire('https://o2o.nongji360.com/search?c=309')
+        wait_time = self.limiter.acquire('https://o2o.nongji360.com/search?c=107')
+        self.assertAlmostEqual(wait_time, 10.0)
+        self.assertIn('nongji360.com', self.limiter.get_status())
+
+    def test_configured_burst(self):
+        """测试按域名配置的令牌桶容量"""
+        self.limiter.configure('weather.com.cn', 3600, burst=4)
+        waits = [self.limiter.acquire('http://www.weather.com.cn/%d' % i) for i in range(5)]
+        self.assertEqual(waits[:4], [0.0] * 4)
+        self.assertAlmostEqual(waits[4], 1.0)
+
+    def test_throttle_honours_retry_after_and_recovers(self):
+        """测试 429 后遵守 Retry-After 并逐步恢复速率"""
+        url = 'http://b.example/'
+        pause = self.limiter.on_throttle(url, '7')
+        self.assertEqual(pause, 7.0)
+        self.assertGreaterEqual(self.limiter.acquire(url), 7.0)
+        self.assertEqual(self.limiter.get_status()['b.example']['rate_per_hour'], 1800.0)
+
+        for _ in range(10):
+            self.limiter.on_success(url)
+        self.assertEqual(self.limiter.get_status()['b.example']['rate_per_hour'], 3600.0)
+
+    def test_retry_after_is_capped(self):
+        """测试过大的 Retry-After 按上限截断，不会长时间占住主机"""
+        self.limiter.max_retry_after = 60
+        url = 'http://c.example/'
+        self.assertEqual(self.limiter.on_throttle(url, '86400'), 60.0)
+        self.assertLessEqual(self.limiter.acquire(url), 60.0)
+        self.assertEqual(self.limiter.on_throttle('http://d.example/', '5'), 5.0)
+
+    def test_parse_retry_after(self):
+        """测试 Retry-After 解析"""
+        self.assertEqual(parse_retry_after('120'), 120.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+
+class TestCrawlerRateLimits(unittest.TestCase):
+    """CrawlerManager 限速配置测试"""
+
+    def test_data_source_rate_limits_are_applied(self):
+        """测试 DATA_SOURCES 中的 rate_limit 被应用到对应站点"""
+        manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False, circuit_breaker=False)
+        manager.rate_limiter.acquire('https://www.114seeds.com/supply/')
+        manager.rate_limiter.acquire('http://www.weather.com.cn/weather/101010100.shtml')
+        status = manager.rate_limiter.get_status()
+        self.assertEqual(status['114seeds.com']['configured_rate_per_hour'], 1000.0)
+        self.assertEqual(status['weather.com.cn']['configured_rate_per_hour'], 2000.0)
+        self.assertEqual(manager._concurrency_for('www.weather.com.cn'), 4)
+        self.assertEqual(manager._concurrency_for('www.114seeds.com'), 1)
+
+    def test_backoff_delay_is_bounded(self):
+        """测试指数退避不超过上限"""
+        manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False, circuit_breaker=False)
+        for attempt in range(10):
+            delay = manager._backoff_delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, manager.crawl_config['backoff_max'])
+
+    def test_throttled_and_failed_requests_are_retried(self):
+        """测试替身服务器注入 429 和 500 时，重试后仍采集到全部真实数据"""
+        pages = {f'/supply/list_h_26{suffix}_s_997.html': (FIXTURE_DIR / f'seed_trade_list_p{n}.html').read_bytes()
+                 for n, suffix in ((1, ''), (2, '_p_2'), (3, '_p_3'))}
+        with StubServer(pages, throttle_rate=0.3, failure_rate=0.2, retry_after=0, seed=7) as server:
+            manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                     circuit_breaker=False)
+            manager.rate_limiter = HostRateLimiter(default_rate_per_hour=3600000, burst=100)
+            manager.crawl_config['backoff_base'] = 0.01
+            manager.supported_websites['seed_trade']['base_url'] = server.base_url
+
+            events = []
+            records = list(manager.iter_crawl('seed_trade', 'price', progress_callback=events.append))
+
+        statuses = {status for _, status in server.requests}
+        self.assertTrue({429, 500} <= statuses)
+        self.assertEqual(len(records), 45)
+        self.assertFalse(events[-1]['fallback'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 过期数据清理测试
+验证按保留期分批删除、每批独立提交、删除前归档以及取消后中止
+"""
+
+import gzip
+import json
+import tempfile
+import unittest
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event, func, select
+
+from auth.models import SeedPrice, WeatherData
+from data_crawler.retention import purge_expired, purge_table
+from data_crawler.synthetic import SyntheticDataGenerator, load_synthetic_data
+
+TODAY = date(2025, 9, 1)
+
+
+class TestRetention(unittest.TestCase):
+    """purge_table / purge_expired 测试"""
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        for model in (SeedPrice, WeatherData):
+            model.__table__.create(self.engine)
+        # 最近 10 天的数据，保留 5 天时恰好一半过期
+        self.generator = SyntheticDataGenerator(seed=3, end=TODAY, days=10)
+        load_synthetic_data(self.engine, self.generator, tables=('seed_prices', 'weather_data'))
+        self.per_day = {table: self.generator.count(table) // 10 for table in ('seed_prices', 'weather_data')}
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def dates(self, model):
+        with self.engine.connect() as conn:
+            return dict(conn.execute(
+                select(model.date, func.count()).group_by(model.date)
+            ).all())
+
+    def test_purges_in_batches(self):
+        """测试只删除截止日期之前的记录，按批提交"""
+        commits = []
+        event.listen(self.engine, 'commit', lambda conn: commits.append(1))
+        cutoff = TODAY - timedelta(days=4)
+
+        result = purge_table(self.engine, 'seed_prices', cutoff, batch_size=100)
+
+        expired = self.per_day['seed_prices'] * 5
+        self.assertEqual(result['deleted'], expired)
+        self.assertEqual(result['batches'], -(-expired // 100))
+        self.assertEqual(len(commits), result['batches'])
+        self.assertTrue(result['completed'])
+        self.assertGreater(result['rows_per_second'], 0)
+        self.assertIsNone(result['archive'])
+        self.assertEqual(min(self.dates(SeedPrice)), cutoff)
+        self.assertEqual(sum(self.dates(SeedPrice).values()), self.per_day['seed_prices'] * 5)
+
+        # 没有过期数据时不删除
+        self.assertEqual(purge_table(self.engine, 'seed_prices', cutoff)['batches'], 0)
+
+    def test_per_table_retention_and_archive(self):
+        """测试各表使用各自的保留期，归档文件包含被删除的整行"""
+        result = purge_expired(self.engine, {
+            'tables': {'seed_prices': 7, 'weather_data': {'days': 3, 'archive': True}},
+            'batch_size': 250,
+            'archive_dir': self.temp_dir.name
+        }, today=TODAY)
+
+        self.assertEqual(result['tables']['seed_prices']['deleted'], self.per_day['seed_prices'] * 2)
+        self.assertIsNone(result['tables']['seed_prices']['archive'])
+        weather = result['tables']['weather_data']
+        self.assertEqual(weather['deleted'], self.per_day['weather_data'] * 6)
+        self.assertEqual(result['deleted'], sum(stats['deleted'] for stats in result['tables'].values()))
+        self.assertEqual(min(self.dates(WeatherData)), TODAY - timedelta(days=3))
+
+        with gzip.open(weather['archive'], 'rt', encoding='utf-8') as f:
+            archived = [json.loads(line) for line in f]
+        self.assertEqual(len(archived), weather['deleted'])
+        self.assertEqual(len({row['id'] for row in archived}), len(archived))
+        self.assertTrue(all(row['date'] < (TODAY - timedelta(days=3)).isoformat() for row in archived))
+        self.assertEqual(set(archived[0]), {column.name for column in WeatherData.__table__.columns})
+
+    def test_stops_when_cancelled(self):
+        """测试取消后在当前批结束时中止，已删除的批次保持提交"""
+        batches = []
+        result = purge_expired(self.engine, {'tables': {'seed_prices': 4, 'weather_data': 4}, 'batch_size': 50},
+                               today=TODAY, should_stop=lambda: len(batches) >= 1,
+                               progress_callback=batches.append)
+
+        self.assertFalse(result['completed'])
+        self.assertEqual(list(result['tables']), ['seed_prices'])
+        self.assertEqual(sum(self.dates(WeatherData).values()), self.generator.count('weather_data'))
+
+        result = purge_table(self.engine, 'weather_data', TODAY - timedelta(days=4), batch_size=50,
+                             should_stop=lambda: True)
+        self.assertFalse(result['completed'])
+        self.assertEqual(result['deleted'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,397 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 定时任务调度器测试
+验证任务在线程池中并发执行、同一任务不重叠运行、并发上限与超时取消，
+任务表、运行历史和重启后的补跑策略，以及多进程下只有主调度进程执行任务
+"""
+
+import unittest
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+import scheduler as scheduler_module
+from scheduler import TaskScheduler
+from scheduler_store import MISFIRE_RUN_ONCE, SchedulerStore
+
+
+def run_scheduler_process(store_path, log_path, at_time, duration, lease_ttl):
+    """子进程：启动调度器，注册两个在 at_time 运行的任务，运行 duration 秒后停止"""
+    manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                             circuit_breaker=False, transport=False)
+    scheduler = TaskScheduler(crawler_manager=manager, store_path=store_path, lease_ttl=lease_ttl)
+
+    def record(job_id):
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(f'{job_id} {os.getpid()}\n')
+
+    def setup():
+        for job_id in ('crawl', 'report'):
+            scheduler.add_job(job_id, job_id, lambda job_id=job_id: record(job_id),
+                              scheduler._schedule.every().day.at(at_time))
+    scheduler._setup_schedules = setup
+    scheduler.start()
+    time.sleep(duration)
+    scheduler.stop()
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class TestWorkerPool(unittest.TestCase):
+    """任务分派测试"""
+
+    def setUp(self):
+        self.manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                      circuit_breaker=False, transport=False)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store_path = os.path.join(self.tmp_dir.name, 'scheduler.db')
+        self.scheduler = TaskScheduler(crawler_manager=self.manager, max_workers=4, store_path=self.store_path)
+        self.scheduler._setup_schedules = lambda: None
+        self.scheduler.start()
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.scheduler.stop()
+        self.scheduler.store.close()
+        self.tmp_dir.cleanup()
+
+    def blocking_job(self, started):
+        def job():
+            started.append(threading.current_thread().name)
+            self.release.wait(5)
+        return job
+
+    def status(self, job_id):
+        return self.scheduler.get_status()['jobs'][job_id]
+
+    def test_independent_jobs_run_concurrently(self):
+        """测试慢任务运行期间其他任务仍能开始执行"""
+        slow, fast = [], []
+        self.scheduler.add_job('slow', '慢任务', self.blocking_job(slow))
+        self.scheduler.add_job('fast', '快任务', lambda: fast.append(True))
+
+        self.assertTrue(self.scheduler.run_job('slow'))
+        self.assertTrue(self.scheduler.run_job('fast'))
+        self.assertTrue(wait_until(lambda: fast and slow))
+        self.assertTrue(wait_until(lambda: self.status('fast')['last_status'] == 'succeeded'))
+        self.assertEqual(self.status('slow')['running'], 1)
+
+    def test_overlapping_run_is_skipped(self):
+        """测试上次运行未结束时跳过同一任务的新运行"""
+        started = []
+        self.scheduler.add_job('crawl', '采集', self.blocking_job(started))
+
+        self.assertTrue(self.scheduler.run_job('crawl'))
+        self.assertTrue(wait_until(lambda: started))
+        self.assertFalse(self.scheduler.run_job('crawl'))
+        self.assertEqual(self.status('crawl')['skipped'], 1)
+
+        self.release.set()
+        self.assertTrue(wait_until(lambda: self.status('crawl')['running'] == 0))
+        self.assertTrue(self.scheduler.run_job('crawl'))
+        self.assertTrue(wait_until(lambda: len(started) == 2))
+
+    def test_max_instances(self):
+        """测试按任务设置的并发上限"""
+        started = []
+        self.scheduler.add_job('report', '报告', self.blocking_job(started), max_instances=2)
+
+        self.assertTrue(self.scheduler.run_job('report'))
+        self.assertTrue(self.scheduler.run_job('report'))
+        self.assertFalse(self.scheduler.run_job('report'))
+        self.assertTrue(wait_until(lambda: len(started) == 2))
+        self.assertEqual(self.status('report')['running'], 2)
+
+    def test_failure_is_recorded(self):
+        """测试任务异常不影响调度器，并记录运行结果"""
+        def broken():
+            raise RuntimeError('boom')
+
+        self.scheduler.add_job('broken', '异常任务', broken)
+        self.assertTrue(self.scheduler.run_job('broken'))
+        self.assertTrue(wait_until(lambda: self.status('broken')['last_status'] == 'failed'))
+        self.assertFalse(self.scheduler.run_job('missing'))
+
+    def test_timeout_cancels_crawl(self):
+        """测试采集任务超时后在下一页完成时中止，并释放并发名额"""
+        pages = []
+
+        def slow_pages(params):
+            for i in range(50):
+                time.sleep(0.05)
+                pages.append(i)
+                yield {'url': None, 'label': f'第{i}页', 'fallback': False}, [{'region': '北京'}]
+
+        self.manager._iter_scraped_pages = slow_pages
+        self.manager._save_to_database = lambda records, website, data_type, **kwargs: len(list(records))
+        self.scheduler.add_job('weather_crawl', '天气数据采集', self.scheduler._collect_weather_data, timeout=0.2)
+
+        self.assertTrue(self.scheduler.run_job('weather_crawl'))
+        self.assertTrue(wait_until(lambda: self.status('weather_crawl')['last_status'] == 'cancelled'))
+        status = self.status('weather_crawl')
+        self.assertEqual((status['timeouts'], status['running']), (1, 0))
+        self.assertEqual(status['last_error'], '超过 0.2 秒，已取消')
+        self.assertLess(len(pages), 50)
+
+
+class TestSchedulerLoop(unittest.TestCase):
+    """调度线程等待与唤醒测试"""
+
+    def setUp(self):
+        self.manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                      circuit_breaker=False, transport=False)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.scheduler = TaskScheduler(crawler_manager=self.manager,
+                                       store_path=os.path.join(self.tmp_dir.name, 'scheduler.db'))
+        self.scheduler._setup_schedules = lambda: None
+        self.scheduler.start()
+
+    def tearDown(self):
+        self.scheduler.stop()
+        self.tmp_dir.cleanup()
+
+    def test_stop_is_immediate(self):
+        """测试停止调度器时调度线程立即退出"""
+        self.scheduler.add_job('daily', '每日任务', lambda: None, self.scheduler._schedule.every().day.at('06:00'))
+        thread = self.scheduler.scheduler_thread
+        started = time.monotonic()
+        self.scheduler.stop()
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertFalse(thread.is_alive())
+
+    def test_added_job_wakes_scheduler(self):
+        """测试新增任务唤醒空闲的调度线程，任务按时触发"""
+        times = []
+        added = time.monotonic()
+        self.scheduler.add_job('tick', '每秒任务', lambda: times.append(time.monotonic() - added),
+                               self.scheduler._schedule.every(1).seconds)
+
+        self.assertTrue(wait_until(lambda: len(times) >= 2, timeout=4))
+        self.assertLess(times[0], 1.5)
+        self.assertLess(times[1] - times[0], 1.5)
+
+    def test_request_failure_does_not_block_schedule(self):
+        """测试读取转交请求出错时定时任务仍按时执行，转交的请求按顺序取出一次"""
+        store = SchedulerStore(os.path.join(self.tmp_dir.name, 'requests.db'))
+        for job_id in ('a', 'b', 'a'):
+            store.request_run(job_id)
+        self.assertEqual(store.take_requests(), ['a', 'b', 'a'])
+        self.assertEqual(store.take_requests(), [])
+        store.close()
+
+        def broken():
+            raise RuntimeError('no such function: RETURNING')
+        self.scheduler.store.take_requests = broken
+        times = []
+        self.scheduler.add_job('tick', '每秒任务', lambda: times.append(1), self.scheduler._schedule.every(1).seconds)
+        self.assertTrue(wait_until(lambda: len(times) >= 1, timeout=3))
+
+
+    def test_idle_loop_does_not_write(self):
+        """测试空闲轮询只读不写：下次运行时间未变化时不写库，没有转交请求时不占用写锁"""
+        poll_seconds = scheduler_module.REQUEST_POLL_SECONDS
+        scheduler_module.REQUEST_POLL_SECONDS = 0.02
+        self.addCleanup(setattr, scheduler_module, 'REQUEST_POLL_SECONDS', poll_seconds)
+        self.scheduler.add_job('hourly', '每小时任务', lambda: None, self.scheduler._schedule.every().hour)
+        self.assertTrue(wait_until(lambda: self.scheduler.store.get_job('hourly')['next_run_at'], timeout=2))
+
+        statements = []
+        self.scheduler.store._conn.set_trace_callback(statements.append)
+        self.scheduler._wake()
+        time.sleep(0.3)
+        self.scheduler.store._conn.set_trace_callback(None)
+        self.assertTrue(any(sql.startswith('SELECT 1 FROM scheduler_requests') for sql in statements))
+        self.assertFalse([sql for sql in statements if sql.split()[0] in ('BEGIN', 'UPDATE', 'INSERT', 'DELETE')])
+
+        # 有转交请求时仍会取出并执行
+        ran = []
+        self.scheduler.add_job('manual', '手动任务', lambda: ran.append(1))
+        self.scheduler.store.request_run('manual')
+        self.assertTrue(wait_until(lambda: ran, timeout=2))
+
+
+class TestJobStore(unittest.TestCase):
+    """任务表与补跑策略测试"""
+
+    def setUp(self):
+        self.manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                      circuit_breaker=False, transport=False)
+        self.manager._save_to_database = lambda records, website, data_type, **kwargs: len(list(records))
+        self.manager._iter_scraped_pages = lambda params: iter([
+            ({'url': None, 'label': '示例', 'fallback': True}, self.manager._get_fallback_weather_data(params))
+        ])
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store_path = os.path.join(self.tmp_dir.name, 'scheduler.db')
+        self.calls = []
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_scheduler(self):
+        scheduler = TaskScheduler(crawler_manager=self.manager, store_path=self.store_path)
+
+        def setup():
+            every = scheduler._schedule.every
+            scheduler.add_job('weather_crawl', '天气数据采集', scheduler._collect_weather_data,
+                              every().day.at('07:00'), misfire_policy=MISFIRE_RUN_ONCE, misfire_grace=3600)
+            scheduler.add_job('report', '报告', lambda: self.calls.append('report'),
+                              every().day.at('01:00'))
+        scheduler._setup_schedules = setup
+        return scheduler
+
+    def restart(self, missed):
+        """模拟停机：把上次保存的下次运行时间改为过去，然后启动新的调度器"""
+        store = SchedulerStore(self.store_path)
+        for job_id in missed:
+            store.save_job(job_id, job_id)
+        store.set_next_runs({job_id: time.time() - seconds for job_id, seconds in missed.items()})
+        store.close()
+        scheduler = self.make_scheduler()
+        scheduler.start()
+        return scheduler
+
+    def test_run_history_and_status(self):
+        """测试运行结果（耗时、记录数）写入任务表，重启后仍能查询"""
+        scheduler = self.make_scheduler()
+        scheduler.start()
+        self.assertTrue(scheduler.run_job('weather_crawl'))
+        self.assertTrue(wait_until(lambda: scheduler.get_status()['jobs']['weather_crawl']['last_status']))
+        scheduler.stop()
+
+        status = self.make_scheduler().get_status()
+        job = status['jobs']['weather_crawl']
+        self.assertEqual((job['last_status'], job['last_records']), ('succeeded', 7))
+        self.assertEqual(job['schedule'], 'every day at 07:00')
+        self.assertIsNotNone(job['next_run'])
+        self.assertEqual(job['stats']['runs'], 1)
+        self.assertEqual(status['recent_runs'][0]['trigger'], 'manual')
+
+    def test_missed_run_is_caught_up_once(self):
+        """测试错过的运行在启动时按策略补跑一次，不补跑的任务保持不动"""
+        scheduler = self.restart({'weather_crawl': 600, 'report': 600})
+        try:
+            self.assertTrue(wait_until(lambda: scheduler.get_status()['jobs']['weather_crawl']['last_status']))
+            runs = scheduler.store.list_runs()
+            self.assertEqual([(run['job_id'], run['trigger']) for run in runs], [('weather_crawl', 'catch_up')])
+            self.assertEqual(self.calls, [])
+            # 补跑后保存新的下次运行时间，再次重启不会重复补跑
+            self.assertGreater(scheduler.store.get_job('weather_crawl')['next_run_at'], time.time())
+        finally:
+            scheduler.stop()
+
+    def test_missed_beyond_grace_is_skipped(self):
+        """测试错过时间超过补跑期限时不再补跑"""
+        scheduler = self.restart({'weather_crawl': 2 * 3600})
+        try:
+            time.sleep(0.2)
+            self.assertEqual(scheduler.store.list_runs(), [])
+        finally:
+            scheduler.stop()
+
+    def test_interrupted_runs(self):
+        """测试上次进程遗留的运行中记录在启动时标记为中断"""
+        store = SchedulerStore(self.store_path)
+        run_id = store.start_run('weather_crawl', 'schedule')
+        store.close()
+
+        scheduler = self.make_scheduler()
+        scheduler.start()
+        scheduler.stop()
+        run = scheduler.store.list_runs()[0]
+        self.assertEqual((run['run_id'], run['status']), (run_id, 'interrupted'))
+
+
+
+class TestLeaderElection(unittest.TestCase):
+    """多进程主调度进程选举测试"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store_path = os.path.join(self.tmp_dir.name, 'scheduler.db')
+        self.log_path = os.path.join(self.tmp_dir.name, 'runs.log')
+        self.context = multiprocessing.get_context('spawn')
+        self.processes = []
+
+    def tearDown(self):
+        for process in self.processes:
+            if process.is_alive():
+                process.kill()
+            process.join()
+        self.tmp_dir.cleanup()
+
+    def at_time(self, seconds):
+        moment = datetime.now() + timedelta(seconds=seconds)
+        if moment.date() != datetime.now().date():
+            self.skipTest('临近午夜，任务时间会跨天')
+        return moment.strftime('%H:%M:%S')
+
+    def spawn(self, at_time, duration, lease_ttl=30):
+        process = self.context.Process(target=run_scheduler_process,
+                                       args=(self.store_path, self.log_path, at_time, duration, lease_ttl))
+        process.start()
+        self.processes.append(process)
+        return process
+
+    def executions(self):
+        if not os.path.exists(self.log_path):
+            return []
+        with open(self.log_path, encoding='utf-8') as f:
+            return [line.split() for line in f.read().splitlines()]
+
+    def leader(self):
+        store = SchedulerStore(self.store_path)
+        try:
+            return store.get_leader()
+        finally:
+            store.close()
+
+    def test_each_job_runs_once_across_processes(self):
+        """测试多个进程同时运行调度器时，每个任务只执行一次，且都由主调度进程执行"""
+        at_time = self.at_time(8)
+        for _ in range(3):
+            self.spawn(at_time, duration=11)
+        for process in self.processes:
+            process.join(30)
+            self.assertEqual(process.exitcode, 0)
+
+        executions = self.executions()
+        self.assertEqual(sorted(job_id for job_id, _ in executions), ['crawl', 'report'])
+        self.assertEqual(len({pid for _, pid in executions}), 1)
+
+    def test_standby_takes_over_when_leader_dies(self):
+        """测试主调度进程异常退出、租约过期后，其他进程接管并执行任务（只执行一次）"""
+        at_time = self.at_time(14)
+        first = self.spawn(at_time, duration=30, lease_ttl=1.5)
+        self.assertTrue(wait_until(lambda: self.leader() is not None, timeout=20))
+        second = self.spawn(at_time, duration=18, lease_ttl=1.5)
+        time.sleep(4)  # 等待第二个进程启动完成
+        first.kill()   # 不释放租约，只能等待过期
+
+        second.join(30)
+        self.assertEqual(second.exitcode, 0)
+        executions = self.executions()
+        self.assertEqual(sorted(job_id for job_id, _ in executions), ['crawl', 'report'])
+        self.assertEqual({pid for _, pid in executions}, {str(second.pid)})
+
+
+if __name__ == '__main__':
+    unittest.main()
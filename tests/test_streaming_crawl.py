@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 流式采集测试
+验证 iter_crawl 逐页产出记录、进度回调以及分块入库
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.rate_limiter import HostRateLimiter
+from data_crawler.stub_server import StubServer
+
+FIXTURE_DIR = project_root / 'tests' / 'fixtures' / 'html'
+
+
+class TestStreamingCrawl(unittest.TestCase):
+    """流式采集测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        page = (FIXTURE_DIR / 'seed_trade_list_p1.html').read_bytes()
+        cls.server = StubServer({
+            '/supply/list_h_26_s_997.html': page,
+            '/supply/list_h_26_p_2_s_997.html': page,
+            '/supply/list_h_26_p_3_s_997.html': page,
+        }).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                      circuit_breaker=False)
+        self.manager.rate_limiter = HostRateLimiter(default_rate_per_hour=3600000, burst=100)
+        self.manager.supported_websites['seed_trade']['base_url'] = self.server.base_url
+
+    def test_iter_crawl_yields_page_by_page(self):
+        """测试记录按页产出，进度在采集过程中可见"""
+        events = []
+        second_page = '/supply/list_h_26_p_2_s_997.html'
+        requests_before = self.server.count(second_page)
+        stream = self.manager.iter_crawl('seed_trade', 'price', progress_callback=events.append)
+
+        first = next(stream)
+        self.assertEqual(first['region'], '新疆')
+        self.assertEqual(len(events), 1)
+        self.assertEqual(self.server.count(second_page), requests_before)
+
+        remaining = list(stream)
+        self.assertEqual(1 + len(remaining), 45)
+        self.assertEqual([(e['pages'], e['records']) for e in events], [(1, 15), (2, 30), (3, 45)])
+        self.assertFalse(events[-1]['fallback'])
+
+    def test_fallback_is_flagged(self):
+        """测试无真实数据时产出后备数据并标记"""
+        self.manager.crawl_config['max_retries'] = 0
+        self.manager.supported_websites['seed_trade']['base_url'] = self.server.url('/missing')
+        events = []
+        records = list(self.manager.iter_crawl('seed_trade', 'price', progress_callback=events.append))
+        self.assertEqual(len(records), 20)
+        self.assertTrue(events[-1]['fallback'])
+
+    def test_crawl_to_database_saves_in_chunks(self):
+        """测试流式入库按块消费记录"""
+        chunks = []
+
+        def fake_save(records, website, data_type, chunk_size=None, on_commit=None):
+            chunk = []
+            for record in records:
+                chunk.append(record)
+                if len(chunk) == chunk_size:
+                    chunks.append(len(chunk))
+                    chunk = []
+            if chunk:
+                chunks.append(len(chunk))
+            return sum(chunks)
+
+        self.manager._save_to_database = fake_save
+        result = self.manager.crawl_to_database('seed_trade', 'price', chunk_size=20)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['total_records'], 45)
+        self.assertEqual(result['crawled_pages'], 3)
+        self.assertEqual(chunks, [20, 20, 5])
+
+    def test_invalid_params_raise(self):
+        """测试不支持的网站类型"""
+        with self.assertRaises(ValueError):
+            list(self.manager.iter_crawl('unknown', 'price'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 合成数据测试
+验证生成结果可复现、覆盖全部省份与品种、自然键不重复且通过质量检查，以及批量写入
+"""
+
+import unittest
+import sys
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, func, select
+
+from auth.models import SeedPrice, WeatherData, FarmMachine
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.quality import assess_quality
+from data_crawler.synthetic import PROVINCES, SEED_VARIETIES, SyntheticDataGenerator, load_synthetic_data
+from data_crawler.weather_cities import PROVINCE_CITY_CODES
+
+END = date(2025, 9, 1)
+
+
+class TestSyntheticDataGenerator(unittest.TestCase):
+    """SyntheticDataGenerator 测试"""
+
+    def setUp(self):
+        self.generator = SyntheticDataGenerator(seed=7, end=END, days=10)
+
+    def test_reproducible(self):
+        """测试相同随机种子生成相同数据，不同种子生成不同数据"""
+        again = SyntheticDataGenerator(seed=7, end=END, days=10)
+        other = SyntheticDataGenerator(seed=8, end=END, days=10)
+        for table in ('seed_prices', 'weather_data', 'farm_machines'):
+            first = list(self.generator.rows(table, limit=500))
+            self.assertEqual(first, list(again.rows(table, limit=500)), table)
+            self.assertNotEqual(first, list(other.rows(table, limit=500)), table)
+
+    def test_seed_prices_cover_all_series(self):
+        """测试种子价格覆盖每天、每省、每个品种，且通过质量检查"""
+        rows = list(self.generator.seed_prices())
+        self.assertEqual(len(rows), self.generator.count('seed_prices'))
+        self.assertEqual({row['region'] for row in rows}, set(PROVINCES))
+        self.assertEqual({row['variety'] for row in rows},
+                         {variety for varieties in SEED_VARIETIES.values() for variety in varieties})
+        self.assertEqual((rows[0]['date'], rows[-1]['date']), (date(2025, 8, 23), END))
+
+        report = assess_quality(rows, 'seed_trade', today=END)
+        self.assertEqual(report['valid_records'], len(rows))
+        self.assertEqual(report['duplicate_rate'], 0.0)
+
+    def test_weather_regions_match_crawler(self):
+        """测试天气地区名与天气网采集结果一致，取值在合理范围内"""
+        rows = list(self.generator.weather())
+        regions = {row['region'] for row in rows}
+        self.assertEqual(len(regions), sum(len(cities) for cities in PROVINCE_CITY_CODES.values()))
+        self.assertIn('河北石家庄', regions)
+        self.assertIn('北京', regions)
+
+        report = assess_quality(rows, 'weather', today=END)
+        self.assertEqual(report['valid_records'], len(rows))
+        self.assertEqual(report['duplicate_rate'], 0.0)
+
+    def test_fallback_uses_same_vocabulary(self):
+        """测试后备数据的品种、天气和品牌都在合成数据的词表中"""
+        manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                 circuit_breaker=False, transport=False)
+        seed = manager._get_fallback_seed_data({})
+        self.assertEqual([row['variety'] for row in seed[:5]], list(SEED_VARIETIES['玉米种子'][:5]))
+        machines = list(self.generator.farm_machines(200))
+        fallback_machines = manager._get_fallback_machine_data({})
+        self.assertLessEqual({row['brand'] for row in fallback_machines}, {row['brand'] for row in machines})
+
+
+class TestLoadSyntheticData(unittest.TestCase):
+    """批量写入测试"""
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        for model in (SeedPrice, WeatherData, FarmMachine):
+            model.__table__.create(self.engine)
+
+    def count(self, model):
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(model.__table__)).scalar()
+
+    def test_load_and_rerun(self):
+        """测试写入行数与统计一致，重复写入不产生重复行（只替换合成农机行，保留真实数据）"""
+        with self.engine.begin() as conn:
+            conn.execute(FarmMachine.__table__.insert(), {'product_name': '拖拉机', 'brand': '约翰迪尔',
+                                                          'model': '5E-954', 'specifications': '功率: 95马力'})
+        generator = SyntheticDataGenerator(seed=1, end=END, days=3)
+        results = load_synthetic_data(self.engine, generator, machine_count=50, chunk_size=200)
+
+        self.assertEqual(results['seed_prices']['rows'], generator.count('seed_prices'))
+        self.assertEqual(self.count(SeedPrice), generator.count('seed_prices'))
+        self.assertEqual(self.count(WeatherData), generator.count('weather_data'))
+        self.assertEqual(self.count(FarmMachine), 51)
+        self.assertGreater(results['weather_data']['rows_per_second'], 0)
+
+        load_synthetic_data(self.engine, generator, machine_count=50, chunk_size=200)
+        self.assertEqual(self.count(SeedPrice), generator.count('seed_prices'))
+        self.assertEqual(self.count(WeatherData), generator.count('weather_data'))
+        self.assertEqual(self.count(FarmMachine), 51)
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(select(FarmMachine.model).where(
+                FarmMachine.specifications == '功率: 95马力')).scalar(), '5E-954')
+
+    def test_limit(self):
+        """测试 limit 限制每张表的行数"""
+        generator = SyntheticDataGenerator(seed=1, end=END, days=30)
+        results = load_synthetic_data(self.engine, generator, limit=120)
+        self.assertEqual({table: stats['rows'] for table, stats in results.items()},
+                         {'seed_prices': 120, 'weather_data': 120, 'farm_machines': 120})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 爬虫传输层测试
+验证多个 CrawlerManager 共享连接池、长连接在多次采集之间复用，以及爬虫连接专用的 DNS 缓存
+"""
+
+import socket
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.rate_limiter import HostRateLimiter
+from data_crawler.transport import DnsCache, RequestsTransport, create_transport, get_shared_transport
+from data_crawler.stub_server import StubServer
+
+FIXTURE_DIR = project_root / 'tests' / 'fixtures' / 'html'
+
+
+def make_manager(transport, base_url):
+    manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                             circuit_breaker=False, transport=transport)
+    manager.rate_limiter = HostRateLimiter(default_rate_per_hour=3600000, burst=100)
+    manager.supported_websites['seed_trade']['base_url'] = base_url
+    return manager
+
+
+class TestTransport(unittest.TestCase):
+    """传输层测试"""
+
+    def test_managers_share_transport(self):
+        """测试默认情况下所有管理器使用同一个共享传输层"""
+        first = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False, circuit_breaker=False)
+        second = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False, circuit_breaker=False)
+        self.assertIs(first.transport, get_shared_transport())
+        self.assertIs(first.transport, second.transport)
+
+    def test_missing_httpx_falls_back_to_requests(self):
+        """测试要求 HTTP/2 但依赖不可用时回退到 requests"""
+        transport = create_transport({'backend': 'httpx', 'http2': True})
+        try:
+            self.assertIn(transport.name, ('requests', 'httpx'))
+        finally:
+            transport.close()
+
+    def test_connections_reused_across_crawls(self):
+        """测试两次采集（不同管理器）复用同一条长连接"""
+        body = (FIXTURE_DIR / 'seed_trade_list_p1.html').read_bytes()
+        transport = RequestsTransport(pool_maxsize=1)
+        with StubServer({'/supply/list_h_26_s_997.html': body}, keep_alive=True) as server:
+            try:
+                for _ in range(2):
+                    manager = make_manager(transport, server.base_url)
+                    records = list(manager.iter_crawl('seed_trade', 'price', max_pages=1))
+                    self.assertEqual(len(records), 15)
+            finally:
+                transport.close()
+
+        self.assertEqual(server.count('/supply/list_h_26_s_997.html', 200), 2)
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(transport.get_status()['requests'], 2)
+
+
+class TestDnsCache(unittest.TestCase):
+    """DNS 缓存测试"""
+
+    def test_cached_until_expiry(self):
+        """测试同一主机在 TTL 内只解析一次，过期后重新解析"""
+        cache = DnsCache(ttl=300)
+        first = cache.resolve('localhost', 80)
+        self.assertEqual(cache.resolve('localhost', 80), first)
+        self.assertEqual((cache.stats['hits'], cache.stats['misses']), (1, 1))
+
+        cache.ttl = 0
+        cache.clear()
+        cache.resolve('localhost', 80)
+        cache.resolve('localhost', 80)
+        self.assertEqual(cache.stats['misses'], 3)
+
+    def test_entries_are_bounded(self):
+        """测试缓存条目数不超过上限，淘汰最久未使用的条目"""
+        cache = DnsCache(ttl=300, max_entries=2)
+        for port in (80, 81, 80, 82):
+            cache.resolve('localhost', port)
+        self.assertEqual(cache.get_stats()['entries'], 2)
+        cache.resolve('localhost', 80)
+        self.assertEqual(cache.stats['hits'], 2)
+
+    def test_scoped_to_crawler_connections(self):
+        """测试只有爬虫传输层的连接使用缓存，进程级 socket.getaddrinfo 保持不变"""
+        original = socket.getaddrinfo
+        cache = DnsCache(ttl=300)
+        transport = RequestsTransport(keep_alive=False, dns_cache=cache)
+        body = (FIXTURE_DIR / 'seed_trade_list_p1.html').read_bytes()
+        with StubServer({'/supply/list_h_26_s_997.html': body}) as server:
+            url = server.url('/supply/list_h_26_s_997.html').replace('127.0.0.1', 'localhost')
+            try:
+                for _ in range(2):
+                    self.assertEqual(transport.get(url, timeout=5).status_code, 200)
+            finally:
+                transport.close()
+
+        self.assertIs(socket.getaddrinfo, original)
+        self.assertEqual((cache.stats['hits'], cache.stats['misses']), (1, 1))
+        self.assertEqual(transport.get_status()['dns_cache']['entries'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
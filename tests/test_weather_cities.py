@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AgriDec 全国天气采集测试
+验证省份城市代码表覆盖全部省级行政区，以及全国天气在主机预算内并发抓取
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from data_crawler.crawler_manager import CrawlerManager
+from data_crawler.extraction import PROVINCES
+from data_crawler.rate_limiter import HostRateLimiter
+from data_crawler.weather_cities import PROVINCE_CITY_CODES, weather_targets
+from data_crawler.stub_server import StubServer
+
+FIXTURE_DIR = project_root / 'tests' / 'fixtures' / 'html'
+
+
+class TestWeatherCities(unittest.TestCase):
+    """城市代码表测试"""
+
+    def test_table_covers_all_provinces(self):
+        """测试代码表覆盖 34 个省级行政区且城市代码不重复"""
+        self.assertEqual(set(PROVINCE_CITY_CODES), set(PROVINCES))
+        codes = [code for cities in PROVINCE_CITY_CODES.values() for _, code in cities]
+        self.assertEqual(len(codes), len(set(codes)))
+
+    def test_region_selection(self):
+        """测试全国、省份、城市三种采集范围"""
+        nationwide = weather_targets('全国')
+        self.assertEqual(len(nationwide), 34)
+        self.assertIn(('河北石家庄', '101090101'), nationwide)
+        self.assertEqual(weather_targets('北京'), [('北京', '101010100')])
+        self.assertEqual(len(weather_targets('山东')), 4)
+        self.assertEqual(weather_targets('广州'), [('广东广州', '101280101')])
+
+
+class TestNationwideWeatherCrawl(unittest.TestCase):
+    """全国天气并发采集测试"""
+
+    def test_fan_out_within_host_budget(self):
+        """测试全国天气一次采集覆盖所有省份，并发数不超过主机配置"""
+        fixtures = [path.read_bytes() for path in sorted(FIXTURE_DIR.glob('weather_*.shtml'))]
+        pages = {f'/weather/{code}.shtml': fixtures[i % len(fixtures)]
+                 for i, (_, code) in enumerate(weather_targets('全国'))}
+
+        with StubServer(pages, latency=0.05) as server:
+            manager = CrawlerManager(http_cache=False, crawl_state=False, page_archive=False,
+                                     circuit_breaker=False)
+            manager.rate_limiter = HostRateLimiter(default_rate_per_hour=3600000, burst=100)
+            manager._host_concurrency['127.0.0.1'] = 3
+            manager.supported_websites['weather']['base_url'] = server.base_url
+            try:
+                records = list(manager.iter_crawl('weather', 'weather_forecast'))
+            finally:
+                manager.close()
+
+        self.assertEqual(len(server.requests), 34)
+        self.assertEqual(len({record['region'] for record in records}), 34)
+        self.assertGreater(server.max_in_flight, 1)
+        self.assertLessEqual(server.max_in_flight, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()